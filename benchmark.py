@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Benchmarks each solving engine and option over the puzzle corpora
+bundled in `samples/corpus` (easy, medium and hard, 50 puzzles each,
+along with 20 16x16 and 10 25x25 puzzles with about half their cells
+given) and the sample matricies from `samples/samples.py`. The batch
+engine and the construction timings only run on the 9x9 corpora.
+
+For every corpus and configuration it reports puzzles per second,
+the p50/p95/p99 latency per puzzle and, for the configurations that
+walk the `Matrix` objects, how the time splits across the
+`update_possibilities`, `fill_in_answers`, `update_remaining_numbers`
+and `quality_check` stages. Results can be written as JSON and
+compared against an earlier run.
+
+With `--construction` it also times building a `Matrix` from each puzzle,
+from nested lists, `Matrix.from_string` and `Matrix.from_bytes`, against
+the old way of recomputing the group possibilities as each cell is added.
+
+Run with `python benchmark.py [--repeat N] [--construction] [--output run.json] [--compare earlier.json]`.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from time import perf_counter
+
+from sudoku_objects import batch
+from sudoku_objects import dlx
+from sudoku_objects import flat
+from sudoku_objects.base import string_to_values
+from sudoku_objects.base import values_to_string
+from sudoku_objects.cell import Cell
+from sudoku_objects.corpus import encode
+from sudoku_objects.matrix import Matrix
+from sudoku_objects.pipeline import read_puzzles
+
+CORPUS_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'samples')
+CORPORA = {
+    'samples': os.path.join(CORPUS_DIRECTORY, 'samples.txt'),
+    'easy': os.path.join(CORPUS_DIRECTORY, 'corpus', 'easy.txt'),
+    'medium': os.path.join(CORPUS_DIRECTORY, 'corpus', 'medium.txt'),
+    'hard': os.path.join(CORPUS_DIRECTORY, 'corpus', 'hard.txt'),
+    '16x16': os.path.join(CORPUS_DIRECTORY, 'corpus', '16x16.txt'),
+    '25x25': os.path.join(CORPUS_DIRECTORY, 'corpus', '25x25.txt'),
+}
+STAGES = ('update_possibilities', 'fill_in_answers', 'update_remaining_numbers', 'quality_check')
+
+
+class TimedMatrix(Matrix):
+    """
+    Description
+    -----------
+    A Matrix that adds up the time spent in each of its solving stages
+    into `stage_seconds`, a dict shared with whoever created it.
+    """
+    def __init__(self, values, stage_seconds: dict, **kwargs):
+        Matrix.__init__(self, values, **kwargs)
+        self.stage_seconds = stage_seconds
+
+    def _timed(self, stage: str, *args, **kwargs):
+        start = perf_counter()
+        result = getattr(Matrix, stage)(self, *args, **kwargs)
+        self.stage_seconds[stage] += perf_counter() - start
+        return result
+
+    def update_possibilities(self):
+        return self._timed('update_possibilities')
+
+    def fill_in_answers(self):
+        return self._timed('fill_in_answers')
+
+    def update_remaining_numbers(self):
+        return self._timed('update_remaining_numbers')
+
+    def quality_check(self, *args, **kwargs):
+        return self._timed('quality_check', *args, **kwargs)
+
+
+class EagerMatrix(Matrix):
+    """
+    Description
+    -----------
+    A Matrix built the way it was before `Matrix._add_cells`, recomputing the
+    possibilities of a cell's groups as each cell is added, as a baseline
+    for the construction benchmark.
+    """
+    def _add_cells(self, grid: list) -> None:
+        for index, value in enumerate(grid):
+            row_num, column_num = divmod(index, 9)
+            row, column, box = self.rows[row_num], self.columns[column_num], self.boxes[flat.BOX_OF[index]]
+            this_cell = Cell(value=value or None, row=row, column=column, box=box, bitmask=self.bitmask)
+            self.cells.append(this_cell)
+            for group in (row, column, box):
+                group.add_cell(this_cell)
+
+
+def solve_objects(values: list, stage_seconds: dict, **options) -> bool:
+    matrix = TimedMatrix(values, stage_seconds, verbose=False, bitmask=options.get('bitmask', False))
+    matrix.solve(search=options.get('search', True))
+    return matrix.solved
+
+
+def solve_matrix_flat(values: list, stage_seconds: dict, **options) -> bool:
+    matrix = Matrix(values, verbose=False, bitmask=True)
+    matrix.solve(engine='flat')
+    return matrix.solved
+
+
+def solve_flat(values: list, stage_seconds: dict, **options) -> bool:
+    return flat.solve(values)[2]
+
+
+def solve_dlx(values: list, stage_seconds: dict, **options) -> bool:
+    return dlx.solve(values)[1]
+
+
+CONFIGURATIONS = {
+    'objects': (solve_objects, {}),
+    'objects+bitmask': (solve_objects, {'bitmask': True}),
+    'objects+nosearch': (solve_objects, {'search': False}),
+    'matrix+flat': (solve_matrix_flat, {}),
+    'flat': (solve_flat, {}),
+    'dlx': (solve_dlx, {}),
+}
+
+
+CONSTRUCTORS = {
+    'eager': lambda values, string, record: EagerMatrix(values, verbose=False, bitmask=True),
+    'values': lambda values, string, record: Matrix(values, verbose=False, bitmask=True),
+    'from_string': lambda values, string, record: Matrix.from_string(string, verbose=False, bitmask=True),
+    'from_bytes': lambda values, string, record: Matrix.from_bytes(record, verbose=False, bitmask=True),
+}
+
+
+def percentile(sorted_values: list, percent: float) -> float:
+    """Returns the nearest rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(percent / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def load_corpus(name: str) -> list:
+    """Returns the puzzles of a corpus as lists of 9 lists of 9 values (or larger)"""
+    return [string_to_values(puzzle) for _, puzzle in read_puzzles(CORPORA[name], 'TXT')]
+
+
+def run_configuration(puzzles: list, configuration: str, repeat: int = 1) -> dict:
+    """
+    Description
+    -----------
+    Solves every puzzle of a corpus `repeat` times with one configuration.
+
+    Params
+    ------
+    :puzzles: list
+    The puzzles as lists of 9 lists of 9 values.
+
+    :configuration: str
+    One of the keys of `CONFIGURATIONS`.
+
+    :repeat: int = 1
+    How many times to solve the whole corpus.
+
+    Return
+    ------
+    dict
+    The puzzle count, solved count, total seconds, puzzles per second,
+    latency percentiles in milliseconds and milliseconds spent in each stage.
+    """
+    solver, options = CONFIGURATIONS[configuration]
+    stage_seconds = dict.fromkeys(STAGES, 0.0)
+    latencies = []
+    solved = 0
+    for _ in range(repeat):
+        for values in puzzles:
+            start = perf_counter()
+            solved += solver(values, stage_seconds, **options)
+            latencies.append(perf_counter() - start)
+    return summarize(latencies, solved, stage_seconds)
+
+
+def run_batch(puzzles: list, repeat: int = 1) -> dict:
+    """Like `run_configuration` but solves the whole corpus at once with `batch.solve_batch`"""
+    grids = batch.np.array([flat.values_to_grid(values) for values in puzzles])
+    latencies = []
+    solved = 0
+    for _ in range(repeat):
+        start = perf_counter()
+        solutions, status = batch.solve_batch(grids)
+        elapsed = perf_counter() - start
+        solved += int((status == batch.SOLVED).sum())
+        latencies += [elapsed / len(puzzles)] * len(puzzles)
+    return summarize(latencies, solved, {})
+
+
+def run_construction(puzzles: list, constructor: str, repeat: int = 1) -> dict:
+    """Like `run_configuration` but only builds a `Matrix` from each puzzle with one of `CONSTRUCTORS`"""
+    build = CONSTRUCTORS[constructor]
+    inputs = [(values, values_to_string(values), encode(values_to_string(values))) for values in puzzles]
+    latencies = []
+    for _ in range(repeat):
+        for values, string, record in inputs:
+            start = perf_counter()
+            build(values, string, record)
+            latencies.append(perf_counter() - start)
+    return summarize(latencies, len(latencies), {})
+
+
+def summarize(latencies: list, solved: int, stage_seconds: dict) -> dict:
+    total = sum(latencies)
+    ordered = sorted(latencies)
+    return {
+        "puzzles": len(latencies),
+        "solved": solved,
+        "seconds": total,
+        "puzzles_per_second": len(latencies) / total if total else 0.0,
+        "latency_ms": {
+            "p50": percentile(ordered, 50) * 1000,
+            "p95": percentile(ordered, 95) * 1000,
+            "p99": percentile(ordered, 99) * 1000,
+            "max": (ordered[-1] if ordered else 0.0) * 1000,
+        },
+        "stages_ms": {stage: seconds * 1000 for stage, seconds in stage_seconds.items()},
+    }
+
+
+def run(corpora: list, configurations: list, repeat: int = 1, construction: bool = False) -> dict:
+    """Benchmarks every configuration (and constructor if `construction`) over every corpus and returns the JSON document of the run"""
+    results = []
+    for corpus in corpora:
+        puzzles = load_corpus(corpus)
+        nine = len(puzzles[0]) == 9
+        if construction and nine:
+            for constructor in CONSTRUCTORS:
+                results.append(dict(corpus=corpus, configuration=f'build:{constructor}', **run_construction(puzzles, constructor, repeat)))
+        for configuration in configurations:
+            if configuration == 'batch':
+                if not nine:
+                    continue
+                result = run_batch(puzzles, repeat)
+            else:
+                result = run_configuration(puzzles, configuration, repeat)
+            results.append(dict(corpus=corpus, configuration=configuration, **result))
+    return {
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def print_report(report: dict, baseline: dict = None) -> None:
+    """Prints a table of a run, with the speedup against a baseline run if one is given"""
+    previous = {}
+    if baseline:
+        previous = {(result["corpus"], result["configuration"]): result for result in baseline["results"]}
+    print(f"{'corpus':<9}{'configuration':<18}{'solved':>9}{'puz/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          + ''.join(f"{stage[:12]:>14}" for stage in STAGES)
+          + (f"{'vs base':>9}" if baseline else ''))
+    for result in report["results"]:
+        line = (f"{result['corpus']:<9}{result['configuration']:<18}"
+                f"{result['solved']:>4}/{result['puzzles']:<4}{result['puzzles_per_second']:>10.1f}"
+                f"{result['latency_ms']['p50']:>9.3f}{result['latency_ms']['p95']:>9.3f}{result['latency_ms']['p99']:>9.3f}")
+        line += ''.join(f"{result['stages_ms'].get(stage, 0.0):>14.1f}" if result['stages_ms'] else f"{'-':>14}" for stage in STAGES)
+        before = previous.get((result["corpus"], result["configuration"]))
+        if before and before["puzzles_per_second"]:
+            line += f"{result['puzzles_per_second'] / before['puzzles_per_second']:>8.2f}x"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sudoku solver engines over the bundled corpora.")
+    parser.add_argument('--repeat', type=int, default=1, help="How many times to solve each corpus.")
+    parser.add_argument('--corpus', action='append', choices=list(CORPORA), help="Corpora to run, defaults to all of them.")
+    configurations = list(CONFIGURATIONS) + (['batch'] if batch.np is not None else [])
+    parser.add_argument('--configuration', action='append', choices=configurations,
+                        help="Configurations to run, defaults to all of them.")
+    parser.add_argument('--construction', action='store_true',
+                        help="Also time building a Matrix from each puzzle with each of the constructors.")
+    parser.add_argument('--output', help="Write the results of this run as JSON to this file.")
+    parser.add_argument('--compare', help="A JSON file from an earlier run to compare puzzles per second against.")
+    args = parser.parse_args()
+    report = run(args.corpus or list(CORPORA), args.configuration or configurations, args.repeat, args.construction)
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as baseline_file:
+            baseline = json.load(baseline_file)
+    print_report(report, baseline)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+        print(f"Wrote {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -13,7 +13,7 @@ import csv
 import os
 import re
 
-import matrix as m
+from sudoku_objects.matrix import Matrix
 
 
 def csv_to_matrix(file_name: str) -> object:
@@ -28,7 +28,7 @@ def csv_to_matrix(file_name: str) -> object:
     csv_rdr = csv.reader(open(file_name, 'r'))
     for line in csv_rdr:
         matrix_object.append([None if element == '' else int(element) for element in line])
-    return m.Matrix(matrix_object)
+    return Matrix(matrix_object)
 
 
 def regexp_files_in_dir(location_expression: str) -> list:
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Drives the HTTP solving service in `sudoku_objects/service.py` with many
+concurrent keep-alive connections, each posting puzzles from a corpus one
+after another, and reports requests per second, the p50/p95/p99 latency
+per request, the number of responses of each HTTP status and the mean
+batch size the service gathered.
+
+Either point it at a running service with `--host` and `--port`, or pass
+`--serve` to start one in this process on a free port for the run. The
+clients share this process's event loop with the service's HTTP handling
+in that case, though the puzzles are still solved in its worker pool.
+
+Run with `python load_test.py --serve [--connections N] [--requests N] [--corpus hard]`.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from collections import Counter
+from time import perf_counter
+
+from benchmark import CORPORA
+from benchmark import percentile
+from sudoku_objects.matrix import ENGINES
+from sudoku_objects.pipeline import read_puzzles
+from sudoku_objects.service import BATCH_SIZE
+from sudoku_objects.service import BATCH_WINDOW
+from sudoku_objects.service import HOST
+from sudoku_objects.service import MAX_QUEUE
+from sudoku_objects.service import PORT
+from sudoku_objects.service import SolverService
+
+
+async def request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, method: str, path: str, body: bytes = b'') -> tuple:
+    """Sends one request over a keep-alive connection and returns (status, parsed JSON body)"""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: text/plain\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    return (status, json.loads(await reader.readexactly(length)))
+
+
+async def client(host: str, port: int, puzzles: list, latencies: list, statuses: Counter) -> None:
+    """Posts each puzzle in turn over one connection, recording the latency and status of each"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for puzzle in puzzles:
+            start = perf_counter()
+            status, payload = await request(reader, writer, 'POST', '/solve', puzzle.encode('ascii'))
+            latencies.append(perf_counter() - start)
+            statuses[status] += 1
+    finally:
+        writer.close()
+
+
+async def health(host: str, port: int) -> dict:
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        return (await request(reader, writer, 'GET', '/health'))[1]
+    finally:
+        writer.close()
+
+
+async def load_test(host: str, port: int, puzzles: list, connections: int, requests: int) -> dict:
+    """
+    Description
+    -----------
+    Posts `requests` puzzles, cycling through `puzzles`, over `connections`
+    concurrent connections and measures how the service keeps up.
+
+    Params
+    ------
+    :host: str
+    :port: int
+    Where the service is listening.
+
+    :puzzles: list
+    The 81 character puzzle strings to post.
+
+    :connections: int
+    How many connections post at once.
+
+    :requests: int
+    How many puzzles to post in all.
+
+    Return
+    ------
+    dict
+    The requests per second, latency percentiles in milliseconds, responses
+    of each HTTP status and the mean batch size over the run.
+    """
+    before = await health(host, port)
+    shares = [[puzzles[index % len(puzzles)] for index in range(start, requests, connections)] for start in range(connections)]
+    latencies = []
+    statuses = Counter()
+    start = perf_counter()
+    await asyncio.gather(*[client(host, port, share, latencies, statuses) for share in shares if share])
+    seconds = perf_counter() - start
+    after = await health(host, port)
+    latencies.sort()
+    batches = after["batches"] - before["batches"]
+    return {
+        "requests": len(latencies),
+        "seconds": seconds,
+        "requests_per_second": len(latencies) / seconds if seconds else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "mean_batch_size": (after["solved"] - before["solved"]) / batches if batches else 0.0,
+    }
+
+
+async def main(args) -> dict:
+    puzzles = [puzzle for name, puzzle in read_puzzles(CORPORA[args.corpus], 'TXT')]
+    if not args.serve:
+        return await load_test(args.host, args.port, puzzles, args.connections, args.requests)
+    service = SolverService(args.host, 0, workers=args.workers, engine=args.engine, batch_size=args.batch_size,
+                            batch_window=args.batch_window, max_queue=args.max_queue)
+    async with service:
+        # Warm the worker processes up before timing anything
+        await load_test(service.host, service.port, puzzles, service.workers or 1, 2 * (service.workers or 1))
+        return await load_test(service.host, service.port, puzzles, args.connections, args.requests)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load tests the HTTP solving service on localhost.")
+    parser.add_argument('--host', default=HOST, help=f"Where the service is listening, {HOST} by default.")
+    parser.add_argument('--port', type=int, default=PORT, help=f"Where the service is listening, {PORT} by default.")
+    parser.add_argument('--serve', action='store_true', help="Start a service in this process for the run rather than using a running one.")
+    parser.add_argument('--connections', type=int, default=64, help="How many connections post at once.")
+    parser.add_argument('--requests', type=int, default=2000, help="How many puzzles to post in all.")
+    parser.add_argument('--corpus', choices=list(CORPORA), default='hard', help="The corpus to post puzzles from.")
+    parser.add_argument('--workers', type=int, default=None, help="With `--serve`, the number of worker processes.")
+    parser.add_argument('--engine', choices=ENGINES, default='flat', help="With `--serve`, the engine the service solves with.")
+    parser.add_argument('--batch-size', dest='batch_size', type=int, default=BATCH_SIZE, help="With `--serve`, the most puzzles in a batch.")
+    parser.add_argument('--batch-window', dest='batch_window', type=float, default=BATCH_WINDOW,
+                        help="With `--serve`, the most seconds to wait for a batch to fill.")
+    parser.add_argument('--max-queue', dest='max_queue', type=int, default=MAX_QUEUE,
+                        help="With `--serve`, the most requests waiting before the service responds with 503.")
+    results = asyncio.run(main(parser.parse_args()))
+    json.dump(results, sys.stdout, indent=2)
+    print()
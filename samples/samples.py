@@ -53,6 +53,17 @@ HARD_SAMPLE_MATRIX = [
     [6, None, None, 4, None, None, 2, None, None],
     [None, None, None, None, None, None, None, None, None]
 ]
+EXPERT_SAMPLE_MATRIX = [
+    [3, None, None, 8, 5, None, None, None, None],
+    [None, None, None, 6, None, None, 7, None, None],
+    [None, None, None, 1, None, 7, None, 4, None],
+    [None, None, 7, None, 4, None, None, None, 5],
+    [None, 2, 1, None, None, None, None, 7, 8],
+    [None, 3, 6, None, None, None, None, None, 2],
+    [None, None, 3, None, None, None, 2, None, 4],
+    [None, 4, None, None, None, 5, None, None, 1],
+    [8, None, None, None, None, None, None, 9, None]
+]
 
 EZ = Matrix(EASY_SAMPLE_MATRIX)
 MD = Matrix(MEDIUM_SAMPLE_MATRIX)
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+Sends puzzles to the solver daemon started with `python sudoku_solver.py --daemon`
+and writes back one JSON document per line holding the name, puzzle, solution and
+status of each, see `sudoku_objects/daemon.py`.
+
+Puzzles are read one per line from the files given, or STDIN if none are, each an
+81 character puzzle string or a JSON puzzle as for `sudoku_solver.py --format STDIN`.
+Only the standard library is imported, so the solver is never loaded here.
+
+Run with `python sudoku_client.py [--socket PATH] [--health] [FILE ...]`.
+"""
+import argparse
+import fileinput
+
+from sudoku_objects.client import SOCKET_PATH
+from sudoku_objects.client import stream
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Solves puzzles with the solver daemon.")
+    parser.add_argument('files', nargs='*', help="Files of puzzles, one per line, STDIN if none are given.")
+    parser.add_argument('--socket', default=SOCKET_PATH, help=f"Where the daemon is listening, {SOCKET_PATH} by default.")
+    parser.add_argument('--health', action='store_true', help="Rather than solving, print what the daemon has done so far.")
+    args = parser.parse_args()
+    stream(['HEALTH'] if args.health else fileinput.input(args.files), args.socket)
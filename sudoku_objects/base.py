@@ -8,9 +8,129 @@ combined with other objects form the basis on whic this
 program solves sudoku puzzles.
 """
 
+from itertools import combinations
+from math import isqrt
+
 VERBOSE = True
-COMPLETE_SET = set([1, 2, 3, 4, 5, 6, 7, 8, 9])
+BITMASK = False
+# A grid is made up of `SIZE` rows, columns and boxes of `SIZE` cells
+# each, where the boxes are `BOX_SIZE` cells on a side and `SIZE` is
+# `BOX_SIZE` squared. The usual 9x9 grid is the default, any box size
+# in `BOX_SIZES` (4x4 up to 25x25 grids) can be solved.
+BOX_SIZE = 3
+SIZE = BOX_SIZE * BOX_SIZE
+BOX_SIZES = (2, 3, 4, 5)
+# The size of a grid by its number of cells.
+SIZES_BY_CELLS = {box_size ** 4: box_size ** 2 for box_size in BOX_SIZES}
+# The characters used for each value in puzzle strings, values above 9
+# carry on through the alphabet so that every value is one character.
+DIGIT_CHARACTERS = '123456789ABCDEFGHIJKLMNOP'
+CHARACTER_VALUES = {'.': None, '0': None}
+CHARACTER_VALUES.update({character: value for value, character in enumerate(DIGIT_CHARACTERS, start=1)})
+CHARACTER_VALUES.update({character.lower(): value for value, character in enumerate(DIGIT_CHARACTERS[9:], start=10)})
+# Mask tables of grids larger than `TABLE_SIZE` are filled in as they
+# are looked up, holding on to at most `MASK_TABLE_LIMIT` entries each.
+TABLE_SIZE = 9
+MASK_TABLE_LIMIT = 1 << 16
 NULL_SET = set([])
+NULL_MASK = 0
+
+
+class _MaskTable(dict):
+    """A lookup table indexed by mask whose entries are computed the first time they are looked up"""
+    def __init__(self, entry):
+        dict.__init__(self)
+        self.entry = entry
+
+    def __missing__(self, mask: int):
+        value = self.entry(mask)
+        if len(self) < MASK_TABLE_LIMIT:
+            self[mask] = value
+        return value
+
+
+class Digits:
+    """
+    Description
+    -----------
+    The digits of a grid `size` cells on a side and the lookup tables
+    for candidate masks holding them, where bit (n - 1) is set when n is
+    still a possibility. Get these from `digits_for` rather than building them.
+
+    Params
+    ------
+    :size: int
+    The number of digits, 9 for the usual grid.
+    """
+    def __init__(self, size: int):
+        self.size = size
+        self.box_size = isqrt(size)
+        self.complete_set = set(range(1, size + 1))
+        self.complete_mask = (1 << size) - 1
+        self.digit_bits = {digit: 1 << (digit - 1) for digit in self.complete_set}
+        # Lookup tables indexed by mask: the number of bits set, the digits
+        # contained in the mask, and the digit if exactly one bit is set (else 0).
+        if size <= TABLE_SIZE:
+            masks = range(self.complete_mask + 1)
+            self.popcount = [self._popcount(mask) for mask in masks]
+            self.mask_digits = [self._mask_digits(mask) for mask in masks]
+            self.single_digit = [self._single_digit(mask) for mask in masks]
+        else:
+            self.popcount = _MaskTable(self._popcount)
+            self.mask_digits = _MaskTable(self._mask_digits)
+            self.single_digit = _MaskTable(self._single_digit)
+
+    @staticmethod
+    def _popcount(mask: int) -> int:
+        return bin(mask).count('1')
+
+    def _mask_digits(self, mask: int) -> tuple:
+        return tuple(digit for digit, bit in self.digit_bits.items() if mask & bit)
+
+    @staticmethod
+    def _single_digit(mask: int) -> int:
+        return mask.bit_length() if mask and not mask & (mask - 1) else 0
+
+
+_DIGITS = {}
+
+
+def digits_for(size: int = SIZE) -> Digits:
+    """
+    Description
+    -----------
+    Returns the digits and mask tables of a grid size,
+    building them the first time that size is asked for.
+
+    Params
+    ------
+    :size: int = SIZE
+    The number of cells on a side of the grid, one of 4, 9, 16 or 25.
+
+    Return
+    ------
+    Digits
+    The digits and mask tables.
+    """
+    if size not in _DIGITS:
+        if size not in SIZES_BY_CELLS.values():
+            raise ValueError(f"You passed in: `{size}``, but we were expecting a grid size from {tuple(SIZES_BY_CELLS.values())}.")
+        _DIGITS[size] = Digits(size)
+    return _DIGITS[size]
+
+
+# The tables of the usual 9x9 grid. In bitmask mode the possibilities
+# are held as a 9 bit integer where bit (n - 1) is set when n is still a possibility.
+DIGITS = digits_for(SIZE)
+COMPLETE_SET = DIGITS.complete_set
+COMPLETE_MASK = DIGITS.complete_mask
+DIGIT_BITS = DIGITS.digit_bits
+POPCOUNT = DIGITS.popcount
+MASK_DIGITS = DIGITS.mask_digits
+SINGLE_DIGIT = DIGITS.single_digit
+# The largest naked or hidden subset looked for, any larger
+# subset in a unit leaves a smaller one among the other cells.
+MAX_SUBSET_SIZE = 4
 
 
 def list_of_zeroes(set_of_values: list) -> list:
@@ -35,18 +155,188 @@ def list_of_zeroes(set_of_values: list) -> list:
     return [0 for value in set_of_values]
 
 
+def values_to_string(values: list) -> str:
+    """
+    Description
+    -----------
+    Converts a list of 9 lists of 9 values (or a flat list of 81)
+    into the compact 81 character form of a puzzle, reading left
+    to right, top to bottom with a `.` for each unknown value.
+    Larger grids work the same way, values above 9 are written
+    with the letters of `DIGIT_CHARACTERS` (A for 10 and so on).
+
+    Params
+    ------
+    :values: list
+    The values of the puzzle with `None` or 0 for unknown values.
+
+    Return
+    ------
+    str
+    The 81 character puzzle string.
+    """
+    if values and isinstance(values[0], (list, tuple)):
+        values = [value for row in values for value in row]
+    return ''.join(DIGIT_CHARACTERS[value - 1] if value else '.' for value in values)
+
+
+def string_to_values(puzzle: str) -> list:
+    """
+    Description
+    -----------
+    Converts an 81 character puzzle string into a list of 9 lists of
+    9 values. Either `.` or `0` may be used for an unknown value.
+    Strings of 16, 256 or 625 characters are read as 4x4, 16x16
+    or 25x25 grids, see `values_to_string`.
+
+    Params
+    ------
+    :puzzle: str
+    The 81 character puzzle string.
+
+    Return
+    ------
+    list
+    A list of 9 lists of 9 values with `None` for unknown values.
+    """
+    puzzle = puzzle.strip()
+    size = SIZES_BY_CELLS.get(len(puzzle))
+    if size is None:
+        raise ValueError(f"You passed in: `{puzzle}``, but we were expecting 81 characters (or 16, 256 or 625).")
+    try:
+        values = [CHARACTER_VALUES[character] for character in puzzle]
+    except KeyError:
+        values = None
+    if values is None or max(value or 0 for value in values) > size:
+        raise ValueError(f"You passed in: `{puzzle}``, but we were expecting the characters `.`, `0` or {DIGIT_CHARACTERS[:size]}.")
+    return [values[row * size:(row + 1) * size] for row in range(size)]
+
+
+def set_to_mask(set_of_values: set) -> int:
+    """
+    Description
+    -----------
+    Converts a set of digits from 1-9 into the
+    equivalent 9 bit candidate mask.
+
+    Params
+    ------
+    :set_of_values: set
+    The digits to be set in the mask.
+
+    Return
+    ------
+    int
+    The candidate mask.
+    """
+    mask = NULL_MASK
+    for value in set_of_values:
+        mask |= 1 << (value - 1)
+    return mask
+
+
+def mask_to_set(mask: int) -> set:
+    """
+    Description
+    -----------
+    Converts a 9 bit candidate mask back into a set of digits.
+
+    Params
+    ------
+    :mask: int
+    The candidate mask.
+
+    Return
+    ------
+    set
+    The digits whose bits are set in the mask.
+    """
+    if mask <= COMPLETE_MASK:
+        return set(MASK_DIGITS[mask])
+    return {digit for digit in range(1, mask.bit_length() + 1) if mask >> (digit - 1) & 1}
+
+
 class _NumberSpace:
     """
     Description
     -----------
     This represents a numberspace that can contain possibilities.
     Any object that can contain possibilities inherits attributes from this class.
+
+    Params
+    ------
+    :bitmask: bool = BITMASK
+    When set the possibilities are stored as a 9 bit integer in `mask`
+    and the `possibilities` set is derived from it on request.
+
+    :size: int = SIZE
+    The number of values in the grid this belongs to, the mask has one bit per value.
+
+    When `trail` is set (to the matrix's `trail.Trail`) the current state
+    is saved there before it is changed, so it can be rolled back.
     """
-    def __init__(self):
-        self.possibilities = COMPLETE_SET.copy()
+    trail = None
+    trail_epoch = 0
+
+    def __init__(self, bitmask: bool = BITMASK, size: int = SIZE):
+        self.bitmask = bitmask
+        self.digits = digits_for(size)
+        if self.bitmask:
+            self.mask = self.digits.complete_mask
+        else:
+            self._possibilities = self.digits.complete_set.copy()
+
+    @property
+    def possibilities(self) -> set:
+        if self.bitmask:
+            return set(self.digits.mask_digits[self.mask])
+        return self._possibilities
+
+    @possibilities.setter
+    def possibilities(self, possibilities: set) -> None:
+        if self.trail is not None:
+            self.trail.save(self)
+        if self.bitmask:
+            self.mask = set_to_mask(possibilities)
+        else:
+            self._possibilities = possibilities
+
+    def has_possibility(self, possibility: int) -> bool:
+        if self.bitmask:
+            return bool(self.mask & (1 << (possibility - 1)))
+        return possibility in self._possibilities
+
+    def count_possibilities(self) -> int:
+        if self.bitmask:
+            return self.digits.popcount[self.mask]
+        return len(self._possibilities)
+
+    def snapshot(self):
+        """Returns a copy of the current possibilities that `restore` can put back"""
+        if self.bitmask:
+            return self.mask
+        return self._possibilities.copy()
+
+    def restore(self, snapshot) -> None:
+        """Puts back possibilities previously returned by `snapshot`"""
+        if self.bitmask:
+            self.mask = snapshot
+        else:
+            self._possibilities = snapshot.copy()
+
+    def get_mask(self) -> int:
+        """Returns the possibilities as a 9 bit integer mask whether or not this is in bitmask mode"""
+        if self.bitmask:
+            return self.mask
+        return set_to_mask(self._possibilities)
 
     def add_possibility(self, possibility):
-        self.possibilities.add(possibility)
+        if self.trail is not None:
+            self.trail.save(self)
+        if self.bitmask:
+            self.mask |= 1 << (possibility - 1)
+        else:
+            self._possibilities.add(possibility)
 
     def rm_possibility(self, possibility: int) -> int:
         """
@@ -67,12 +357,20 @@ class _NumberSpace:
         The possibility being removed
         (if one is removed) otherwise 0 if none are effected.
         """
-        if possibility in self.possibilities:
-            removing = possibility
-        else:
-            removing = 0
-        self.possibilities.discard(possibility)
-        return removing
+        if self.bitmask:
+            bit = 1 << (possibility - 1)
+            if self.mask & bit:
+                if self.trail is not None:
+                    self.trail.save(self)
+                self.mask ^= bit
+                return possibility
+            return 0
+        if possibility in self._possibilities:
+            if self.trail is not None:
+                self.trail.save(self)
+            self._possibilities.discard(possibility)
+            return possibility
+        return 0
 
 
 class _CellGroup(_NumberSpace):
@@ -92,14 +390,20 @@ class _CellGroup(_NumberSpace):
 
     :ndim: int = 1
     This is the number of dimensions for this cell group.
+
+    :bitmask: bool = BITMASK
+    Whether to hold possibilities as a 9 bit integer mask.
+
+    :size: int = SIZE
+    The number of cells in a row, column or box of the grid.
     """
-    def __init__(self, number: int, ndim: int = 1):
-        _NumberSpace.__init__(self)
+    def __init__(self, number: int, ndim: int = 1, bitmask: bool = BITMASK, size: int = SIZE):
+        _NumberSpace.__init__(self, bitmask=bitmask, size=size)
         self.number = number
         self.ndim = ndim
         self.cells = []
 
-    def add_cell(self, cell: object) -> None:
+    def add_cell(self, cell: object, refresh: bool = True) -> None:
         """
         Description
         -----------
@@ -112,21 +416,43 @@ class _CellGroup(_NumberSpace):
         :cell: Cell object
         The Cell object to be added to this group.
 
+        :refresh: bool = True
+        Recompute the possibilities of this group. When adding many
+        cells at once, pass False and call `refresh_possibilities`
+        once they have all been added.
+
         Return
         ------
         None
         """
         self.cells.append(cell)
-        if cell.value is not None:
-            self.rm_possibility(cell.value)
-        self.refresh_possibilities()
+        if refresh:
+            self.refresh_possibilities()
 
     def refresh_possibilities(self):
-        self.possibilities = COMPLETE_SET.difference(self.get_values())
+        if self.bitmask:
+            mask = self.digits.complete_mask & ~self.get_values_mask()
+            if mask != self.mask:
+                if self.trail is not None:
+                    self.trail.save(self)
+                self.mask = mask
+        else:
+            possibilities = self.digits.complete_set.difference(self.get_values())
+            if possibilities != self._possibilities:
+                if self.trail is not None:
+                    self.trail.save(self)
+                self._possibilities = possibilities
 
     def get_values(self):
         return {cell.value for cell in self.cells if cell.value}
 
+    def get_values_mask(self) -> int:
+        mask = NULL_MASK
+        for cell in self.cells:
+            if cell.value:
+                mask |= 1 << (cell.value - 1)
+        return mask
+
     def scan_instances(self):
         """
         Description
@@ -147,6 +473,8 @@ class _CellGroup(_NumberSpace):
         solved when the cells of this cell group are scanned.
         """
         self.refresh_possibilities()
+        if self.bitmask:
+            return self._scan_instances_mask()
         instance_counter = dict(zip(self.possibilities,
                                     list_of_zeroes(self.possibilities)))
         for possibility in self.possibilities:
@@ -161,6 +489,145 @@ class _CellGroup(_NumberSpace):
                     cell.set_value(value)
         return cells_solved
 
+    def _scan_instances_mask(self) -> int:
+        """
+        Description
+        -----------
+        The bitmask equivalent of `scan_instances`. Rather than
+        counting each possibility it folds the cell masks into the
+        digits seen at least once and the digits seen more than once,
+        whatever is left over appears in exactly one cell.
+
+        Params
+        ------
+        None
+
+        Return
+        ------
+        int
+        The number of values solved in this cell group.
+        """
+        seen_once = NULL_MASK
+        seen_twice = NULL_MASK
+        for cell in self.cells:
+            seen_twice |= seen_once & cell.mask
+            seen_once |= cell.mask
+        values_to_set = seen_once & ~seen_twice & self.mask
+        for value in self.digits.mask_digits[values_to_set]:
+            bit = 1 << (value - 1)
+            for cell in self.cells:
+                if cell.mask & bit:
+                    cell.set_value(value)
+        return self.digits.popcount[values_to_set]
+
+    def digit_locations(self) -> dict:
+        """
+        Description
+        -----------
+        Indexes where each value could still go in this cell group.
+
+        Params
+        ------
+        None
+
+        Return
+        ------
+        dict
+        Each value that is a possibility of at least one unsolved cell, mapped
+        to a 9 bit mask of the positions (within `cells`) of those cells.
+        """
+        mask_digits = self.digits.mask_digits
+        locations = {}
+        for position, cell in enumerate(self.cells):
+            if not cell.is_solved:
+                for value in mask_digits[cell.get_mask()]:
+                    locations[value] = locations.get(value, 0) | (1 << position)
+        return locations
+
+    def eliminate_naked_subsets(self, max_size: int = MAX_SUBSET_SIZE) -> int:
+        """
+        Description
+        -----------
+        Looks for N unsolved cells (pairs, triples and quads) whose
+        possibilities together only hold N values. Those values must
+        go in those cells, so they are removed from every other cell
+        of this cell group.
+
+        Only cells with at most N possibilities can be part of such a
+        subset, so only combinations of those cells are tried.
+
+        Params
+        ------
+        :max_size: int = MAX_SUBSET_SIZE
+        The largest subset to look for.
+
+        Return
+        ------
+        int
+        The number of possibilities removed.
+        """
+        popcount = self.digits.popcount
+        mask_digits = self.digits.mask_digits
+        masks = {position: cell.get_mask() for position, cell in enumerate(self.cells) if not cell.is_solved}
+        removed = 0
+        for size in range(2, min(max_size, len(masks) - 1) + 1):
+            members = [position for position, mask in masks.items() if 2 <= popcount[mask] <= size]
+            for subset in combinations(members, size):
+                values = NULL_MASK
+                for position in subset:
+                    values |= masks[position]
+                if popcount[values] != size:
+                    continue
+                for position, mask in masks.items():
+                    if position not in subset and mask & values:
+                        for value in mask_digits[mask & values]:
+                            removed += 1 if self.cells[position].rm_possibility(value) else 0
+                        masks[position] = mask & ~values
+        return removed
+
+    def eliminate_hidden_subsets(self, max_size: int = MAX_SUBSET_SIZE) -> int:
+        """
+        Description
+        -----------
+        Looks for N values (pairs, triples and quads) that can only go
+        in the same N unsolved cells. Those cells must hold those values,
+        so every other possibility is removed from them.
+
+        The positions each value could go in come from `digit_locations`,
+        only values with at most N positions can be part of such a subset,
+        so only combinations of those values are tried.
+
+        Params
+        ------
+        :max_size: int = MAX_SUBSET_SIZE
+        The largest subset to look for.
+
+        Return
+        ------
+        int
+        The number of possibilities removed.
+        """
+        popcount = self.digits.popcount
+        mask_digits = self.digits.mask_digits
+        locations = self.digit_locations()
+        removed = 0
+        for size in range(2, min(max_size, len(locations) - 1) + 1):
+            members = [value for value, positions in locations.items() if 2 <= popcount[positions] <= size]
+            for subset in combinations(members, size):
+                positions = NULL_MASK
+                for value in subset:
+                    positions |= locations[value]
+                if popcount[positions] != size:
+                    continue
+                for position in range(len(self.cells)):
+                    if positions & (1 << position):
+                        cell = self.cells[position]
+                        for value in mask_digits[cell.get_mask()]:
+                            if value not in subset:
+                                removed += 1 if cell.rm_possibility(value) else 0
+                                locations[value] &= ~(1 << position)
+        return removed
+
     def __str__(self):
         pass
 
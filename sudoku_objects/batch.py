@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+This solves many puzzles at once with NumPy.
+
+A batch of N puzzles is held as an N x 81 x 9 boolean tensor of candidates
+and naked singles (cells with one candidate) and hidden singles (values
+with one possible cell in a unit) are found for the whole batch at once
+with reductions over the rows, columns and boxes. Only the puzzles that
+the singles do not finish are handed one at a time to the flat engine,
+which searches where the logic runs out.
+
+NumPy is only needed by this module, the rest of the package runs without it.
+"""
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+from sudoku_objects import flat
+
+STUCK = 0
+SOLVED = 1
+CHUNK_SIZE = 10000
+
+if np is not None:
+    UNIT_CELLS = np.array(flat.UNITS, dtype=np.intp)
+    CELL_UNITS = np.array(flat.CELL_UNITS, dtype=np.intp)
+    DIGITS = np.arange(1, 10, dtype=np.int8)
+
+
+def _propagate(grid):
+    """
+    Description
+    -----------
+    Fills in naked and hidden singles across a batch until none are left.
+    Puzzles drop out of the working set as soon as they are finished,
+    found to be contradictory or have no singles left.
+
+    Params
+    ------
+    :grid: np.ndarray
+    An N x 81 int8 array of values with 0 for unknown, updated in place.
+
+    Return
+    ------
+    np.ndarray
+    A boolean array of length N, True where the puzzle contradicts itself.
+    """
+    invalid = np.zeros(grid.shape[0], dtype=bool)
+    active = np.nonzero((grid == 0).any(axis=1))[0]
+    while active.size:
+        values = grid[active]
+        unknown = values == 0
+        unit_placed = (values[:, :, None] == DIGITS)[:, UNIT_CELLS, :]
+        unit_counts = unit_placed.sum(axis=2, dtype=np.int8)
+        in_unit = unit_counts > 0
+        candidates = ~in_unit[:, CELL_UNITS, :].any(axis=2)
+        candidates &= unknown[:, :, None]
+
+        candidate_counts = candidates.sum(axis=2, dtype=np.int8)
+        unit_candidates = candidates[:, UNIT_CELLS, :]
+        unit_candidate_counts = unit_candidates.sum(axis=2, dtype=np.int8)
+        contradiction = (
+            (unit_counts > 1).any(axis=(1, 2))
+            | (unknown & (candidate_counts == 0)).any(axis=1)
+            | (~in_unit & (unit_candidate_counts == 0)).any(axis=(1, 2))
+        )
+        invalid[active[contradiction]] = True
+
+        naked = (candidate_counts == 1) & ~contradiction[:, None]
+        hidden = (unit_candidate_counts == 1) & ~in_unit & ~contradiction[:, None, None]
+        puzzles, cells = np.nonzero(naked)
+        values[puzzles, cells] = candidates[puzzles, cells].argmax(axis=1) + 1
+        puzzles, units, digits = np.nonzero(hidden)
+        positions = unit_candidates[puzzles, units, :, digits].argmax(axis=1)
+        values[puzzles, UNIT_CELLS[units, positions]] = digits + 1
+        grid[active] = values
+
+        progressed = naked.any(axis=1) | hidden.any(axis=(1, 2))
+        active = active[progressed & (values == 0).any(axis=1)]
+    return invalid
+
+
+def _is_complete(grid):
+    """Returns a boolean array, True where every unit of the puzzle holds each value exactly once"""
+    placed = grid[:, :, None] == DIGITS
+    return (placed[:, UNIT_CELLS, :].sum(axis=2, dtype=np.int8) == 1).all(axis=(1, 2))
+
+
+def solve_batch(puzzles, fallback: bool = True, chunk_size: int = CHUNK_SIZE) -> tuple:
+    """
+    Description
+    -----------
+    Solves a batch of puzzles.
+
+    Params
+    ------
+    :puzzles: np.ndarray
+    An N x 9 x 9 (or N x 81) array of integers with 0 for unknown values.
+
+    :fallback: bool = True
+    Hand the puzzles the singles do not finish to `flat.solve`,
+    which guesses where the logic runs out. If not they are
+    returned as far as the singles got them and marked `STUCK`.
+
+    :chunk_size: int = CHUNK_SIZE
+    How many puzzles to hold in the candidate tensor at a time.
+
+    Return
+    ------
+    tuple
+    (solutions, status) an array of the same shape as `puzzles` with
+    the solved (or partially solved) values and an int8 array of
+    length N with `SOLVED` or `STUCK` for each puzzle, the same as
+    `Matrix.solved` and `Matrix.stuck` would report.
+    """
+    if np is None:
+        raise ImportError("solve_batch requires numpy, try `pip install numpy`")
+    puzzles = np.asarray(puzzles)
+    grid = puzzles.reshape(-1, 81).astype(np.int8)
+    status = np.full(grid.shape[0], STUCK, dtype=np.int8)
+    for start in range(0, grid.shape[0], chunk_size):
+        chunk = grid[start:start + chunk_size]
+        invalid = _propagate(chunk)
+        complete = ~invalid & _is_complete(chunk)
+        status[start:start + chunk_size][complete] = SOLVED
+        if fallback:
+            for index in np.nonzero(~invalid & ~complete)[0]:
+                solution, masks, solved = flat.solve(chunk[index].tolist())
+                if solved:
+                    chunk[index] = solution
+                    status[start + index] = SOLVED
+    return (grid.reshape(puzzles.shape), status)
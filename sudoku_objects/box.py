@@ -3,6 +3,10 @@
 This class defines the two dimensions 3x3 cell box inside of a larger sudoku matrix.
 """
 from sudoku_objects.base import _CellGroup
+from sudoku_objects.base import _NumberSpace
+from sudoku_objects.base import BITMASK
+from sudoku_objects.base import DIGIT_CHARACTERS
+from sudoku_objects.base import SIZE
 from sudoku_objects.row import Row
 from sudoku_objects.column import Column
 from sudoku_objects.cell import Cell
@@ -15,22 +19,27 @@ class Box(_CellGroup):
     This object represents a box of 3x3 cells
     contained within asudoku matrix of 9x9 cells or 3x3 boxes.
     This is a 2 dimensional object with height and width of 3.
+
+    In a grid of `size` values (see `base.BOX_SIZES`) the box is
+    the square root of `size` cells high and wide instead.
     """
-    def __init__(self, box_number):
-        _CellGroup.__init__(self, number=box_number, ndim=2)
+    def __init__(self, box_number, bitmask: bool = BITMASK, size: int = SIZE):
+        _CellGroup.__init__(self, number=box_number, ndim=2, bitmask=bitmask, size=size)
         self.box_number = box_number
-        self.rows = [Row(0), Row(1), Row(2)]
-        self.columns = [Column(0), Column(1), Column(2)]
+        self.box_size = self.digits.box_size
+        self.rows = [Row(number, bitmask=bitmask, size=size) for number in range(self.box_size)]
+        self.columns = [Column(number, bitmask=bitmask, size=size) for number in range(self.box_size)]
         self.slices = []
 
     def __str__(self):
         my_str = []
-        line_break = '+---+---+---+'
+        line_break = '+---' * self.box_size + '+'
         nl = '\n|'
         my_str.append(line_break + nl)
         for cell_number in range(len(self.cells)):
-            my_str.append(f" {self.cells[cell_number].value if self.cells[cell_number].value is not None else ' '} |")
-            if cell_number in [2, 5]:
+            value = self.cells[cell_number].value
+            my_str.append(f" {DIGIT_CHARACTERS[value - 1] if value is not None else ' '} |")
+            if cell_number % self.box_size == self.box_size - 1 and cell_number < len(self.cells) - 1:
                 my_str.append('\n' + line_break + nl)
         my_str.append('\n' + line_break)
         return ''.join(my_str)
@@ -52,52 +61,23 @@ class Box(_CellGroup):
         """
 
         my_str = []
-        line_break = "+-------+-------+-------+"
+        line_break = ('+' + '-' * (2 * self.box_size + 1)) * self.box_size + '+'
         nl = "\n|"
         my_str.append(line_break + nl)
 
         # Running through the 3 rows in a box
-        for iteration in range(3):
+        for iteration in range(self.box_size):
 
             # Go through each cell in the current row of the box
             for cell in self.rows[iteration].cells:
 
-                # If this cell is solved, don't bother with
-                # the possibilities, fill the actual solved
-                # value in, inside of the middle
-                if cell.is_solved:
-
-                    # iteration #1 is the center when iterating from [0, 3)
-                    # which is where we want to print the solved value
-                    # if it is a solved cell
-                    if iteration != 1:
-
-                        # So if it's not the center of a solved cell, print the blank line
-                        my_str.append('       |')
-
-                    # This is the center of the cell
-                    else:
-
-                        # Otherwise it is the center and fill it in with the value
-                        my_str.append(f'   {cell.value}   |')
-
-                # This cell is not solved
-                else:
-
-                    # Only give me:
-                    # 1, 2, or 3 on the 1st row for this cell
-                    # 4, 5, or 6 for the 2nd row foir this cell
-                    # 7, 8, or 9 for the 3rd row of the cell
-                    #
-                    # sets the ranges at [1-4), [4-7), and [7-10)
-                    for possibility in range((iteration * 3) + 1, ((iteration + 1) * 3) + 1):
-
-                        # If this value is a possibility in the cell,
-                        # add it to the string for this representation of the row
-                        # otherwise leave as blank
-                        my_str.append(f' {possibility if possibility in cell.possibilities else " "}')
-                    my_str.append(' |')
-            if iteration != 2:
+                # Solved cells have their value in the middle line, the
+                # rest only give the possibilities of this line:
+                # 1, 2, or 3 on the 1st row for this cell
+                # 4, 5, or 6 for the 2nd row foir this cell
+                # 7, 8, or 9 for the 3rd row of the cell
+                my_str.append(cell.poss_line(iteration) + '|')
+            if iteration != self.box_size - 1:
 
                 # If it's not the end, start the next row
                 my_str.append(nl)
@@ -124,11 +104,11 @@ class Box(_CellGroup):
         ------
         None
         """
-        self.possibilities.discard(possibility)
+        _NumberSpace.rm_possibility(self, possibility)
         [row.rm_possibility(possibility) for row in self.rows]
         [column.rm_possibility(possibility) for column in self.columns]
 
-    def add_cell(self, cell: Cell) -> None:
+    def add_cell(self, cell: Cell, refresh: bool = True) -> None:
         """
         Description
         -----------
@@ -145,16 +125,20 @@ class Box(_CellGroup):
         A cell object that contains either the number
         or the set of possibilities for that cell to contain.
 
+        :refresh: bool = True
+        Recompute the possibilities of the box row and column
+        the cell is added to, see `_CellGroup.add_cell`.
+
         Return
         ------
         None
         """
         self.cells.append(cell)
         cell_num = len(self.cells) - 1
-        col_num = cell_num % 3
-        row_num = cell_num // 3
-        self.columns[col_num].add_cell(cell)
-        self.rows[row_num].add_cell(cell)
+        col_num = cell_num % self.box_size
+        row_num = cell_num // self.box_size
+        self.columns[col_num].add_cell(cell, refresh)
+        self.rows[row_num].add_cell(cell, refresh)
 
     def get_row(self, row_number: int) -> set:
         """
@@ -212,7 +196,8 @@ class Box(_CellGroup):
         The set of possibilities
         """
         possibilities = set()
-        [possibilities.union(cell.possibilities) for cell in self.rows[row_number].cells if cell.possibilities]
+        for cell in self.rows[row_number].cells:
+            possibilities.update(cell.possibilities)
         return possibilities
 
     def get_column_possibilities(self, column_number: int) -> set:
@@ -233,5 +218,6 @@ class Box(_CellGroup):
         The set of possibilities
         """
         possibilities = set()
-        [possibilities.union(cell.possibilities) for cell in self.columns[column_number].cells if cell.possibilities]
+        for cell in self.columns[column_number].cells:
+            possibilities.update(cell.possibilities)
         return possibilities
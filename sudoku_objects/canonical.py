@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+These map a puzzle to a canonical form shared by every puzzle that is the
+same up to symmetry, so that a solution found once can be reused for all
+of them.
+
+Two puzzles are the same up to symmetry when one can be turned into the
+other by any mix of:
+    relabeling the digits,
+    reordering the 3 bands (groups of 3 rows) or the rows within a band,
+    reordering the 3 stacks (groups of 3 columns) or the columns within a stack,
+    transposing the grid.
+
+The canonical form is the smallest 81 character string (0 for blank) over
+all of those transforms, with digits relabeled 1, 2, 3... in the order they
+first appear. Rather than trying all 3,359,232 row/column transforms it is
+built a row at a time, keeping only the partial transforms that tie for the
+smallest prefix. Columns are not put in order up front, each stack starts
+as one group of columns that is split up only as rows tell them apart (the
+blanks of the first row, for one, always go first), so the partial
+transforms only branch where the order of columns matters.
+
+Grids are flat lists of 81 integers with 0 for unknown values, as in `flat.py`.
+Only the usual 9x9 grid is canonicalized, `SolutionCache` keys puzzles of
+any other size on the puzzle itself.
+"""
+from collections import OrderedDict
+from itertools import permutations
+from itertools import product
+
+from sudoku_objects.flat import as_grid
+
+MAX_STATES = 20000
+CACHE_SIZE = 4096
+
+
+class Transform:
+    """
+    Description
+    -----------
+    One symmetry of the sudoku grid, mapping a puzzle onto its canonical form.
+
+    Params
+    ------
+    :transpose: bool
+    Whether the grid is transposed first.
+
+    :rows: tuple
+    `rows[i]` is the row (of the possibly transposed grid) that becomes row i.
+
+    :columns: tuple
+    `columns[j]` is the column that becomes column j.
+
+    :digits: dict
+    Maps each digit 1-9 to the digit it is relabeled as.
+    """
+    def __init__(self, transpose: bool, rows: tuple, columns: tuple, digits: dict):
+        self.transpose = transpose
+        self.rows = tuple(rows)
+        self.columns = tuple(columns)
+        self.digits = dict(digits)
+        self.inverse_digits = {canonical: digit for digit, canonical in self.digits.items()}
+
+    def _source(self, row: int, column: int) -> int:
+        """The index in the original grid of the cell that lands on (row, column)"""
+        row, column = self.rows[row], self.columns[column]
+        return column * 9 + row if self.transpose else row * 9 + column
+
+    def apply(self, grid: list) -> list:
+        """Maps a flat grid of 81 values onto the canonical orientation and labels"""
+        return [self.digits.get(grid[self._source(row, column)], 0) for row in range(9) for column in range(9)]
+
+    def invert(self, grid: list) -> list:
+        """Maps a flat grid of 81 values from the canonical orientation and labels back to the original"""
+        original = [0] * 81
+        for row in range(9):
+            for column in range(9):
+                original[self._source(row, column)] = self.inverse_digits.get(grid[row * 9 + column], 0)
+        return original
+
+
+def _smallest_row(values: list, groups: tuple, labels: dict, next_label: int) -> tuple:
+    """
+    Description
+    -----------
+    Finds the smallest a row can be made, once relabeled, by reordering the
+    columns within each group. Blanks go first, then digits that already
+    have a label (smallest first), then digits that do not, which are given
+    the next labels in turn whatever order they go in.
+
+    Params
+    ------
+    :values: list
+    The 9 values of the row.
+
+    :groups: tuple
+    The columns in order as a tuple of groups, each a tuple of columns
+    that are still free to go in any order.
+
+    :labels: dict
+    The labels already given out.
+
+    :next_label: int
+    The next label to give out.
+
+    Return
+    ------
+    tuple
+    The relabeled row.
+    """
+    row = []
+    for group in groups:
+        new = 0
+        known = []
+        for column in group:
+            value = values[column]
+            if not value:
+                row.append(0)
+            elif value in labels:
+                known.append(labels[value])
+            else:
+                new += 1
+        row += sorted(known)
+        row += range(next_label, next_label + new)
+        next_label += new
+    return tuple(row)
+
+
+def _refinements(values: list, groups: tuple, labels: dict, next_label: int) -> list:
+    """
+    Description
+    -----------
+    Splits each group of columns the way `_smallest_row` orders them. The
+    blanks stay together as a group, as they still look the same. Each digit
+    gets a group of its own, and since the digits without a label could go in
+    any order there is one refinement for each order they could go in.
+
+    Params
+    ------
+    The same as `_smallest_row`.
+
+    Return
+    ------
+    list
+    (groups, labels, next label) for each refinement.
+    """
+    parts = []
+    for group in groups:
+        blanks = tuple(column for column in group if not values[column])
+        known = sorted((labels[values[column]], column) for column in group if values[column] in labels)
+        new = [column for column in group if values[column] and values[column] not in labels]
+        choices = [blanks] if blanks else []
+        parts.append((choices + [(column,) for label, column in known], list(permutations(new))))
+    refinements = []
+    for orders in product(*[new_orders for fixed, new_orders in parts]):
+        refined = []
+        added = dict(labels)
+        label = next_label
+        for (fixed, new_orders), order in zip(parts, orders):
+            refined += fixed
+            for column in order:
+                refined.append((column,))
+                added[values[column]] = label
+                label += 1
+        refinements.append((tuple(refined), added, label))
+    return refinements
+
+
+def _candidate_rows(rows: tuple) -> list:
+    """The rows that could come next, finishing the current band before starting another"""
+    if len(rows) % 3:
+        band = rows[-1] // 3
+        return [row for row in range(band * 3, band * 3 + 3) if row not in rows]
+    used = {row // 3 for row in rows}
+    return [row for row in range(9) if row // 3 not in used]
+
+
+def canonicalize(values: list, max_states: int = MAX_STATES) -> tuple:
+    """
+    Description
+    -----------
+    Finds the canonical form of a puzzle and the transform onto it.
+
+    Params
+    ------
+    :values: list
+    Either a list of 9 lists of 9 values (`None` for unknown)
+    or an already flattened list of 81 integers.
+
+    :max_states: int = MAX_STATES
+    The most partial transforms to keep while searching. A very symmetric
+    puzzle can tie on so many that it is quicker to give up, in which case
+    the puzzle is only relabeled. The result is still a correct key for the
+    puzzle, it just will not be shared with the puzzle's symmetric twins.
+
+    Return
+    ------
+    tuple
+    (canonical, transform) the canonical 81 character string and the
+    `Transform` that maps this puzzle onto it.
+    """
+    grid = as_grid(values)
+    if len(grid) != 81:
+        raise ValueError(f"You passed in: `{values}``, but we were expecting a 9x9 puzzle.")
+    grids = {False: grid, True: [grid[column * 9 + row] for row in range(9) for column in range(9)]}
+    # (transpose, rows so far, column groups, labels, next label) with each
+    # stack's columns starting out as one group, for every order of stacks
+    states = [
+        (transpose, (), tuple(tuple(range(stack * 3, stack * 3 + 3)) for stack in stacks), {}, 1)
+        for transpose in grids
+        for stacks in permutations(range(3))
+    ]
+    prefix = []
+    for position in range(9):
+        best = None
+        extended = []
+        for transpose, rows, groups, labels, next_label in states:
+            source = grids[transpose]
+            for row in _candidate_rows(rows):
+                row_values = source[row * 9:row * 9 + 9]
+                relabeled = _smallest_row(row_values, groups, labels, next_label)
+                if best is None or relabeled < best:
+                    best, extended = relabeled, []
+                if relabeled == best:
+                    for refined, new_labels, new_next in _refinements(row_values, groups, labels, next_label):
+                        extended.append((transpose, rows + (row,), refined, new_labels, new_next))
+            if len(extended) > max_states:
+                return _relabel_only(grid)
+        prefix.append(best)
+        states = extended
+    transpose, rows, groups, labels, next_label = states[0]
+    columns = tuple(column for group in groups for column in group)
+    return (''.join(str(value) for row in prefix for value in row), Transform(transpose, rows, columns, _fill_labels(labels)))
+
+
+def _fill_labels(labels: dict) -> dict:
+    """Completes a partial relabeling so that digits missing from the puzzle map onto the unused labels in order"""
+    unused = iter(sorted(set(range(1, 10)) - set(labels.values())))
+    return {digit: labels[digit] if digit in labels else next(unused) for digit in range(1, 10)}
+
+
+def _relabel_only(grid: list) -> tuple:
+    """Relabels the digits of a grid in order of first appearance without moving anything"""
+    labels = {}
+    for value in grid:
+        if value and value not in labels:
+            labels[value] = len(labels) + 1
+    transform = Transform(False, range(9), range(9), _fill_labels(labels))
+    return (''.join(str(value) for value in transform.apply(grid)), transform)
+
+
+class SolutionCache:
+    """
+    Description
+    -----------
+    A least recently used cache of solved puzzles keyed by their canonical
+    form, so that a puzzle is only solved once for all of its symmetric twins.
+
+    Params
+    ------
+    :maxsize: int = CACHE_SIZE
+    The most solutions to hold, the least recently used are dropped first.
+
+    :max_states: int = MAX_STATES
+    Passed on to `canonicalize`.
+    """
+    def __init__(self, maxsize: int = CACHE_SIZE, max_states: int = MAX_STATES):
+        if maxsize < 1:
+            raise ValueError(f"You passed in: `{maxsize}``, but we were expecting a maxsize of at least 1.")
+        self.maxsize = maxsize
+        self.max_states = max_states
+        self.solutions = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._last = (None, None, None)
+
+    def __len__(self) -> int:
+        return len(self.solutions)
+
+    def _canonicalize(self, grid: list) -> tuple:
+        """Canonicalizes a grid, remembering the last one so a `get` and `put` of the same grid only do it once"""
+        key = tuple(grid)
+        if len(key) != 81:
+            return (key, None)
+        if self._last[0] != key:
+            self._last = (key,) + canonicalize(grid, self.max_states)
+        return self._last[1:]
+
+    def get(self, values: list):
+        """
+        Description
+        -----------
+        Looks up the solution to a puzzle.
+
+        Params
+        ------
+        :values: list
+        Either a list of 9 lists of 9 values or a flat list of 81 integers.
+
+        Return
+        ------
+        list
+        The flat list of 81 solved values, or None if the puzzle
+        (or any of its symmetric twins) has not been solved yet.
+        """
+        grid = as_grid(values)
+        canonical, transform = self._canonicalize(grid)
+        solution = self.solutions.get(canonical)
+        if solution is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.solutions.move_to_end(canonical)
+        return solution[:] if transform is None else transform.invert(solution)
+
+    def put(self, values: list, solution: list) -> None:
+        """
+        Description
+        -----------
+        Stores the solution to a puzzle.
+
+        Params
+        ------
+        :values: list
+        The puzzle, either a list of 9 lists of 9 values or a flat list of 81 integers.
+
+        :solution: list
+        The flat list of 81 solved values.
+
+        Return
+        ------
+        None
+        """
+        grid = as_grid(values)
+        canonical, transform = self._canonicalize(grid)
+        self.solutions[canonical] = list(solution) if transform is None else transform.apply(solution)
+        self.solutions.move_to_end(canonical)
+        while len(self.solutions) > self.maxsize:
+            self.solutions.popitem(last=False)
+
+    def solve(self, values: list, solver) -> tuple:
+        """
+        Description
+        -----------
+        Returns the cached solution to a puzzle, or solves and caches it.
+
+        Params
+        ------
+        :values: list
+        Either a list of 9 lists of 9 values or a flat list of 81 integers.
+
+        :solver: function
+        Called with the flat grid on a miss, returning (grid, solved).
+
+        Return
+        ------
+        tuple
+        (grid, solved) as returned by `solver`, or the cached solution and True.
+        """
+        grid = as_grid(values)
+        solution = self.get(grid)
+        if solution is not None:
+            return (solution, True)
+        solution, solved = solver(grid)
+        if solved:
+            self.put(grid, solution)
+        return (solution, solved)
@@ -2,10 +2,14 @@
 """
 This classe defines what attributes a single cell holds
 """
-from textwrap import dedent
-
 from sudoku_objects.base import _NumberSpace
+from sudoku_objects.base import BITMASK
+from sudoku_objects.base import DIGIT_CHARACTERS
+from sudoku_objects.base import NULL_MASK
 from sudoku_objects.base import NULL_SET
+from sudoku_objects.base import SIZE
+from sudoku_objects.base import set_to_mask
+from sudoku_objects.trace import ELIMINATING
 
 
 class Cell(_NumberSpace):
@@ -16,18 +20,37 @@ class Cell(_NumberSpace):
     within a matrix of 81 cells. This cell not only
     exists in a mtrix, but also in a box, row, and
     column each containing another group of cells.
+
+    When `dirty_units` is set (the matrix sets it to its queue of units
+    waiting to be scanned), setting this cell's value or removing one of
+    its possibilities queues up this cell's row, column and box. Setting
+    a value also adds them to `changed_units` for the next quality check.
+
+    When `trace` is set (to the matrix's `TraceRecorder`) the values this
+    cell is set to and the possibilities it loses are recorded there.
+
+    A solved cell removes its value from the possibilities of its row, column
+    and box unless `update_groups` is False, for when the groups will
+    refresh their possibilities once every cell has been added.
+
+    `size` is the number of values in the grid, 9 unless this is one of
+    the larger (or smaller) grids described in `base.BOX_SIZES`.
     """
-    def __init__(self, value, row, column, box):
-        _NumberSpace.__init__(self)
+    def __init__(self, value, row, column, box, bitmask: bool = BITMASK, update_groups: bool = True, size: int = SIZE):
+        _NumberSpace.__init__(self, bitmask=bitmask, size=size)
         self.value = value
         self.row = row
         self.column = column
         self.box = box
+        self.dirty_units = None
+        self.changed_units = None
+        self.trace = None
         self.is_solved = True if value is not None else False
         if self.is_solved:
-            self.row.rm_possibility(self.value)
-            self.column.rm_possibility(self.value)
-            self.box.rm_possibility(self.value)
+            if update_groups:
+                self.row.rm_possibility(self.value)
+                self.column.rm_possibility(self.value)
+                self.box.rm_possibility(self.value)
             self.possibilities = NULL_SET.copy()
 
     def __str__(self) -> str:
@@ -41,20 +64,37 @@ class Cell(_NumberSpace):
         left to solve for a particular cell, or the
         solved value centered within the cell.
         """
+        border = '+' + '-' * (2 * self.digits.box_size + 1) + '+'
+        lines = [f'|{self.poss_line(line)}|' for line in range(self.digits.box_size)]
+        return '\n'.join([border] + lines + [border])
+
+    def poss_line(self, line: int) -> str:
+        """
+        Description
+        -----------
+        One line of the possibilities drawn the way `__poss__` draws
+        them, a box size wide and a box size tall, without the borders.
+
+        Params
+        ------
+        :line: int
+        The line of the cell from 0 up to the box size.
+
+        Return
+        ------
+        str
+        The line, for a grid of box size 3 this is 7 characters wide.
+        """
+        box_size = self.digits.box_size
         if self.is_solved:
-            return dedent(f"""\
-                +-------+
-                |       |
-                |   {self.value}   |
-                |       |
-                +-------+""")
-        else:
-            return dedent(f"""\
-                +-------+
-                | {1 if 1 in self.possibilities else ' '} {2 if 2 in self.possibilities else ' '} {3 if 3 in self.possibilities else ' '} |
-                | {4 if 4 in self.possibilities else ' '} {5 if 5 in self.possibilities else ' '} {6 if 6 in self.possibilities else ' '} |
-                | {7 if 7 in self.possibilities else ' '} {8 if 8 in self.possibilities else ' '} {9 if 9 in self.possibilities else ' '} |
-                +-------+""")
+            if line != box_size // 2:
+                return ' ' * (2 * box_size + 1)
+            return DIGIT_CHARACTERS[self.value - 1].center(2 * box_size + 1)
+        characters = DIGIT_CHARACTERS[line * box_size:(line + 1) * box_size]
+        return ''.join(
+            f' {character if self.has_possibility(line * box_size + offset + 1) else " "}'
+            for offset, character in enumerate(characters)
+        ) + ' '
 
     def __dict__(self):
         return {
@@ -65,10 +105,52 @@ class Cell(_NumberSpace):
             "possibilities": self.possibilities
         }
 
+    def queue_units(self, queue: dict) -> None:
+        """Adds this cell's row, column and box to a queue (a dict used as an ordered set)"""
+        queue[self.row] = None
+        queue[self.column] = None
+        queue[self.box] = None
+
+    @property
+    def index(self) -> int:
+        """The position of this cell in the matrix from 0-80, reading left to right and top to bottom"""
+        return self.row.row_number * self.digits.size + self.column.column_number
+
+    def rm_possibility(self, possibility: int) -> int:
+        removing = _NumberSpace.rm_possibility(self, possibility)
+        if removing and self.dirty_units is not None:
+            self.queue_units(self.dirty_units)
+            if self.trace is not None and self.trace.technique in ELIMINATING:
+                self.trace.eliminate(self.index, 1 << (removing - 1))
+        return removing
+
+    def snapshot(self) -> tuple:
+        """Returns the value and a copy of the possibilities that `restore` can put back"""
+        return (self.value, self.is_solved, _NumberSpace.snapshot(self))
+
+    def restore(self, snapshot: tuple) -> None:
+        """Puts back the value and possibilities previously returned by `snapshot`"""
+        self.value, self.is_solved, possibilities = snapshot
+        _NumberSpace.restore(self, possibilities)
+
     def set_value(self, value):
+        if self.trail is not None:
+            self.trail.save(self)
+        if self.trace is not None:
+            remaining = self.mask if self.bitmask else set_to_mask(self._possibilities)
+            self.trace.set_value(self.index, value, remaining & ~(1 << (value - 1)))
         self.value = value
-        self.possibilities = NULL_SET.copy()
+        if self.bitmask:
+            self.mask = NULL_MASK
+        else:
+            self.possibilities = NULL_SET.copy()
         self.is_solved = True
+        if self.dirty_units is not None:
+            self.queue_units(self.dirty_units)
+            self.queue_units(self.changed_units)
+        self.row.rm_possibility(value)
+        self.column.rm_possibility(value)
+        self.box.rm_possibility(value)
         for cell in self.row.cells:
             cell.rm_possibility(value)
         for cell in self.column.cells:
@@ -77,11 +159,28 @@ class Cell(_NumberSpace):
             cell.rm_possibility(value)
 
     def refresh_possibilities(self):
-        if not self.is_solved:
-            self.possibilities = self.row.possibilities.intersection(
-                self.column.possibilities.intersection(
-                    self.box.possibilities))
-            if len(self.possibilities) == 1:
-                self.set_value(self.possibilities.pop())
-        else:
+        if self.bitmask:
+            if not self.is_solved:
+                mask = self.mask & self.row.mask & self.column.mask & self.box.mask
+                if mask != self.mask:
+                    if self.trail is not None:
+                        self.trail.save(self)
+                    self.mask = mask
+                value = self.digits.single_digit[mask]
+                if value:
+                    self.set_value(value)
+            else:
+                self.mask = NULL_MASK
+        elif not self.is_solved:
+            possibilities = self._possibilities.intersection(
+                self.row.possibilities,
+                self.column.possibilities,
+                self.box.possibilities)
+            if len(possibilities) != len(self._possibilities):
+                if self.trail is not None:
+                    self.trail.save(self)
+                self._possibilities = possibilities
+            if len(possibilities) == 1:
+                self.set_value(min(possibilities))
+        elif self._possibilities:
             self.possibilities = NULL_SET.copy()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+This is the client of the solver daemon in `daemon.py`.
+
+It imports nothing but the standard library, so starting it costs little
+more than starting the interpreter. Each line is sent to the daemon as soon
+as it is read, from a thread of its own, while the responses are written
+out as they arrive. So any amount of input can be streamed through a single
+connection without either side waiting on the other.
+"""
+import os
+import socket
+import sys
+import threading
+
+# Not `tempfile.gettempdir()`, importing `tempfile` takes longer than the rest of the client
+SOCKET_PATH = os.path.join(os.environ.get('TMPDIR', '/tmp'), 'sudoku_solver.sock')
+READ_SIZE = 64 * 1024
+
+
+def stream(lines, path: str = SOCKET_PATH, output=None) -> int:
+    """
+    Description
+    -----------
+    Sends lines to the solver daemon and writes back its responses.
+
+    Params
+    ------
+    :lines: iterable
+    The request lines, each a puzzle string, a JSON puzzle or `HEALTH`,
+    see `daemon.py`. Any trailing newline is replaced with one of its own.
+
+    :path: str = SOCKET_PATH
+    The Unix domain socket the daemon listens on.
+
+    :output: file = None
+    Where to write the responses, one JSON document per line, defaults to STDOUT.
+
+    Return
+    ------
+    int
+    The number of response lines written.
+    """
+    output = output or sys.stdout
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    connection.connect(path)
+    failures = []
+    sender = threading.Thread(target=_send, args=(connection, lines, failures), daemon=True)
+    sender.start()
+    written = 0
+    try:
+        while True:
+            data = connection.recv(READ_SIZE)
+            if not data:
+                break
+            output.write(data.decode('utf-8'))
+            written += data.count(b'\n')
+        output.flush()
+        sender.join()
+    finally:
+        connection.close()
+    if failures:
+        raise failures[0]
+    return written
+
+
+def _send(connection: socket.socket, lines, failures: list) -> None:
+    """Sends each line as soon as it is read, then closes the sending half of the connection"""
+    try:
+        for line in lines:
+            connection.sendall(line.rstrip('\r\n').encode('utf-8') + b'\n')
+        connection.shutdown(socket.SHUT_WR)
+    except Exception as error:
+        failures.append(error)
+        try:
+            connection.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
@@ -5,6 +5,9 @@ matrix column or 3-cell box column contained in a
 sudoku puzzle
 """
 from sudoku_objects.base import _CellGroup
+from sudoku_objects.base import BITMASK
+from sudoku_objects.base import DIGIT_CHARACTERS
+from sudoku_objects.base import SIZE
 
 
 class Column(_CellGroup):
@@ -13,10 +16,11 @@ class Column(_CellGroup):
     -----------
     This object represents a column of 9 cells
     contained in a matrix of 9 columns. This is
-    a 1 dimensional object with a height of 9.
+    a 1 dimensional object with a height of 9
+    (or `size` in larger grids).
     """
-    def __init__(self, column_number):
-        _CellGroup.__init__(self, number=column_number)
+    def __init__(self, column_number, bitmask: bool = BITMASK, size: int = SIZE):
+        _CellGroup.__init__(self, number=column_number, bitmask=bitmask, size=size)
         self.column_number = column_number
 
     def __str__(self) -> str:
@@ -24,7 +28,7 @@ class Column(_CellGroup):
         line_break = "+---+\n"
         my_str.append(line_break)
         for cell in self.cells:
-            my_str.append(f"| {cell.value if cell.value is not None else ' '} |\n{line_break}")
+            my_str.append(f"| {DIGIT_CHARACTERS[cell.value - 1] if cell.value is not None else ' '} |\n{line_break}")
         return ''.join(my_str)
 
     def __poss__(self) -> str:
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+These read and write a corpus of puzzles as a packed binary file of fixed
+width records, read through `mmap` so that any range of puzzles can be
+sliced straight out of the file without parsing text or reading the rest.
+
+The file starts with a 16 byte header
+    magic (4 bytes) b'SDKC'
+    version (1 byte)
+    flags (1 byte) FLAG_PACKED, FLAG_SOLUTIONS and FLAG_STATUSES or'd together
+    record size (2 bytes, little endian)
+    record count (8 bytes, little endian)
+followed by one record per puzzle. A record holds the puzzle, then the
+solution if FLAG_SOLUTIONS is set, then one status byte if FLAG_STATUSES
+is set. Puzzles and solutions take 81 bytes, one value from 0-9 per cell
+(0 for unknown), or 41 bytes with two values per byte when FLAG_PACKED is
+set, the first value in the high nibble. The status byte is
+0 for unknown or 1 + the index of the status in `store.STATUSES`.
+
+Record i starts at byte `HEADER_SIZE + i * record_size`, so splitting a
+corpus across processes only takes handing each one a range of records.
+"""
+import mmap
+import os
+import struct
+
+from sudoku_objects.store import STATUSES
+
+MAGIC = b'SDKC'
+VERSION = 1
+HEADER = struct.Struct('<4sBBHQ')
+HEADER_SIZE = HEADER.size
+FLAG_PACKED = 1
+FLAG_SOLUTIONS = 2
+FLAG_STATUSES = 4
+# Values 0-9 to puzzle string characters and back
+_TO_CHARACTERS = bytes.maketrans(bytes(range(10)), b'.123456789')
+_FROM_CHARACTERS = bytes.maketrans(b'.0123456789', bytes([0]) + bytes(range(10)))
+# Each packed byte to the 2 characters it holds
+_UNPACKED = [bytes([high, low]).translate(_TO_CHARACTERS).decode('ascii') for high in range(16) for low in range(16)]
+
+
+def grid_width(packed: bool) -> int:
+    """The bytes taken by one puzzle or solution"""
+    return 41 if packed else 81
+
+
+def encode(puzzle: str, packed: bool = False) -> bytes:
+    """
+    Description
+    -----------
+    Converts an 81 character puzzle string into its binary form.
+
+    Params
+    ------
+    :puzzle: str
+    The 81 character puzzle string with `.` or `0` for unknown values.
+
+    :packed: bool = False
+    Pack two values into each byte.
+
+    Return
+    ------
+    bytes
+    81 bytes (41 packed) of values 0-9.
+    """
+    values = puzzle.strip().encode('ascii').translate(_FROM_CHARACTERS)
+    if len(values) != 81 or max(values) > 9:
+        raise ValueError(f"You passed in: `{puzzle}``, but we were expecting 81 characters of `.` or 0-9.")
+    if not packed:
+        return values
+    values += b'\x00'
+    return bytes(values[index] << 4 | values[index + 1] for index in range(0, 82, 2))
+
+
+def decode(record, packed: bool = False) -> str:
+    """
+    Description
+    -----------
+    Converts the binary form of a puzzle back into an 81 character puzzle string.
+
+    Params
+    ------
+    :record: bytes
+    81 bytes (41 packed) of values 0-9, or a memoryview of them.
+
+    :packed: bool = False
+    Whether the values are packed two to a byte.
+
+    Return
+    ------
+    str
+    The 81 character puzzle string with `.` for unknown values.
+    """
+    if packed:
+        return ''.join([_UNPACKED[byte] for byte in record])[:81]
+    return bytes(record).translate(_TO_CHARACTERS).decode('ascii')
+
+
+class CorpusWriter:
+    """
+    Description
+    -----------
+    Writes puzzles, and optionally their solutions and statuses, to a binary
+    corpus file. The record count in the header is filled in on `close`.
+    Used as a context manager, the file is removed if an error stops the
+    writing, rather than leaving a corpus that holds only some of the records.
+
+    Params
+    ------
+    :path: str
+    The file to write, replacing it if it exists.
+
+    :packed: bool = False
+    Pack two values into each byte, 41 bytes a puzzle rather than 81.
+
+    :solutions: bool = False
+    Add a solution column.
+
+    :statuses: bool = False
+    Add a status column.
+    """
+    def __init__(self, path: str, packed: bool = False, solutions: bool = False, statuses: bool = False):
+        self.path = path
+        self.packed = packed
+        self.flags = (FLAG_PACKED if packed else 0) | (FLAG_SOLUTIONS if solutions else 0) | (FLAG_STATUSES if statuses else 0)
+        self.width = grid_width(packed)
+        self.record_size = self.width * (2 if solutions else 1) + (1 if statuses else 0)
+        self.count = 0
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, self.flags, self.record_size, 0))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        self.close()
+        if exc_type is not None:
+            os.unlink(self.path)
+
+    def write(self, puzzle: str, solution: str = None, status: str = None) -> None:
+        """
+        Description
+        -----------
+        Adds a record to the end of the corpus.
+
+        Params
+        ------
+        :puzzle: str
+        The 81 character puzzle string.
+
+        :solution: str = None
+        The 81 character solution, or as far as the solver got.
+        Left blank if the corpus has a solution column and this is None.
+
+        :status: str = None
+        One of `store.STATUSES`. Left unknown if the corpus
+        has a status column and this is None.
+
+        Return
+        ------
+        None
+        """
+        record = encode(puzzle, self.packed)
+        if self.flags & FLAG_SOLUTIONS:
+            record += encode(solution, self.packed) if solution else bytes(self.width)
+        if self.flags & FLAG_STATUSES:
+            if status is not None and status not in STATUSES:
+                raise ValueError(f"You passed in: `{status}``, but we were expecting one of {STATUSES}.")
+            record += bytes([STATUSES.index(status) + 1 if status else 0])
+        self.file.write(record)
+        self.count += 1
+
+    def close(self) -> None:
+        if self.file.closed:
+            return
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, VERSION, self.flags, self.record_size, self.count))
+        self.file.close()
+
+
+class Corpus:
+    """
+    Description
+    -----------
+    A binary corpus file mapped into memory. Records are only read from
+    the file as they are used, and `view` hands them out without copying.
+
+    Params
+    ------
+    :path: str
+    The file to read.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as corpus_file:
+            self.map = mmap.mmap(corpus_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.flags, self.record_size, self.count = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION:
+            self.map.close()
+            raise ValueError(f"You passed in: `{path}``, but we were expecting a version {VERSION} binary corpus.")
+        self.packed = bool(self.flags & FLAG_PACKED)
+        self.width = grid_width(self.packed)
+        if len(self.map) < HEADER_SIZE + self.count * self.record_size:
+            self.map.close()
+            raise ValueError(f"You passed in: `{path}``, but it is shorter than the {self.count} records in its header.")
+        self.buffer = memoryview(self.map)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        """
+        Description
+        -----------
+        Unmaps the file. Views handed out by `view` keep the mapping alive,
+        so release them (or let them go) before closing. If any are still
+        around the file is unmapped once the last of them is gone instead.
+
+        Return
+        ------
+        None
+        """
+        self.buffer.release()
+        try:
+            self.map.close()
+        except BufferError:
+            # A view is still in use, the map is closed when it is garbage collected along with the last one
+            pass
+
+    @property
+    def has_solutions(self) -> bool:
+        return bool(self.flags & FLAG_SOLUTIONS)
+
+    @property
+    def has_statuses(self) -> bool:
+        return bool(self.flags & FLAG_STATUSES)
+
+    def offset(self, index: int) -> int:
+        """The byte offset in the file of record `index`"""
+        if not 0 <= index < self.count:
+            raise IndexError(f"You passed in: `{index}``, but we were expecting a record from 0-{self.count - 1}.")
+        return HEADER_SIZE + index * self.record_size
+
+    def view(self, start: int, stop: int = None) -> memoryview:
+        """A memoryview of records `start` up to `stop` (or just `start`) straight out of the file, release it before `close`"""
+        stop = start + 1 if stop is None else stop
+        if stop <= start:
+            return self.buffer[0:0]
+        return self.buffer[self.offset(start):self.offset(stop - 1) + self.record_size]
+
+    def puzzle(self, index: int) -> str:
+        """The 81 character puzzle string of record `index`"""
+        offset = self.offset(index)
+        return decode(self.buffer[offset:offset + self.width], self.packed)
+
+    def grid(self, index: int) -> list:
+        """The puzzle of record `index` as a flat list of 81 integers, as used by `flat.py`"""
+        offset = self.offset(index)
+        if self.packed:
+            return [0 if character == '.' else int(character) for character in self.puzzle(index)]
+        return list(self.buffer[offset:offset + 81])
+
+    def solution(self, index: int) -> str:
+        """The 81 character solution of record `index`, or None if the corpus has no solution column"""
+        if not self.has_solutions:
+            return None
+        offset = self.offset(index) + self.width
+        return decode(self.buffer[offset:offset + self.width], self.packed)
+
+    def status(self, index: int) -> str:
+        """The status of record `index`, or None if it is unknown or the corpus has no status column"""
+        if not self.has_statuses:
+            return None
+        status = self.buffer[self.offset(index) + self.record_size - 1]
+        return STATUSES[status - 1] if status else None
+
+    def puzzles(self, start: int = 0, stop: int = None):
+        """Generates (index, puzzle string) for records `start` up to `stop` (or the end)"""
+        stop = self.count if stop is None else min(stop, self.count)
+        for index in range(start, stop):
+            yield (index, self.puzzle(index))
+
+
+def shards(count: int, shard_count: int) -> list:
+    """
+    Description
+    -----------
+    Splits `count` records into `shard_count` contiguous ranges
+    whose sizes differ by at most one.
+
+    Params
+    ------
+    :count: int
+    The number of records, `len(corpus)`.
+
+    :shard_count: int
+    The number of ranges to split them into.
+
+    Return
+    ------
+    list
+    (start, stop) of each range. Record i starts at byte
+    `HEADER_SIZE + i * record_size` of the file.
+    """
+    if shard_count < 1:
+        raise ValueError(f"You passed in: `{shard_count}``, but we were expecting a shard_count of at least 1.")
+    size, extra = divmod(count, shard_count)
+    ranges = []
+    start = 0
+    for shard in range(shard_count):
+        stop = start + size + (shard < extra)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def write_corpus(path: str, records, packed: bool = False, solutions: bool = False, statuses: bool = False) -> int:
+    """
+    Description
+    -----------
+    Converts puzzles from any of the other formats into a binary corpus.
+
+    Params
+    ------
+    :path: str
+    The file to write.
+
+    :records: iterable
+    (name, puzzle string) for each puzzle as generated by `pipeline.read_puzzles`,
+    or result dicts holding "puzzle", "solution" and "status" as generated
+    by `pipeline.solve_many` to fill in the solution and status columns.
+    Result dicts holding an "error" and records that cannot be encoded are left out.
+
+    :packed: bool = False
+    Pack two values into each byte.
+
+    :solutions: bool = False
+    Add a solution column.
+
+    :statuses: bool = False
+    Add a status column.
+
+    Return
+    ------
+    int
+    The number of records written.
+    """
+    with CorpusWriter(path, packed, solutions, statuses) as writer:
+        for record in records:
+            if isinstance(record, dict) and "error" in record:
+                continue
+            # A record is encoded whole before any of it is written, so one left out leaves nothing behind
+            try:
+                if isinstance(record, dict):
+                    writer.write(record["puzzle"], record.get("solution"), record.get("status"))
+                else:
+                    writer.write(record[1])
+            except ValueError:
+                continue
+        return writer.count
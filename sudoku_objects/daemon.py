@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+This class keeps the solver running in the background, listening on a
+Unix domain socket, so that scripts solving a few puzzles at a time pay
+for starting the interpreter, importing the solver and building its
+tables once rather than on every call.
+
+The protocol is one line per request and one line per response, in order.
+
+    a puzzle string   16, 81, 256 or 625 characters, `.` or `0` for unknown.
+                      Answered with JSON holding the name (its line number on
+                      the connection), puzzle, solution and status, just as
+                      `pipeline.solve_many` writes them.
+    a JSON puzzle     `{"name": {puzzle}}` in the JSON form described in
+                      `sudoku_solver.py`, answered in the same way for each
+                      puzzle it holds.
+    HEALTH            answered with JSON counts of what the daemon has done.
+
+Blank lines are skipped, and a line that cannot be read as a puzzle is
+answered with JSON holding its name, the line and an "error".
+
+Whatever lines have arrived on a connection are solved together as a chunk
+of up to `chunk_size` puzzles, while the next lines are read, and responses
+are written back as soon as their chunk is done. Each chunk is handed to a
+pool of worker processes started (and warmed up) along with the daemon, or
+with no workers to a single thread of the daemon itself, which is quickest
+for a puzzle or two at a time. Either way the event loop carries on reading
+and writing other connections while a chunk is solved.
+
+Use `client.stream` (or `sudoku_client.py`) to talk to it, or anything
+else that can write lines to a Unix domain socket.
+"""
+import asyncio
+import json
+import os
+import socket
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+
+from sudoku_objects.base import string_to_values
+from sudoku_objects.base import values_to_string
+from sudoku_objects.client import SOCKET_PATH
+from sudoku_objects.matrix import ENGINES
+from sudoku_objects.pipeline import CHUNK_SIZE
+from sudoku_objects.pipeline import PENDING_CHUNKS_PER_WORKER
+from sudoku_objects.pipeline import json_to_values
+from sudoku_objects.pipeline import results_of
+from sudoku_objects.pipeline import solve_chunk
+
+READ_SIZE = 64 * 1024
+# The longest request line read, a 625 character puzzle in JSON is well under this
+MAX_LINE = 64 * 1024
+# The easy sample, solved by every worker as it starts so the first real chunk finds it warm.
+WARM_UP = '7.......3.64...98..9.7.3.1...93.46......9......85.21...4.6.1.5..32...74.8.......6'
+
+
+def parse_line(line: str, number: int) -> list:
+    """
+    Description
+    -----------
+    Reads the puzzles out of one request line.
+
+    Params
+    ------
+    :line: str
+    The request line, without its newline.
+
+    :number: int
+    The line number on its connection, which names a puzzle string.
+
+    Return
+    ------
+    list
+    (name, puzzle string) for each puzzle. Raises a ValueError
+    if the line is neither a puzzle string nor a JSON puzzle.
+    """
+    if line.startswith('{'):
+        try:
+            puzzles = [(name, values_to_string(json_to_values(puzzle))) for name, puzzle in json.loads(line).items()]
+        except (AttributeError, KeyError, TypeError, ValueError):
+            raise ValueError(f"You passed in: `{line[:200]}``, but we were expecting JSON of the form {{\"name\": {{puzzle}}}}.")
+    else:
+        puzzles = [(str(number), line)]
+    for name, puzzle in puzzles:
+        string_to_values(puzzle)
+    return puzzles
+
+
+def warm_up(engine: str = 'flat') -> None:
+    """Solves one puzzle so that a worker process has everything imported and built before the first chunk arrives"""
+    solve_chunk([WARM_UP], engine)
+
+
+class SolverDaemon:
+    """
+    Description
+    -----------
+    The daemon described above. Start it with `await daemon.start()`
+    (or use it as an async context manager) and stop it with `await daemon.close()`.
+
+    Params
+    ------
+    :path: str = SOCKET_PATH
+    The Unix domain socket to listen on, it is created when the daemon
+    starts and removed when it closes.
+
+    :workers: int = 0
+    The number of worker processes, 0 solves every chunk in a thread of the daemon itself.
+
+    :engine: str = 'flat'
+    One of `matrix.ENGINES`.
+
+    :chunk_size: int = CHUNK_SIZE
+    The most puzzles solved together at a time.
+
+    :cache_size: int = 0
+    The size of the solution cache kept by each worker, see `pipeline.solve_chunk`.
+    """
+    def __init__(self, path: str = SOCKET_PATH, workers: int = 0, engine: str = 'flat', chunk_size: int = CHUNK_SIZE,
+                 cache_size: int = 0):
+        if engine not in ENGINES:
+            raise ValueError(f"You passed in: `{engine}``, but we were expecting one of {ENGINES}.")
+        if chunk_size < 1:
+            raise ValueError(f"You passed in: `{chunk_size}``, but we were expecting a chunk_size of at least 1.")
+        self.path = path
+        self.workers = workers
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self.cache_size = cache_size
+        self.counts = {"connections": 0, "requests": 0, "solved": 0, "chunks": 0, "errors": 0}
+        self.server = None
+        self.executor = None
+        self.handlers = {}
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def start(self):
+        """Starts and warms up the worker pool, then listens on the socket"""
+        if os.path.exists(self.path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.path)
+            except OSError:
+                # Left behind by a daemon that did not close, nothing is listening on it
+                os.unlink(self.path)
+            else:
+                raise FileExistsError(f"A daemon is already listening on {self.path}.")
+            finally:
+                probe.close()
+        loop = asyncio.get_running_loop()
+        if self.workers:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            # Start the workers before listening, a worker forked later would
+            # hold on to the sockets of every open connection and keep them open.
+            await asyncio.gather(*[loop.run_in_executor(self.executor, warm_up, self.engine) for _ in range(self.workers)])
+        else:
+            # One thread, so that the chunks share the solution cache one at a time
+            self.executor = ThreadPoolExecutor(max_workers=1)
+            await loop.run_in_executor(self.executor, warm_up, self.engine)
+        self.server = await asyncio.start_unix_server(self._handle, self.path)
+        os.chmod(self.path, 0o600)
+        return self
+
+    async def serve_forever(self) -> None:
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self) -> None:
+        """Stops listening, closes every connection, shuts the worker pool down and removes the socket"""
+        if self.server is not None:
+            self.server.close()
+        for writer in self.handlers.values():
+            writer.close()
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+        if self.server is not None:
+            await self.server.wait_closed()
+            self.server = None
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def health(self) -> dict:
+        """Returns the counts of what the daemon has done along with how busy it is now"""
+        return dict(self.counts, status='ok', open_connections=len(self.handlers), workers=self.workers, engine=self.engine)
+
+    def _solve(self, puzzles: list):
+        """Solves a chunk of puzzle strings, returning an awaitable of the `solve_chunk` solutions"""
+        self.counts["chunks"] += 1
+        if not puzzles:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result([])
+            return future
+        return asyncio.get_running_loop().run_in_executor(self.executor, solve_chunk, puzzles, self.engine, self.cache_size)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Reads request lines off one connection as they arrive, solving each chunk while the next is read"""
+        self.counts["connections"] += 1
+        self.handlers[asyncio.current_task()] = writer
+        pending = asyncio.Queue(maxsize=PENDING_CHUNKS_PER_WORKER * max(self.workers, 1))
+        responder = asyncio.get_running_loop().create_task(self._respond(pending, writer))
+        try:
+            number = 0
+            partial = b''
+            while True:
+                data = await reader.read(READ_SIZE)
+                lines = (partial + data).split(b'\n')
+                partial = lines.pop() if data else b''
+                if len(partial) > MAX_LINE:
+                    lines.append(partial[:MAX_LINE])
+                    partial = b''
+                # Whatever lines arrived together are solved together, a chunk at a time
+                entries = []
+                solving = 0
+                for line in lines:
+                    found = self._entries(line.decode('utf-8', errors='replace').strip(), number)
+                    number += 1
+                    entries += found
+                    solving += sum(isinstance(entry, tuple) for entry in found)
+                    if solving >= self.chunk_size:
+                        await self._queue(pending, entries)
+                        entries = []
+                        solving = 0
+                if entries:
+                    await self._queue(pending, entries)
+                if not data:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            await pending.put(None)
+            await asyncio.gather(responder, return_exceptions=True)
+            del self.handlers[asyncio.current_task()]
+            writer.close()
+
+    async def _queue(self, pending: asyncio.Queue, entries: list) -> None:
+        """Starts solving the puzzles of some entries and queues them up to be responded to in order"""
+        await pending.put((entries, self._solve([entry[1] for entry in entries if isinstance(entry, tuple)])))
+
+    def _entries(self, line: str, number: int) -> list:
+        """The (name, puzzle) to solve or the finished response dict of each response to one request line"""
+        if not line:
+            return []
+        if line.upper() == 'HEALTH':
+            return [self.health()]
+        self.counts["requests"] += 1
+        try:
+            return parse_line(line, number)
+        except ValueError as error:
+            self.counts["errors"] += 1
+            return [{"name": str(number), "puzzle": line[:200], "error": str(error)}]
+
+    async def _respond(self, pending: asyncio.Queue, writer: asyncio.StreamWriter) -> None:
+        """Writes back the responses to each chunk in the order they were read, as soon as each is solved"""
+        connected = True
+        while (item := await pending.get()) is not None:
+            entries, solutions = item
+            solving = [entry for entry in entries if isinstance(entry, tuple)]
+            try:
+                results = list(results_of(solving, {}, [puzzle for name, puzzle in solving], await solutions))
+                self.counts["solved"] += sum(result["status"] == 'solved' for result in results)
+            except Exception as error:
+                self.counts["errors"] += 1
+                results = [{"name": name, "puzzle": puzzle, "error": f"{type(error).__name__}: {error}"} for name, puzzle in solving]
+            results = iter(results)
+            if not connected:
+                # The client has gone, finish the chunks already started but throw their results away
+                continue
+            lines = [json.dumps(entry if isinstance(entry, dict) else next(results)) for entry in entries]
+            try:
+                writer.write(('\n'.join(lines) + '\n').encode('utf-8'))
+                await writer.drain()
+            except ConnectionError:
+                connected = False
+
+
+def serve(path: str = SOCKET_PATH, **kwargs) -> None:
+    """Runs a `SolverDaemon` until interrupted, the keyword arguments are passed on to it"""
+    async def run():
+        async with SolverDaemon(path, **kwargs) as daemon:
+            print(f"Solving on {daemon.path} with {daemon.workers} workers")
+            await daemon.serve_forever()
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+This is an exact cover solving engine using Knuth's Algorithm X
+with Dancing Links, independent of the rest of the solving logic.
+
+A sudoku is the exact cover problem of choosing, for each cell,
+one (cell, value) row such that each of the 324 constraint columns
+is covered exactly once:
+    0 - 80:   cell (row, column) holds a value
+    81 - 161: row holds value
+    162 - 242: column holds value
+    243 - 323: box holds value
+
+The links are kept in flat lists indexed by node number rather than as
+node objects, node 0 is the root and the column headers follow it.
+Constraints already met by the given values are left out of the matrix
+along with every (cell, value) row that would clash with a given value.
+
+Larger (and smaller) grids have 4 constraint columns per cell in the same
+order, e.g. 1024 for a 16x16 grid, with 16 rows holding 16 values and so on.
+"""
+from sudoku_objects.base import SIZE
+from sudoku_objects.flat import as_grid
+from sudoku_objects.flat import geometry_of
+
+# The number of constraint columns of the usual 9x9 grid
+CONSTRAINTS = 324
+
+
+def row_constraints(cell: int, value: int, size: int = SIZE) -> tuple:
+    """
+    Description
+    -----------
+    Returns the 4 constraint columns covered by placing a value in a cell.
+
+    Params
+    ------
+    :cell: int
+    The cell index from 0-80.
+
+    :value: int
+    The value from 1-9.
+
+    :size: int = SIZE
+    The number of values in the grid.
+
+    Return
+    ------
+    tuple
+    The cell, row, column and box constraint numbers.
+    """
+    tables = geometry_of(size * size)
+    cells = size * size
+    digit = value - 1
+    return (cell, cells + tables.row_of[cell] * size + digit, 2 * cells + tables.column_of[cell] * size + digit,
+            3 * cells + tables.box_of[cell] * size + digit)
+
+
+class DancingLinks:
+    """
+    Description
+    -----------
+    The sparse exact cover matrix for one puzzle.
+
+    Params
+    ------
+    :grid: list
+    A flat list of 81 values with 0 for unknown values.
+    """
+    def __init__(self, grid: list):
+        self.grid = list(grid)
+        size = geometry_of(self.grid).size
+        self.valid = True
+        self.left = [0]
+        self.right = [0]
+        self.up = [0]
+        self.down = [0]
+        self.column = [0]
+        self.size = [0]
+        self.choice = [None]
+        satisfied = set()
+        for cell, value in enumerate(self.grid):
+            if value:
+                constraints = row_constraints(cell, value, size)
+                if satisfied.intersection(constraints):
+                    self.valid = False
+                satisfied.update(constraints)
+        headers = {}
+        for constraint in range(4 * len(self.grid)):
+            if constraint not in satisfied:
+                headers[constraint] = self._add_header()
+        for cell, value in enumerate(self.grid):
+            if value:
+                continue
+            for candidate in range(1, size + 1):
+                constraints = row_constraints(cell, candidate, size)
+                if satisfied.isdisjoint(constraints):
+                    self._add_row((cell, candidate), [headers[constraint] for constraint in constraints])
+
+    def _add_node(self, header: int, choice: tuple) -> int:
+        node = len(self.left)
+        self.left.append(node)
+        self.right.append(node)
+        self.up.append(self.up[header])
+        self.down.append(header)
+        self.down[self.up[header]] = node
+        self.up[header] = node
+        self.column.append(header)
+        self.size.append(0)
+        self.choice.append(choice)
+        self.size[header] += 1
+        return node
+
+    def _add_header(self) -> int:
+        header = len(self.left)
+        self.left.append(self.left[0])
+        self.right.append(0)
+        self.right[self.left[0]] = header
+        self.left[0] = header
+        self.up.append(header)
+        self.down.append(header)
+        self.column.append(header)
+        self.size.append(0)
+        self.choice.append(None)
+        return header
+
+    def _add_row(self, choice: tuple, headers: list) -> None:
+        first = None
+        for header in headers:
+            node = self._add_node(header, choice)
+            if first is None:
+                first = node
+            else:
+                self.left[node] = self.left[first]
+                self.right[node] = first
+                self.right[self.left[first]] = node
+                self.left[first] = node
+
+    def cover(self, header: int) -> None:
+        left, right, up, down, column, size = self.left, self.right, self.up, self.down, self.column, self.size
+        right[left[header]] = right[header]
+        left[right[header]] = left[header]
+        row = down[header]
+        while row != header:
+            node = right[row]
+            while node != row:
+                down[up[node]] = down[node]
+                up[down[node]] = up[node]
+                size[column[node]] -= 1
+                node = right[node]
+            row = down[row]
+
+    def uncover(self, header: int) -> None:
+        left, right, up, down, column, size = self.left, self.right, self.up, self.down, self.column, self.size
+        row = up[header]
+        while row != header:
+            node = left[row]
+            while node != row:
+                size[column[node]] += 1
+                down[up[node]] = node
+                up[down[node]] = node
+                node = left[node]
+            row = up[row]
+        right[left[header]] = header
+        left[right[header]] = header
+
+    def solutions(self):
+        """
+        Description
+        -----------
+        Generates every solution to the puzzle.
+
+        Params
+        ------
+        None
+
+        Return
+        ------
+        generator
+        Yields flat lists of 81 values, one per solution.
+        """
+        if self.valid:
+            for choices in self._search([]):
+                grid = self.grid[:]
+                for cell, value in choices:
+                    grid[cell] = value
+                yield grid
+
+    def _search(self, choices: list):
+        right, down, size = self.right, self.down, self.size
+        if right[0] == 0:
+            yield choices
+            return
+        header = right[0]
+        best = header
+        while header != 0:
+            if size[header] < size[best]:
+                best = header
+                if size[best] <= 1:
+                    break
+            header = right[header]
+        if size[best] == 0:
+            return
+        self.cover(best)
+        row = down[best]
+        while row != best:
+            choices.append(self.choice[row])
+            node = right[row]
+            while node != row:
+                self.cover(self.column[node])
+                node = right[node]
+            yield from self._search(choices)
+            node = self.left[row]
+            while node != row:
+                self.uncover(self.column[node])
+                node = self.left[node]
+            choices.pop()
+            row = down[row]
+        self.uncover(best)
+
+
+def solutions(values: list, limit: int = None):
+    """
+    Description
+    -----------
+    Generates the solutions to a puzzle.
+
+    Params
+    ------
+    :values: list
+    Either a list of 9 lists of 9 values (`None` for unknown)
+    or an already flattened list of 81 integers.
+
+    :limit: int = None
+    Stop after this many solutions, or generate all of them.
+
+    Return
+    ------
+    generator
+    Yields flat lists of 81 values, one per solution.
+    """
+    grid = as_grid(values)
+    for count, solution in enumerate(DancingLinks(grid).solutions(), start=1):
+        yield solution
+        if limit is not None and count >= limit:
+            return
+
+
+def count_solutions(values: list, limit: int = None) -> int:
+    """
+    Description
+    -----------
+    Counts the solutions to a puzzle.
+
+    Params
+    ------
+    :values: list
+    Either a list of 9 lists of 9 values or a flat list of 81 integers.
+
+    :limit: int = None
+    Stop counting once this many solutions are found.
+
+    Return
+    ------
+    int
+    The number of solutions (at most `limit`).
+    """
+    return sum(1 for solution in solutions(values, limit=limit))
+
+
+def solve(values: list) -> tuple:
+    """
+    Description
+    -----------
+    Finds the first solution to a puzzle.
+
+    Params
+    ------
+    :values: list
+    Either a list of 9 lists of 9 values or a flat list of 81 integers.
+
+    Return
+    ------
+    tuple
+    (grid, solved) the flat list of values, solved if a solution was found
+    and otherwise the values as given.
+    """
+    grid = as_grid(values)
+    for solution in solutions(grid, limit=1):
+        return (solution, True)
+    return (grid, False)
@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+"""
+This is a flat, array backed solving engine.
+
+Rather than building cell, row, column and box objects the whole
+puzzle is kept as one list of 81 values (0 for unknown) and one list
+of 81 candidate masks using the same 9 bit layout as `base.DIGIT_BITS`.
+Everything that the object model finds by walking `cell.row.cells`
+and friends is looked up from tables computed once at import time.
+
+Cells are numbered 0-80 left to right, top to bottom,
+units are numbered 0-8 for rows, 9-17 for columns and 18-26 for boxes.
+
+Grids of other sizes (see `base.BOX_SIZES`) work the same way, with their
+own tables from `geometry`, picked out by the number of cells in the grid.
+The module level tables are those of the usual 9x9 grid.
+"""
+from sudoku_objects.base import BOX_SIZE
+from sudoku_objects.base import BOX_SIZES
+from sudoku_objects.base import NULL_MASK
+from sudoku_objects.base import SIZES_BY_CELLS
+from sudoku_objects.base import digits_for
+
+
+class Geometry:
+    """
+    Description
+    -----------
+    The tables of a grid whose boxes are `box_size` cells on a side, for
+    the usual grid these are the module level `CELLS`, `UNITS` and so on.
+    Get these from `geometry` or `geometry_of` rather than building them.
+
+    Params
+    ------
+    :box_size: int
+    The height and width of a box, one of `base.BOX_SIZES`.
+    """
+    def __init__(self, box_size: int):
+        size = box_size * box_size
+        self.box_size = box_size
+        self.size = size
+        self.digits = digits_for(size)
+        self.cells = range(size * size)
+        self.row_of = tuple(cell // size for cell in self.cells)
+        self.column_of = tuple(cell % size for cell in self.cells)
+        self.box_of = tuple((cell // (size * box_size)) * box_size + (cell % size) // box_size for cell in self.cells)
+        self.units = tuple(
+            [tuple(cell for cell in self.cells if self.row_of[cell] == row) for row in range(size)]
+            + [tuple(cell for cell in self.cells if self.column_of[cell] == column) for column in range(size)]
+            + [tuple(cell for cell in self.cells if self.box_of[cell] == box) for box in range(size)]
+        )
+        self.cell_units = tuple(
+            (self.row_of[cell], size + self.column_of[cell], 2 * size + self.box_of[cell]) for cell in self.cells
+        )
+        self.peers = tuple(
+            tuple(sorted({peer for unit in self.cell_units[cell] for peer in self.units[unit]} - {cell}))
+            for cell in self.cells
+        )
+        # The places a box meets a row or column, each as (box unit, line unit, the
+        # shared cells, the other cells of the box, the other cells of the line)
+        self.intersections = tuple(
+            (box, line, segment, tuple(sorted(set(self.units[box]) - set(segment))),
+             tuple(sorted(set(self.units[line]) - set(segment))))
+            for box in range(2 * size, 3 * size)
+            for line in range(2 * size)
+            for segment in [tuple(sorted(set(self.units[box]) & set(self.units[line])))]
+            if segment
+        )
+
+
+_GEOMETRIES = {}
+
+
+def geometry(box_size: int = BOX_SIZE) -> Geometry:
+    """
+    Description
+    -----------
+    Returns the tables of a grid, building them the first time that size is asked for.
+
+    Params
+    ------
+    :box_size: int = BOX_SIZE
+    The height and width of a box, one of `base.BOX_SIZES`.
+
+    Return
+    ------
+    Geometry
+    The tables of the grid.
+    """
+    if box_size not in _GEOMETRIES:
+        if box_size not in BOX_SIZES:
+            raise ValueError(f"You passed in: `{box_size}``, but we were expecting a box size from {BOX_SIZES}.")
+        _GEOMETRIES[box_size] = Geometry(box_size)
+    return _GEOMETRIES[box_size]
+
+
+def geometry_of(grid) -> Geometry:
+    """
+    Description
+    -----------
+    Returns the tables of a flat grid by its number of cells.
+
+    Params
+    ------
+    :grid: list
+    A flat grid, or the number of cells in one.
+
+    Return
+    ------
+    Geometry
+    The tables of the grid.
+    """
+    cells = grid if isinstance(grid, int) else len(grid)
+    if cells == 81:
+        return GEOMETRY
+    if cells not in SIZES_BY_CELLS:
+        raise ValueError(f"You passed in: `{cells}``, but we were expecting a grid of {tuple(SIZES_BY_CELLS)} cells.")
+    return geometry(BOX_SIZES[tuple(SIZES_BY_CELLS).index(cells)])
+
+
+GEOMETRY = geometry(BOX_SIZE)
+CELLS = GEOMETRY.cells
+ROW_OF = GEOMETRY.row_of
+COLUMN_OF = GEOMETRY.column_of
+BOX_OF = GEOMETRY.box_of
+UNITS = GEOMETRY.units
+CELL_UNITS = GEOMETRY.cell_units
+PEERS = GEOMETRY.peers
+# The 54 places a box meets a row or column, each as
+# (box unit, line unit, the 3 shared cells, the other 6 cells of the box, the other 6 cells of the line)
+INTERSECTIONS = GEOMETRY.intersections
+
+
+def values_to_grid(values: list) -> list:
+    """
+    Description
+    -----------
+    Flattens a list of 9 lists of 9 values (`None` for unknown)
+    into a list of 81 integers (0 for unknown).
+
+    Params
+    ------
+    :values: list
+    The list of lists as passed to `Matrix`.
+
+    Return
+    ------
+    list
+    The flat grid.
+    """
+    return [value or 0 for row in values for value in row]
+
+
+def grid_to_values(grid: list) -> list:
+    """
+    Description
+    -----------
+    The inverse of `values_to_grid`.
+
+    Params
+    ------
+    :grid: list
+    A flat list of 81 integers.
+
+    Return
+    ------
+    list
+    A list of 9 lists of 9 values with `None` for unknown values.
+    """
+    size = geometry_of(grid).size
+    return [[grid[row * size + column] or None for column in range(size)] for row in range(size)]
+
+
+def as_grid(values: list) -> list:
+    """
+    Description
+    -----------
+    Copies a puzzle into a flat grid.
+
+    Params
+    ------
+    :values: list
+    Either a list of 9 lists of 9 values (`None` for unknown)
+    or an already flattened list of 81 integers.
+
+    Return
+    ------
+    list
+    The flat grid.
+    """
+    if values and isinstance(values[0], (list, tuple)):
+        return values_to_grid(values)
+    return list(values)
+
+
+def initial_masks(grid: list) -> list:
+    """
+    Description
+    -----------
+    Computes the candidate mask of every cell from the known values.
+
+    Params
+    ------
+    :grid: list
+    A flat list of 81 integers.
+
+    Return
+    ------
+    list
+    81 candidate masks, solved cells have a mask of 0. Returns `None`
+    if a value is duplicated within a unit or an unknown cell has no
+    candidates left.
+    """
+    tables = geometry_of(grid)
+    complete_mask = tables.digits.complete_mask
+    unit_masks = []
+    for unit in tables.units:
+        seen = NULL_MASK
+        for cell in unit:
+            if grid[cell]:
+                bit = 1 << (grid[cell] - 1)
+                if seen & bit:
+                    return None
+                seen |= bit
+        unit_masks.append(complete_mask & ~seen)
+    masks = []
+    for cell in tables.cells:
+        if grid[cell]:
+            masks.append(NULL_MASK)
+            continue
+        row, column, box = tables.cell_units[cell]
+        mask = unit_masks[row] & unit_masks[column] & unit_masks[box]
+        if not mask:
+            return None
+        masks.append(mask)
+    return masks
+
+
+def assign(grid: list, masks: list, cell: int, value: int, peers: tuple = None) -> bool:
+    """
+    Description
+    -----------
+    Sets a cell to a value and removes that value from
+    the candidates of each of the cell's 20 peers.
+
+    Params
+    ------
+    :grid: list
+    The flat list of values, updated in place.
+
+    :masks: list
+    The flat list of candidate masks, updated in place.
+
+    :cell: int
+    The cell index from 0-80.
+
+    :value: int
+    The value from 1-9.
+
+    :peers: tuple = None
+    The `peers` table of the grid's geometry, looked up from the grid if not given.
+
+    Return
+    ------
+    bool
+    False if this left an unknown peer without any candidates.
+    """
+    if peers is None:
+        peers = geometry_of(grid).peers
+    grid[cell] = value
+    masks[cell] = NULL_MASK
+    bit = 1 << (value - 1)
+    for peer in peers[cell]:
+        if masks[peer] & bit:
+            masks[peer] ^= bit
+            if not masks[peer]:
+                return False
+    return True
+
+
+def propagate(grid: list, masks: list) -> bool:
+    """
+    Description
+    -----------
+    Repeatedly fills in naked singles (cells with one candidate)
+    and hidden singles (values with one possible cell in a unit)
+    until neither finds anything new.
+
+    Params
+    ------
+    :grid: list
+    The flat list of values, updated in place.
+
+    :masks: list
+    The flat list of candidate masks, updated in place.
+
+    Return
+    ------
+    bool
+    False if the grid was found to be contradictory.
+    """
+    tables = geometry_of(grid)
+    cells = tables.cells
+    units = tables.units
+    peers = tables.peers
+    single_digit = tables.digits.single_digit
+    mask_digits = tables.digits.mask_digits
+    complete_mask = tables.digits.complete_mask
+    finds = 1
+    while finds:
+        finds = 0
+        for cell in cells:
+            value = single_digit[masks[cell]]
+            if value:
+                if not assign(grid, masks, cell, value, peers):
+                    return False
+                finds += 1
+        for unit in units:
+            seen_once = NULL_MASK
+            seen_twice = NULL_MASK
+            placed = NULL_MASK
+            for cell in unit:
+                mask = masks[cell]
+                seen_twice |= seen_once & mask
+                seen_once |= mask
+                if grid[cell]:
+                    placed |= 1 << (grid[cell] - 1)
+            if (seen_once | placed) != complete_mask:
+                return False
+            singles = seen_once & ~seen_twice
+            for value in mask_digits[singles]:
+                bit = 1 << (value - 1)
+                for cell in unit:
+                    if masks[cell] & bit:
+                        if not assign(grid, masks, cell, value, peers):
+                            return False
+                        finds += 1
+                        break
+    return True
+
+
+def _best_cell(grid: list, masks: list, tables: Geometry):
+    """The unknown cell with the fewest candidates, `None` if every cell is known"""
+    popcount = tables.digits.popcount
+    best_cell = None
+    best_count = tables.size + 1
+    for cell in tables.cells:
+        if not grid[cell] and popcount[masks[cell]] < best_count:
+            best_cell = cell
+            best_count = popcount[masks[cell]]
+            if best_count == 2:
+                break
+    return best_cell
+
+
+def backtrack(grid: list, masks: list) -> tuple:
+    """
+    Description
+    -----------
+    A depth first search over a propagated grid. It guesses each
+    candidate of the unknown cell with the fewest candidates,
+    propagates a copy of the grid and backtracks on contradiction.
+
+    Params
+    ------
+    :grid: list
+    The flat list of values.
+
+    :masks: list
+    The flat list of candidate masks.
+
+    Return
+    ------
+    tuple
+    (grid, masks) of the first solution found or `None` if there is none.
+    """
+    tables = geometry_of(grid)
+    best_cell = _best_cell(grid, masks, tables)
+    if best_cell is None:
+        return (grid, masks)
+    for value in tables.digits.mask_digits[masks[best_cell]]:
+        guess_grid = grid[:]
+        guess_masks = masks[:]
+        if assign(guess_grid, guess_masks, best_cell, value, tables.peers) and propagate(guess_grid, guess_masks):
+            solution = backtrack(guess_grid, guess_masks)
+            if solution is not None:
+                return solution
+    return None
+
+
+def solve(values: list, search: bool = True) -> tuple:
+    """
+    Description
+    -----------
+    Solves a puzzle with singles, guessing once they run out.
+
+    Params
+    ------
+    :values: list
+    Either a list of 9 lists of 9 values (`None` for unknown)
+    or an already flattened list of 81 integers.
+
+    :search: bool = True
+    Whether to guess when the singles run out, if not the grid
+    is returned as far as the singles got it.
+
+    Return
+    ------
+    tuple
+    (grid, masks, solved) the flat list of values, the candidate masks left
+    in the unsolved cells and whether every cell was filled in. `masks` is
+    `None` if the puzzle contradicts itself.
+    """
+    grid = as_grid(values)
+    masks = initial_masks(grid)
+    if masks is None or not propagate(grid, masks):
+        return (grid, None, False)
+    if search and not all(grid):
+        solution = backtrack(grid, masks)
+        if solution is None:
+            return (grid, None, False)
+        grid, masks = solution
+    return (grid, masks, all(grid))
+
+
+def count_from(grid: list, masks: list, limit: int = None) -> int:
+    """
+    Description
+    -----------
+    Counts the solutions of an already propagated grid the way `backtrack`
+    searches for one, each guess propagating a copy of the grid it was
+    made from, stopping as soon as `limit` solutions have been found.
+
+    Params
+    ------
+    :grid: list
+    The flat list of values.
+
+    :masks: list
+    The flat list of candidate masks.
+
+    :limit: int = None
+    Stop counting once this many solutions are found.
+
+    Return
+    ------
+    int
+    The number of solutions (at most `limit`).
+    """
+    tables = geometry_of(grid)
+    best_cell = _best_cell(grid, masks, tables)
+    if best_cell is None:
+        return 1
+    found = 0
+    for value in tables.digits.mask_digits[masks[best_cell]]:
+        guess_grid = grid[:]
+        guess_masks = masks[:]
+        if assign(guess_grid, guess_masks, best_cell, value, tables.peers) and propagate(guess_grid, guess_masks):
+            found += count_from(guess_grid, guess_masks, None if limit is None else limit - found)
+            if limit is not None and found >= limit:
+                break
+    return found
+
+
+def count_solutions(values: list, limit: int = None) -> int:
+    """
+    Description
+    -----------
+    Counts the solutions to a puzzle with singles and guessing,
+    stopping as soon as `limit` solutions have been found.
+
+    Params
+    ------
+    :values: list
+    Either a list of 9 lists of 9 values (`None` for unknown)
+    or an already flattened list of 81 integers.
+
+    :limit: int = None
+    Stop counting once this many solutions are found,
+    `limit=2` is enough to tell if a puzzle has one solution.
+
+    Return
+    ------
+    int
+    The number of solutions (at most `limit`).
+    """
+    grid = as_grid(values)
+    masks = initial_masks(grid)
+    if masks is None or not propagate(grid, masks):
+        return 0
+    return count_from(grid, masks, limit)
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+These generate new puzzles with exactly one solution.
+
+A puzzle starts out as a random complete grid, found by a depth first
+search that tries the candidates of each cell in a random order. Clues
+are then taken away in a random order, a whole symmetry orbit at a time
+(a cell and its mirror images), putting an orbit back whenever taking it
+away leaves the puzzle with a second solution. This stops once the puzzle
+is down to the target number of clues or no more clues can be taken away.
+
+`generate_many` spreads the work over a pool of worker processes. Every
+chunk of puzzles gets its own random number generator seeded from the
+seed and the chunk number, so a seed always gives the same puzzles
+whatever the number of workers.
+"""
+import os
+import random
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from sudoku_objects.base import MASK_DIGITS
+from sudoku_objects.base import POPCOUNT
+from sudoku_objects.base import values_to_string
+from sudoku_objects.flat import CELLS
+from sudoku_objects.flat import assign
+from sudoku_objects.flat import count_solutions
+from sudoku_objects.flat import initial_masks
+from sudoku_objects.flat import propagate
+
+SYMMETRIES = ('none', 'rotational', 'mirror', 'diagonal', 'dihedral')
+# The fewest clues a puzzle with one solution can have.
+MIN_CLUES = 17
+CHUNK_SIZE = 8
+PENDING_CHUNKS_PER_WORKER = 2
+
+
+def _images(cell: int, symmetry: str) -> set:
+    """The cells that `cell` is mapped onto by a symmetry, including itself"""
+    row, column = divmod(cell, 9)
+    points = {(row, column)}
+    if symmetry in ('rotational', 'dihedral'):
+        points.add((8 - row, 8 - column))
+    if symmetry in ('mirror', 'dihedral'):
+        points.add((row, 8 - column))
+    if symmetry in ('diagonal', 'dihedral'):
+        points.add((column, row))
+    if symmetry == 'dihedral':
+        # Close the orbit under every combination of the above
+        while True:
+            more = {image for point in points for image in [(8 - point[0], 8 - point[1]), (point[0], 8 - point[1]), (point[1], point[0])]}
+            if more <= points:
+                break
+            points |= more
+    return {row * 9 + column for row, column in points}
+
+
+def orbits(symmetry: str = 'none') -> list:
+    """
+    Description
+    -----------
+    Splits the 81 cells into the groups of cells a symmetry maps onto each other.
+
+    Params
+    ------
+    :symmetry: str = 'none'
+    One of `SYMMETRIES`.
+
+    Return
+    ------
+    list
+    Tuples of cells, each one an orbit, covering every cell once.
+    """
+    if symmetry not in SYMMETRIES:
+        raise ValueError(f"You passed in: `{symmetry}``, but we were expecting one of {SYMMETRIES}.")
+    seen = set()
+    groups = []
+    for cell in CELLS:
+        if cell not in seen:
+            orbit = _images(cell, symmetry)
+            seen |= orbit
+            groups.append(tuple(sorted(orbit)))
+    return groups
+
+
+def _random_solution(grid: list, masks: list, rng: random.Random):
+    """Like `flat.backtrack` but tries the candidates of each cell in a random order"""
+    best_cell = None
+    best_count = 10
+    for cell in CELLS:
+        if not grid[cell] and POPCOUNT[masks[cell]] < best_count:
+            best_cell = cell
+            best_count = POPCOUNT[masks[cell]]
+            if best_count == 2:
+                break
+    if best_cell is None:
+        return grid
+    values = list(MASK_DIGITS[masks[best_cell]])
+    rng.shuffle(values)
+    for value in values:
+        guess_grid = grid[:]
+        guess_masks = masks[:]
+        if assign(guess_grid, guess_masks, best_cell, value) and propagate(guess_grid, guess_masks):
+            solution = _random_solution(guess_grid, guess_masks, rng)
+            if solution is not None:
+                return solution
+    return None
+
+
+def random_grid(rng: random.Random = None) -> list:
+    """
+    Description
+    -----------
+    Generates a random complete grid.
+
+    Params
+    ------
+    :rng: random.Random = None
+    The random number generator to use, defaults to the `random` module's.
+
+    Return
+    ------
+    list
+    A flat list of 81 values.
+    """
+    rng = rng or random.Random()
+    # The first row can be any order of the digits, so start from one
+    # rather than searching for it.
+    grid = list(range(1, 10))
+    rng.shuffle(grid)
+    grid += [0] * 72
+    return _random_solution(grid, initial_masks(grid), rng)
+
+
+def generate(rng: random.Random = None, clues: int = MIN_CLUES, symmetry: str = 'none') -> tuple:
+    """
+    Description
+    -----------
+    Generates a puzzle with exactly one solution.
+
+    Params
+    ------
+    :rng: random.Random = None
+    The random number generator to use, defaults to the `random` module's.
+
+    :clues: int = MIN_CLUES
+    Stop taking clues away once the puzzle is down to this many. The puzzle
+    can be left with more if no more can be taken away without a second
+    solution, which is usual for targets much below 25.
+
+    :symmetry: str = 'none'
+    One of `SYMMETRIES`, the clues left are symmetric under it.
+
+    Return
+    ------
+    tuple
+    (puzzle, solution) as flat lists of 81 values, 0 for unknown.
+    """
+    if not MIN_CLUES <= clues <= 81:
+        raise ValueError(f"You passed in: `{clues}``, but we were expecting a number of clues from {MIN_CLUES}-81.")
+    rng = rng or random.Random()
+    solution = random_grid(rng)
+    puzzle = solution[:]
+    remaining = 81
+    groups = orbits(symmetry)
+    rng.shuffle(groups)
+    for orbit in groups:
+        if remaining - len(orbit) < clues:
+            continue
+        for cell in orbit:
+            puzzle[cell] = 0
+        if count_solutions(puzzle, limit=2) == 1:
+            remaining -= len(orbit)
+            if remaining == clues:
+                break
+        else:
+            for cell in orbit:
+                puzzle[cell] = solution[cell]
+    return (puzzle, solution)
+
+
+def generate_chunk(seed: int, chunk: int, count: int, clues: int = MIN_CLUES, symmetry: str = 'none') -> list:
+    """
+    Description
+    -----------
+    Generates a chunk of puzzles, this is the unit of work handed to each
+    worker process. The chunk's random number generator is seeded from
+    `seed` and `chunk` so the same chunk always gives the same puzzles.
+
+    Params
+    ------
+    :seed: int
+    The seed of the whole run.
+
+    :chunk: int
+    The number of this chunk.
+
+    :count: int
+    How many puzzles to generate.
+
+    :clues: int = MIN_CLUES
+    See `generate`.
+
+    :symmetry: str = 'none'
+    See `generate`.
+
+    Return
+    ------
+    list
+    (puzzle string, solution string) for each puzzle.
+    """
+    rng = random.Random(f"{seed}:{chunk}")
+    puzzles = []
+    for _ in range(count):
+        puzzle, solution = generate(rng, clues, symmetry)
+        puzzles.append((values_to_string(puzzle), values_to_string(solution)))
+    return puzzles
+
+
+def generate_many(count: int, workers: int = None, seed: int = None, clues: int = MIN_CLUES, symmetry: str = 'none',
+                  chunk_size: int = CHUNK_SIZE):
+    """
+    Description
+    -----------
+    Generates many puzzles across a pool of worker processes.
+
+    Params
+    ------
+    :count: int
+    How many puzzles to generate.
+
+    :workers: int = None
+    The number of worker processes, defaults to the number of CPUs.
+    0 generates every puzzle in this process instead.
+
+    :seed: int = None
+    Seeds every chunk's random number generator, defaults to a random seed.
+
+    :clues: int = MIN_CLUES
+    See `generate`.
+
+    :symmetry: str = 'none'
+    See `generate`.
+
+    :chunk_size: int = CHUNK_SIZE
+    How many puzzles each worker generates at a time.
+
+    Return
+    ------
+    generator
+    Yields a dict of the name, puzzle, solution and status ("solved") of
+    each puzzle, as `pipeline.solve_many` does, in order.
+    """
+    if symmetry not in SYMMETRIES:
+        raise ValueError(f"You passed in: `{symmetry}``, but we were expecting one of {SYMMETRIES}.")
+    seed = random.randrange(2 ** 32) if seed is None else seed
+    chunks = [(chunk, min(chunk_size, count - start)) for chunk, start in enumerate(range(0, count, chunk_size))]
+    if workers == 0:
+        for chunk, size in chunks:
+            yield from _results_of(chunk, chunk_size, generate_chunk(seed, chunk, size, clues, symmetry))
+        return
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk, size in chunks:
+            pending.append((chunk, executor.submit(generate_chunk, seed, chunk, size, clues, symmetry)))
+            if len(pending) >= PENDING_CHUNKS_PER_WORKER * workers:
+                chunk, future = pending.popleft()
+                yield from _results_of(chunk, chunk_size, future.result())
+        while pending:
+            chunk, future = pending.popleft()
+            yield from _results_of(chunk, chunk_size, future.result())
+
+
+def _results_of(chunk: int, chunk_size: int, puzzles: list):
+    """Generates the result dict of each puzzle in a chunk, named after its position in the run"""
+    for index, (puzzle, solution) in enumerate(puzzles, start=chunk * chunk_size):
+        yield {"name": str(index), "puzzle": puzzle, "solution": solution, "status": "solved"}
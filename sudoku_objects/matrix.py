@@ -5,7 +5,9 @@ This class simply defines the sudoku matrix as a component of it's constituent p
 # TODO implement clearer controls around rows/columns/boxes and periphery elements
 #       essentially not relying on the order, but on the logic behind how sets
 #       are organized within sudoku
-# TODO use the X-wing/Triple/Double/Quad techniques to ID and reduce possibilities
+#
+# The techniques below are used to ID and reduce possibilities, see `slice_boxes`,
+# `eliminate_subsets` (doubles/triples/quads) and `eliminate_fish` (x-wing and larger)
 #
 # if exists:
 # ++===+===+===++
@@ -56,14 +58,37 @@ This class simply defines the sudoku matrix as a component of it's constituent p
 #
 # Therefore the values 2 and 6 cannot exist in any other cells in
 # those columns (1 & 3), those rows (2 & 7), or those boxes (1 & 3)
+from contextlib import nullcontext
+from itertools import combinations
+from time import perf_counter
+
+from sudoku_objects import dlx
+from sudoku_objects import flat
+from sudoku_objects.base import BITMASK
+from sudoku_objects.base import DIGIT_CHARACTERS
+from sudoku_objects.base import NULL_MASK
+from sudoku_objects.base import SIZES_BY_CELLS
 from sudoku_objects.base import VERBOSE
+from sudoku_objects.base import mask_to_set
+from sudoku_objects.base import string_to_values
+from sudoku_objects.base import values_to_string
 
 from sudoku_objects.cell import Cell
+from sudoku_objects.corpus import decode
 from sudoku_objects.box import Box
 from sudoku_objects.row import Row
 from sudoku_objects.column import Column
 
 from sudoku_objects.exceptions import DuplicationError
+from sudoku_objects.stats import SolveStats
+from sudoku_objects.store import puzzle_status
+from sudoku_objects.trace import TraceRecorder
+from sudoku_objects.trail import Trail
+
+ENGINES = ('objects', 'flat', 'dlx')
+# X-wing, swordfish and jellyfish
+FISH_SIZES = (2, 3, 4)
+TRACE_STEPS_ON_ERROR = 20
 
 
 class Matrix:
@@ -84,34 +109,143 @@ class Matrix:
      [None, None, None, None, None, None, None, None, None],
      [None, None, None, None, None, None, None, None, None]]
     """
-    def __init__(self, values, verbose=VERBOSE):
+    def __init__(self, values, verbose=VERBOSE, bitmask=BITMASK, trace=0):
         """
         Description
         -----------
         Initializes the Matrix object. A list of 9 lists of 9 values representing a sudoku
         Matrix. The only required argument is `values` wich is that list of lists described above.
+
+        Passing `bitmask=True` stores every cell, row, column and box possibility
+        as a 9 bit integer rather than a set, which is considerably faster to solve.
+
+        Passing `trace=N` keeps the last N steps of solving (values set, possibilities
+        eliminated and guesses undone) in `self.trace`, a `TraceRecorder`, instead of
+        printing the whole matrix on every iteration. They are only formatted when
+        asked for with `self.trace.steps()`.
+
+        Larger (or smaller) grids are passed in the same way, 16 lists of 16
+        values for a 16x16 grid of 4x4 boxes and so on, see `base.BOX_SIZES`.
         """
+        size = len(values)
+        if size not in SIZES_BY_CELLS.values() or any(len(row) != size for row in values):
+            raise ValueError(f"You passed in: `{values}``, but we were expecting a list of 9 lists of 9 values "
+                             f"(or 4, 16 or 25 lists of as many values).")
         self.values = values
         self.verbose = verbose
+        self.bitmask = bitmask
+        self.size = size
+        self.geometry = flat.geometry_of(size * size)
+        self.box_size = self.geometry.box_size
         self.cells = []
-        self.numbers = {1, 2, 3, 4, 5, 6, 7, 8, 9}
-        self.columns = [Column(0), Column(1), Column(2), Column(3), Column(4), Column(5), Column(6), Column(7), Column(8)]
-        self.rows = [Row(0), Row(1), Row(2), Row(3), Row(4), Row(5), Row(6), Row(7), Row(8)]
-        self.boxes = [Box(0), Box(1), Box(2), Box(3), Box(4), Box(5), Box(6), Box(7), Box(8)]
-        for row_num, row in enumerate(self.values):
-            for column_num, value in enumerate(row):
-                box_num = ((row_num // 3) * 3 + (column_num // 3))
-                this_cell = Cell(value=value,
-                                 row=self.rows[row_num],
-                                 column=self.columns[column_num],
-                                 box=self.boxes[box_num])
-                self.cells.append(this_cell)
-                self.rows[row_num].add_cell(this_cell)
-                self.columns[column_num].add_cell(this_cell)
-                self.boxes[box_num].add_cell(this_cell)
+        self.numbers = set(range(1, size + 1))
+        self.columns = [Column(number, bitmask=bitmask, size=size) for number in range(size)]
+        self.rows = [Row(number, bitmask=bitmask, size=size) for number in range(size)]
+        self.boxes = [Box(number, bitmask=bitmask, size=size) for number in range(size)]
+        self._add_cells([value for row in values for value in row])
+        self.trace = TraceRecorder(trace, size=size) if trace else None
+        self.trail = None
+        # Units waiting to be scanned for singles and units holding newly set
+        # values waiting for a quality check. Both are dicts used as ordered sets.
+        self.dirty_units = dict.fromkeys(self.rows + self.columns + self.boxes)
+        self.changed_units = dict.fromkeys(self.rows + self.columns + self.boxes)
+        for cell in self.cells:
+            cell.dirty_units = self.dirty_units
+            cell.changed_units = self.changed_units
+            cell.trace = self.trace
         self.finds = 0
         self.solved = False
         self.stuck = False
+        self.stats = None
+
+    def _add_cells(self, grid: list) -> None:
+        """
+        Description
+        -----------
+        Creates every cell and adds it to its row, column and box. The
+        possibilities of the groups are only computed once, after every
+        cell has been added, rather than again for each cell added.
+
+        Params
+        ------
+        :grid: list
+        A flat list of 81 values with `None` or 0 for unknown values.
+
+        Return
+        ------
+        None
+        """
+        box_of = self.geometry.box_of
+        for index, value in enumerate(grid):
+            row_num, column_num = divmod(index, self.size)
+            row, column, box = self.rows[row_num], self.columns[column_num], self.boxes[box_of[index]]
+            this_cell = Cell(value=value or None, row=row, column=column, box=box, bitmask=self.bitmask, update_groups=False,
+                             size=self.size)
+            self.cells.append(this_cell)
+            row.add_cell(this_cell, refresh=False)
+            column.add_cell(this_cell, refresh=False)
+            box.add_cell(this_cell, refresh=False)
+        for group in self.rows + self.columns + self.boxes:
+            group.refresh_possibilities()
+        for box in self.boxes:
+            for group in box.rows + box.columns:
+                group.refresh_possibilities()
+
+    @classmethod
+    def from_string(cls, puzzle: str, **kwargs):
+        """
+        Description
+        -----------
+        Builds a matrix from the compact 81 character form of a puzzle.
+
+        Params
+        ------
+        :puzzle: str
+        The 81 character puzzle string, read left to right, top to bottom
+        with `.` or `0` for unknown values, e.g. `7.......3.64...98.` ...
+
+        :kwargs:
+        Passed on to `Matrix`, e.g. `verbose`, `bitmask` or `trace`.
+
+        Return
+        ------
+        Matrix
+        """
+        return cls(string_to_values(puzzle), **kwargs)
+
+    @classmethod
+    def from_bytes(cls, record, packed: bool = False, **kwargs):
+        """
+        Description
+        -----------
+        Builds a matrix from the binary form of a puzzle, as held in
+        each record of a binary corpus (see `corpus.py`).
+
+        Params
+        ------
+        :record: bytes
+        81 bytes of values 0-9 (0 for unknown), or 41 bytes packed two values
+        to a byte. Anything after the puzzle, such as the rest of a corpus
+        record, is ignored. A memoryview of a mapped corpus works as well.
+
+        :packed: bool = False
+        Whether the values are packed two to a byte.
+
+        :kwargs:
+        Passed on to `Matrix`, e.g. `verbose`, `bitmask` or `trace`.
+
+        Return
+        ------
+        Matrix
+        """
+        if packed:
+            return cls.from_string(decode(record[:41], packed=True), **kwargs)
+        values = [value or None for value in bytes(record[:81])]
+        return cls([values[row * 9:row * 9 + 9] for row in range(9)], **kwargs)
+
+    def to_string(self) -> str:
+        """Returns the compact 81 character form of this matrix, with `.` for unknown values"""
+        return values_to_string([cell.value for cell in self.cells])
 
     def __str__(self) -> str:
         """
@@ -130,17 +264,19 @@ class Matrix:
         ++---+ ...
         """
         my_str = []
-        row_break = "++---+---+---++---+---+---++---+---+---++"
-        box_break = "++===+===+===++===+===+===++===+===+===++"
+        box_size = self.box_size
+        row_break = "++" + "++".join(["+".join(["---"] * box_size)] * box_size) + "++"
+        box_break = "++" + "++".join(["+".join(["==="] * box_size)] * box_size) + "++"
         my_str.append(box_break + '\n')
         for row in self.rows:
             my_str.append('||')
             for cell_number in range(len(row.cells)):
-                my_str.append(f""" {row.cells[cell_number].value if row.cells[cell_number].value is not None else ' '} |""")
-                if cell_number in [2, 5, 8]:
+                value = row.cells[cell_number].value
+                my_str.append(f""" {DIGIT_CHARACTERS[value - 1] if value is not None else ' '} |""")
+                if cell_number % box_size == box_size - 1:
                     my_str.append('|')
             my_str.append('\n')
-            if row.row_number in [2, 5, 8]:
+            if row.row_number % box_size == box_size - 1:
                 my_str.append(box_break + '\n')
             else:
                 my_str.append(row_break + '\n')
@@ -155,9 +291,10 @@ class Matrix:
             # off the last row of characters so that they can be
             # seamlessly stacked. The last row does get the separator
             # appended back to it in the `return`.
-            all__poss__.append(each_row.__poss__()[0:-73])
+            width = 2 * self.box_size + 2
+            all__poss__.append(each_row.__poss__()[0:-(width * self.size + 1)])
 
-        return ''.join(all__poss__ + ['+-------' for i in range(9)] + ['+'] + ['\n', '\n'])
+        return ''.join(all__poss__ + ['+' + '-' * (width - 1) for i in range(self.size)] + ['+'] + ['\n', '\n'])
 
     def get_row(self, row_number: int) -> set:
         """Returns the set of values contained in the specified row number"""
@@ -193,14 +330,16 @@ class Matrix:
         this returns the number you are looking for and how many
         times it appears in the matrix.
         """
-        instances = len([cell.value for cell in self.cells if cell.value == number_to_check])
-        if instances == 9:
+        # A row only loses a possibility once that value is set in
+        # the row, so this counts the rows the number is in.
+        instances = len([row for row in self.rows if not row.has_possibility(number_to_check)])
+        if instances == self.size:
             self.numbers.discard(number_to_check)
             [cell.rm_possibility(number_to_check) for cell in self.cells]
             [row.rm_possibility(number_to_check) for row in self.rows]
             [column.rm_possibility(number_to_check) for column in self.columns]
             [box.rm_possibility(number_to_check) for box in self.boxes]
-            return (number_to_check, 9)
+            return (number_to_check, self.size)
         else:
             return (number_to_check, instances)
 
@@ -221,6 +360,8 @@ class Matrix:
         """
         Description
         -----------
+        Finds the values that, within a box, can only go in one of its rows
+        (or columns). `slice_boxes` finds the same with masks on every box at once.
 
         Params
         ------
@@ -242,14 +383,14 @@ class Matrix:
         possibilities_in_the_rest_of_the_group = set()
         if row_col == 'row':
             possibilities_in_this_group = self.boxes[box_number].get_row_possibilities(group_number)
-            for row_num in range(3):
+            for row_num in range(self.box_size):
                 if row_num != group_number:
-                    possibilities_in_the_rest_of_the_group.union(self.boxes[box_number].get_row_possibilities(row_num))
+                    possibilities_in_the_rest_of_the_group.update(self.boxes[box_number].get_row_possibilities(row_num))
         elif row_col == 'col':
             possibilities_in_this_group = self.boxes[box_number].get_column_possibilities(group_number)
-            for col_num in range(3):
+            for col_num in range(self.box_size):
                 if col_num != group_number:
-                    possibilities_in_the_rest_of_the_group.union(self.boxes[box_number].get_column_possibilities(col_num))
+                    possibilities_in_the_rest_of_the_group.update(self.boxes[box_number].get_column_possibilities(col_num))
         else:
             raise ValueError(f"You passed in: `{row_col}``, but we were expecting either `row` or `col`.")
         return possibilities_in_this_group.difference(possibilities_in_the_rest_of_the_group)
@@ -293,14 +434,188 @@ class Matrix:
                     values_removed += 1 if cell.rm_possibility(each_value) > 0 else 0
         return values_removed
 
+    def slice_boxes(self) -> int:
+        """
+        Description
+        -----------
+        Makes one pass over the 54 places a box meets a row or column
+        (see `flat.INTERSECTIONS`, `Geometry.intersections` in other grid sizes)
+        removing the possibilities ruled out by box/line reduction. The
+        possibilities of the 3 shared cells,
+        the rest of the box and the rest of the line are each or-ed into
+        a mask, then:
+
+        pointing: a value the rest of the box cannot hold must be in the
+        shared cells, so it is removed from the rest of the line.
+
+        claiming: a value the rest of the line cannot hold must be in the
+        shared cells, so it is removed from the rest of the box.
+
+        Params
+        ------
+        None
+
+        Return
+        ------
+        int
+        The number of possibilities removed.
+        """
+        if self.trace is not None:
+            self.trace.technique = 'box_line'
+        start = perf_counter() if self.stats is not None else 0.0
+        units = self.rows + self.columns + self.boxes
+        masks = [cell.get_mask() for cell in self.cells]
+        mask_digits = self.geometry.digits.mask_digits
+        finds = 0
+        for box, line, segment, rest_of_box, rest_of_line in self.geometry.intersections:
+            shared = NULL_MASK
+            for index in segment:
+                shared |= masks[index]
+            if not shared:
+                continue
+            box_mask = NULL_MASK
+            for index in rest_of_box:
+                box_mask |= masks[index]
+            line_mask = NULL_MASK
+            for index in rest_of_line:
+                line_mask |= masks[index]
+            # Only values still missing from the box and line, in case any cell is stale
+            shared &= units[box].get_mask() & units[line].get_mask()
+            for values, others in [(shared & line_mask & ~box_mask, rest_of_line), (shared & box_mask & ~line_mask, rest_of_box)]:
+                if not values:
+                    continue
+                for index in others:
+                    if masks[index] & values:
+                        for value in mask_digits[masks[index] & values]:
+                            finds += 1 if self.cells[index].rm_possibility(value) else 0
+                        masks[index] &= ~values
+        if self.stats is not None:
+            self.stats.count('box_line', finds, perf_counter() - start)
+        return finds
+
+    def eliminate_subsets(self) -> int:
+        """
+        Description
+        -----------
+        Removes the possibilities ruled out by naked and hidden pairs,
+        triples and quads in every row, column and box.
+        See `_CellGroup.eliminate_naked_subsets` and `_CellGroup.eliminate_hidden_subsets`.
+
+        Params
+        ------
+        None
+
+        Return
+        ------
+        int
+        The number of possibilities removed.
+        """
+        removed = 0
+        for technique in ['naked_subset', 'hidden_subset']:
+            if self.trace is not None:
+                self.trace.technique = technique
+            start = perf_counter() if self.stats is not None else 0.0
+            found = 0
+            for unit in self.rows + self.columns + self.boxes:
+                if technique == 'naked_subset':
+                    found += unit.eliminate_naked_subsets()
+                else:
+                    found += unit.eliminate_hidden_subsets()
+            if self.stats is not None:
+                self.stats.count(technique, found, perf_counter() - start)
+            removed += found
+        return removed
+
+    def digit_positions(self) -> tuple:
+        """
+        Description
+        -----------
+        Builds, for each value, bitboards of where it could still go.
+
+        Params
+        ------
+        None
+
+        Return
+        ------
+        tuple
+        (by_row, by_column) two lists indexed by value from 1-9. `by_row[value][row]`
+        is a 9 bit mask of the columns in that row whose cells could hold the value,
+        and `by_column[value][column]` is its transpose, a mask of rows.
+        """
+        mask_digits = self.geometry.digits.mask_digits
+        by_row = [[0] * self.size for value in range(self.size + 1)]
+        by_column = [[0] * self.size for value in range(self.size + 1)]
+        for index, cell in enumerate(self.cells):
+            if not cell.is_solved:
+                row, column = divmod(index, self.size)
+                for value in mask_digits[cell.get_mask()]:
+                    by_row[value][row] |= 1 << column
+                    by_column[value][column] |= 1 << row
+        return (by_row, by_column)
+
+    def eliminate_fish(self) -> int:
+        """
+        Description
+        -----------
+        Looks for x-wings, swordfish and jellyfish (see the x-wing diagram above).
+        When a value can only go in the same N columns across N rows, it must be in
+        those columns in those rows, so it is removed from every other row's cells
+        in those columns. The same goes for N columns sharing the same N rows.
+
+        The rows (or columns) each value could go in are bitboards from
+        `digit_positions`, only rows with at most N positions are combined
+        and the columns they cover are found by or-ing their masks.
+
+        Params
+        ------
+        None
+
+        Return
+        ------
+        int
+        The number of possibilities removed.
+        """
+        if self.trace is not None:
+            self.trace.technique = 'fish'
+        start = perf_counter() if self.stats is not None else 0.0
+        by_row, by_column = self.digit_positions()
+        popcount = self.geometry.digits.popcount
+        mask_digits = self.geometry.digits.mask_digits
+        removed = 0
+        for value in range(1, self.size + 1):
+            for boards, lines, crossing in [(by_row, self.rows, 'column'), (by_column, self.columns, 'row')]:
+                positions = boards[value]
+                for size in FISH_SIZES:
+                    bases = [line for line in range(self.size) if 2 <= popcount[positions[line]] <= size]
+                    for base in combinations(bases, size):
+                        covered = 0
+                        for line in base:
+                            covered |= positions[line]
+                        if popcount[covered] != size:
+                            continue
+                        for line in range(self.size):
+                            if line not in base and positions[line] & covered:
+                                for position in mask_digits[positions[line] & covered]:
+                                    removed += 1 if lines[line].cells[position - 1].rm_possibility(value) else 0
+                                positions[line] &= ~covered
+        if self.stats is not None:
+            self.stats.count('fish', removed, perf_counter() - start)
+        return removed
+
     def update_possibilities(self) -> None:
         """
         Description
         -----------
-        This method updates the possibilities for all of the cells in the matrix.
-        First it scans the individual cells and the neighboring possibilities.
-        Then it looks to see if there are any box slices that would further
-        eliminate the possibilities for a given set of cell.
+        This method looks to see if there are any box slices that would
+        further eliminate the possibilities for a given set of cell. Any
+        cell losing a possibility queues up its row, column and box to
+        be scanned again by `fill_in_answers`.
+
+        Only once the matrix is stuck, with the singles and box slices
+        making no progress, are the costlier naked and hidden subsets
+        looked for, and then the fish if the subsets find nothing. If
+        they remove anything the matrix is no longer stuck.
 
         Params
         ------
@@ -310,30 +625,72 @@ class Matrix:
         ------
         None
         """
-        for cell in self.cells:
-            cell.refresh_possibilities()
         while self.finds != 0:
-            self.finds = 0
-            for box_num in range(9):
-                for row_num in range(3):
-                    other_args = {"box_number": box_num, "group_number": row_num, "row_col": 'row'}
-                    self.finds += self.slice_bad_possibilities(values_to_slice=self.get_box_slice(**other_args), **other_args)
-                for col_num in range(3):
-                    other_args = {"box_number": box_num, "group_number": col_num, "row_col": 'col'}
-                    self.finds += self.slice_bad_possibilities(values_to_slice=self.get_box_slice(**other_args), **other_args)
+            self.finds = self.slice_boxes()
+        if self.stuck:
+            self.finds = self.slice_boxes() or self.eliminate_subsets() or self.eliminate_fish()
+            if self.finds:
+                self.stuck = False
+        if self.trace is not None:
+            self.trace.technique = None
 
     def fill_in_answers(self):
-        self.finds = 0
-        for row in self.rows:
-            self.finds += row.scan_instances()
-        for column in self.columns:
-            self.finds += column.scan_instances()
-        for box in self.boxes:
-            self.finds += box.scan_instances()
+        """
+        Description
+        -----------
+        Works through the queue of dirty rows, columns and boxes until it
+        is empty. Each unit's cells are refreshed against their row, column
+        and box (setting any cell left with one possibility) and then the
+        unit is scanned for values that only one of its cells can hold.
+        Setting a value queues up that cell's units in turn, so only the
+        parts of the matrix that changed are ever looked at again.
+
+        If no values were set the matrix is stuck.
+
+        Params
+        ------
+        None
+
+        Return
+        ------
+        None
+        """
+        unsolved = len([cell for cell in self.cells if not cell.is_solved])
+        while self.dirty_units:
+            unit = next(iter(self.dirty_units))
+            del self.dirty_units[unit]
+            if self.stats is not None:
+                self._fill_in_unit_with_stats(unit)
+                continue
+            if self.trace is not None:
+                self.trace.technique = 'naked_single'
+            for cell in unit.cells:
+                cell.refresh_possibilities()
+            if self.trace is not None:
+                self.trace.technique = 'hidden_single'
+            unit.scan_instances()
+        self.finds = unsolved - len([cell for cell in self.cells if not cell.is_solved])
         if self.finds == 0:
             self.stuck = True
 
-    def quality_check(self) -> None:
+    def _fill_in_unit_with_stats(self, unit) -> None:
+        """The body of `fill_in_answers` for one unit, counting and timing the naked and hidden singles it sets"""
+        unsolved = len([cell for cell in unit.cells if not cell.is_solved])
+        start = perf_counter()
+        if self.trace is not None:
+            self.trace.technique = 'naked_single'
+        for cell in unit.cells:
+            cell.refresh_possibilities()
+        refreshed = perf_counter()
+        if self.trace is not None:
+            self.trace.technique = 'hidden_single'
+        after_naked = len([cell for cell in unit.cells if not cell.is_solved])
+        unit.scan_instances()
+        self.stats.count('naked_single', unsolved - after_naked, refreshed - start)
+        self.stats.count('hidden_single', after_naked - len([cell for cell in unit.cells if not cell.is_solved]),
+                         perf_counter() - refreshed)
+
+    def quality_check(self, quiet: bool = False, units: list = None) -> None:
         """
         Description
         -----------
@@ -343,44 +700,355 @@ class Matrix:
 
         Params
         ------
-        None
+        :quiet: bool = False
+        Skip printing where the duplicate is before raising.
+
+        :units: list = None
+        Only check these rows, columns and boxes. By default
+        every unit that has had a value set since the last
+        check is checked.
 
         Return
         ------
         None
         """
-        for row in self.rows:
+        if units is None:
+            units = list(self.changed_units)
+            self.changed_units.clear()
+        for unit in units:
             solved_values = set()
-            for index, cell in enumerate(row.cells):
+            for index, cell in enumerate(unit.cells):
                 if cell.value:
                     if cell.value in solved_values:
-                        print(f"We have a duplicate in row:{row.row_number}; cell:{index}")
-                        print(row)
-                        raise DuplicationError("STOP! You have duplicates, see above!!!")
-                    else:
-                        solved_values.add(cell.value)
-        for column in self.columns:
-            solved_values = set()
-            for index, cell in enumerate(column.cells):
-                if cell.value:
-                    if cell.value in solved_values:
-                        print(f"We have a duplicate in column:{column.column_number}; cell:{index}")
-                        print(column)
+                        if not quiet:
+                            print(f"We have a duplicate in {type(unit).__name__.lower()}:{unit.number}; cell:{index}")
+                            print(unit)
                         raise DuplicationError("STOP! You have duplicates, see above!!!")
                     else:
                         solved_values.add(cell.value)
+
+    def is_consistent(self) -> bool:
+        """
+        Description
+        -----------
+        Checks that the matrix can still be solved, meaning that every
+        unsolved cell has at least one possibility left and every value
+        missing from a row, column or box still has a cell it could go in.
+
+        Params
+        ------
+        None
+
+        Return
+        ------
+        bool
+        False if the matrix has reached a contradiction.
+        """
+        for cell in self.cells:
+            if not cell.is_solved and not cell.count_possibilities():
+                return False
+        for group in self.rows + self.columns + self.boxes:
+            group.refresh_possibilities()
+            for value in group.possibilities:
+                if not any(cell.has_possibility(value) for cell in group.cells):
+                    return False
+        return True
+
+    def count_solutions(self, limit: int = 2) -> int:
+        """
+        Description
+        -----------
+        Counts the solutions to the current state of the matrix without
+        changing it. The values and possibilities of the cells are copied
+        into the flat engine's arrays, so any eliminations already made on
+        the matrix are kept, then propagated once and searched. Each guess
+        propagates a copy of the arrays it was made from rather than
+        starting over, and the search stops as soon as `limit` solutions
+        have been found.
+
+        Params
+        ------
+        :limit: int = 2
+        Stop counting once this many solutions are found, None to count
+        them all. The default is enough to tell one solution from many.
+
+        Return
+        ------
+        int
+        The number of solutions (at most `limit`), 0 if the
+        values already set contradict each other.
+        """
+        if limit is not None and limit < 1:
+            raise ValueError(f"You passed in: `{limit}``, but we were expecting a limit of at least 1 or None.")
+        grid = [cell.value or 0 for cell in self.cells]
+        masks = flat.initial_masks(grid)
+        if masks is None:
+            return 0
+        for index, cell in enumerate(self.cells):
+            if not grid[index]:
+                masks[index] &= cell.get_mask()
+        if not flat.propagate(grid, masks):
+            return 0
+        return flat.count_from(grid, masks, limit)
+
+    def is_unique(self) -> bool:
+        """Returns whether the current state of the matrix has exactly one solution"""
+        return self.count_solutions(limit=2) == 1
+
+    def all_groups(self) -> list:
+        """Returns every row, column and box in the matrix including the rows and columns within each box"""
+        groups = self.rows + self.columns + self.boxes
         for box in self.boxes:
-            solved_values = set()
-            for index, cell in enumerate(box.cells):
-                if cell.value:
-                    if cell.value in solved_values:
-                        print(f"We have a duplicate in box:{box.box_number}; cell:{index}")
-                        print(box)
-                        raise DuplicationError("STOP! You have duplicates, see above!!!")
-                    else:
-                        solved_values.add(cell.value)
+            groups += box.rows + box.columns
+        return groups
+
+    def checkpoint(self) -> tuple:
+        """
+        Description
+        -----------
+        Marks the current state of the matrix so that it can be put back
+        with `rollback`. The first checkpoint starts recording every change
+        made to the cells and groups in `self.trail`, so rolling back only
+        costs as much as what changed since. Recording carries on until
+        `commit` is called.
+
+        Params
+        ------
+        None
+
+        Return
+        ------
+        tuple
+        The token to hand back to `rollback`. It can be rolled back to any
+        number of times until an earlier checkpoint is rolled back to.
+        """
+        if self.trail is None:
+            self.trail = Trail()
+            for space in self.cells + self.all_groups():
+                space.trail = self.trail
+        return (
+            self.trail.mark(),
+            self.numbers.copy(),
+            self.solved,
+            self.stuck,
+            tuple(self.dirty_units),
+            tuple(self.changed_units),
+        )
+
+    def rollback(self, token: tuple) -> None:
+        """
+        Description
+        -----------
+        Puts the matrix back the way it was when `checkpoint` returned `token`.
+
+        Params
+        ------
+        :token: tuple
+        A token returned by `checkpoint`.
+
+        Return
+        ------
+        None
+        """
+        position, numbers, self.solved, self.stuck, dirty_units, changed_units = token
+        self.trail.undo(position)
+        self.numbers = numbers.copy()
+        self.dirty_units.clear()
+        self.dirty_units.update(dict.fromkeys(dirty_units))
+        self.changed_units.clear()
+        self.changed_units.update(dict.fromkeys(changed_units))
+
+    def commit(self) -> None:
+        """Stops recording changes, after which no earlier checkpoint can be rolled back to"""
+        if self.trail is None:
+            return
+        for space in self.cells + self.all_groups():
+            space.trail = None
+        self.trail = None
+
+    def step(self, quiet: bool = False) -> None:
+        """
+        Description
+        -----------
+        Runs one iteration of the solving loop, updating the possibilities,
+        filling in answers, updating the remaining numbers and checking
+        for duplicates. If filling in answers gets stuck the possibilities
+        are updated again, which tries the costlier eliminations.
+        When collecting stats each phase is timed.
+
+        Params
+        ------
+        :quiet: bool = False
+        Skip printing where any duplicate is before raising.
+
+        Return
+        ------
+        None
+        """
+        if self.trace is not None:
+            self.trace.iteration += 1
+        stats = self.stats
+        if stats is None:
+            self.update_possibilities()
+            self.fill_in_answers()
+            if self.stuck:
+                self.update_possibilities()
+            self.update_remaining_numbers()
+            self.is_solved()
+            self.quality_check(quiet=quiet)
+            return
+        stats.iterations += 1
+        with stats.phase('update_possibilities'):
+            self.update_possibilities()
+        with stats.phase('fill_in_answers'):
+            self.fill_in_answers()
+        if self.stuck:
+            with stats.phase('update_possibilities'):
+                self.update_possibilities()
+        with stats.phase('update_remaining_numbers'):
+            self.update_remaining_numbers()
+            self.is_solved()
+        with stats.phase('quality_check'):
+            self.quality_check(quiet=quiet)
+
+    def propagate(self) -> bool:
+        """
+        Description
+        -----------
+        Quietly runs the same steps as `solve` until the
+        matrix is either solved or stuck.
+
+        Params
+        ------
+        None
+
+        Return
+        ------
+        bool
+        False if the matrix reached a contradiction along the way.
+        """
+        self.stuck = False
+        try:
+            while not self.solved and not self.stuck:
+                self.step(quiet=True)
+        except DuplicationError:
+            return False
+        return self.is_consistent()
+
+    def search(self) -> bool:
+        """
+        Description
+        -----------
+        A depth first search for when logic alone gets stuck. The unsolved
+        cell with the fewest possibilities is set to each of its possibilities
+        in turn and the matrix propagated from there, undoing the guess and
+        trying the next one whenever it leads to a contradiction.
+
+        Params
+        ------
+        None
+
+        Return
+        ------
+        bool
+        True if a solution was found, in which case the matrix is left solved.
+        Otherwise the matrix is left as it was before searching.
+        """
+        if self.solved:
+            return True
+        cell = min((cell for cell in self.cells if not cell.is_solved), key=lambda cell: cell.count_possibilities())
+        token = self.checkpoint()
+        for value in sorted(cell.possibilities):
+            if self.verbose and self.trace is None:
+                print(f"Guessing {value} for row:{cell.row.row_number}; column:{cell.column.column_number}")
+            if self.stats is not None:
+                self.stats.count('guess')
+            if self.trace is not None:
+                self.trace.technique = 'guess'
+            cell.set_value(value)
+            if self.propagate() and self.search():
+                return True
+            self.rollback(token)
+            if self.trace is not None:
+                self.trace.backtrack(cell.index, value)
+            if self.stats is not None:
+                self.stats.backtracks += 1
+        return False
+
+    def write_grid(self, grid: list, masks: list = None) -> None:
+        """
+        Description
+        -----------
+        Copies the results of one of the flat engines back onto the
+        cells of this matrix, setting any newly solved values and
+        narrowing the possibilities of the unsolved cells.
+
+        Params
+        ------
+        :grid: list
+        A flat list of 81 values with 0 for unknown values.
+
+        :masks: list = None
+        A flat list of 81 candidate masks for the unsolved cells.
+
+        Return
+        ------
+        None
+        """
+        for index, cell in enumerate(self.cells):
+            if grid[index] and not cell.is_solved:
+                cell.set_value(grid[index])
+        if masks is not None:
+            for index, cell in enumerate(self.cells):
+                if not cell.is_solved:
+                    cell.possibilities = mask_to_set(masks[index])
+        self.update_remaining_numbers()
+        self.is_solved()
 
-    def solve(self, verbose: bool = True):
+    def solve_flat(self, search: bool = True) -> None:
+        """
+        Description
+        -----------
+        Solves the current state of the matrix with the array backed
+        engine in `flat.py` and writes the answers back onto the cells.
+
+        Params
+        ------
+        :search: bool = True
+        Whether to guess when the logic alone gets stuck.
+
+        Return
+        ------
+        None
+        """
+        grid, masks, solved = flat.solve([cell.value or 0 for cell in self.cells], search=search)
+        if masks is not None:
+            self.write_grid(grid, masks)
+        self.stuck = not self.solved
+
+    def solve_dlx(self) -> None:
+        """
+        Description
+        -----------
+        Solves the current state of the matrix as an exact cover problem
+        with the Dancing Links engine in `dlx.py` and writes the answers
+        back onto the cells.
+
+        Params
+        ------
+        None
+
+        Return
+        ------
+        None
+        """
+        grid, solved = dlx.solve([cell.value or 0 for cell in self.cells])
+        if solved:
+            self.write_grid(grid)
+        self.stuck = not self.solved
+
+    def solve(self, verbose: bool = True, engine: str = 'objects', search: bool = True, stats: bool = False, cache=None,
+              store=None):
         """
         Description
         -----------
@@ -399,28 +1067,103 @@ class Matrix:
         :verbose: bool = True
         Whether or not to print the iteration #
         and the state of the puzzle with each iteration.
+        When the matrix has a trace the steps are recorded there
+        instead and only the final state is printed.
+        Duplicates in the puzzle are only reported when it is set,
+        a quiet solve just leaves the matrix stuck.
+
+        :engine: str = 'objects'
+        Which engine does the solving, one of `ENGINES`.
+        'objects' walks the cell, row, column and box objects of this matrix,
+        'flat' solves on flat arrays and writes the answers back to the cells.
+        'dlx' solves as an exact cover problem and writes the answers back to the cells.
+
+        :search: bool = True
+        When the logic alone gets stuck, guess values for the cells with the
+        fewest possibilities and backtrack from any guess that turns out wrong.
+
+        :stats: bool = False
+        Count and time what each technique and each phase of the solve did.
+
+        :cache: SolutionCache = None
+        A `canonical.SolutionCache` to look the puzzle up in first. If it (or
+        any puzzle that is the same up to symmetry) was solved before, the
+        cached solution is written onto the cells, otherwise a solution found
+        here is added to the cache.
+
+        :store: PuzzleStore = None
+        A `store.PuzzleStore` to look the puzzle up in before the cache. A
+        stored solution is written onto the cells, otherwise the result of
+        this solve is stored, unless it got stuck without searching.
 
         Return
         ------
-        None
+        SolveStats
+        The counts and timings of this solve when `stats` is set, otherwise None.
         """
+        if engine not in ENGINES:
+            raise ValueError(f"You passed in: `{engine}``, but we were expecting one of {ENGINES}.")
         iteration = 0
         self.stuck = False
+        self.stats = SolveStats() if stats else None
+        if self.stats is not None:
+            start = perf_counter()
+            unsolved = len([cell for cell in self.cells if not cell.is_solved])
+            candidates = sum(cell.count_possibilities() for cell in self.cells)
+        grid = [cell.value or 0 for cell in self.cells]
+        solution = None
+        # Set once it is known that searching the object model would find no solution
+        unsolvable = False
+        if store is not None:
+            with self.stats.phase('store') if self.stats is not None else nullcontext():
+                record = store.get(values_to_string(grid))
+                if record is not None and record["status"] == 'solved':
+                    solution = flat.values_to_grid(string_to_values(record["solution"]))
+                    if self.trace is not None:
+                        self.trace.technique = 'store'
+                    self.write_grid(solution)
+                    self.stuck = not self.solved
+                elif record is not None:
+                    # Stored as having no solution, solving it again would not change that
+                    self.stuck = True
+                    unsolvable = True
+            # The time stored is that of the solve alone, not of looking it up
+            began = perf_counter()
+        if cache is not None and solution is None:
+            with self.stats.phase('cache') if self.stats is not None else nullcontext():
+                solution = cache.get(grid)
+                if solution is not None:
+                    if self.trace is not None:
+                        self.trace.technique = 'cache'
+                    self.write_grid(solution)
+                    self.stuck = not self.solved
         try:
+            if engine != 'objects' and not self.solved and not unsolvable:
+                if self.trace is not None:
+                    self.trace.technique = engine
+                with self.stats.phase('engine') if self.stats is not None else nullcontext():
+                    if engine == 'flat':
+                        self.solve_flat(search=search)
+                    else:
+                        self.solve_dlx()
+                # Searching, the engine has tried every candidate, so searching the objects would find nothing more
+                unsolvable = not self.solved
             while not self.solved and not self.stuck:
-                if self.verbose:
+                if self.verbose and self.trace is None:
                     print(f"Iteration: {iteration}")
                     print(f"Pre-Processing State:\n{self.__str__()}")
                     print(f"Pre-Processing Possibilities:\n{self.__poss__()}")
-                self.update_possibilities()
-                self.fill_in_answers()
-                self.update_remaining_numbers()
-                self.is_solved()
-                self.quality_check()
-                if self.verbose:
+                self.step(quiet=not self.verbose)
+                if self.verbose and self.trace is None:
                     print(f"Post-Processing State:\n{self.__str__()}")
                     print(f"Post-Processing Possibilities:\n{self.__poss__()}")
                 iteration += 1
+            if self.stuck and search and not unsolvable and self.is_consistent():
+                if self.verbose and self.trace is None:
+                    print("Stuck, searching")
+                with self.stats.phase('search') if self.stats is not None else nullcontext():
+                    self.stuck = not self.search()
+                self.commit()
             if self.verbose:
                 if self.solved:
                     print(f"Solved:\n{self.__str__()}")
@@ -429,4 +1172,17 @@ class Matrix:
                 else:
                     print(f"???:\n{self.__str__()}")
         except DuplicationError as e:
-            print(e)
+            if self.verbose:
+                print(e)
+                if self.trace is not None:
+                    print('\n'.join(self.trace.steps(last=TRACE_STEPS_ON_ERROR)))
+        if cache is not None and solution is None and self.solved:
+            cache.put(grid, [cell.value for cell in self.cells])
+        if store is not None and record is None and (search or self.solved):
+            store.put(values_to_string(grid), values_to_string([cell.value for cell in self.cells]),
+                      puzzle_status(grid, self.solved), perf_counter() - began)
+        if self.stats is not None:
+            self.stats.cells_filled = unsolved - len([cell for cell in self.cells if not cell.is_solved])
+            self.stats.candidates_removed = candidates - sum(cell.count_possibilities() for cell in self.cells)
+            self.stats.seconds = perf_counter() - start
+        return self.stats
@@ -0,0 +1,619 @@
+#!/usr/bin/env python3
+"""
+These functions read many puzzles from a file and solve them
+across a pool of worker processes.
+
+They are chained generators, reader -> parser -> solver -> writer,
+so puzzles flow through one line at a time and only a bounded
+number of chunks are ever in flight. Memory use stays flat no
+matter how many puzzles are in the input.
+
+Puzzles travel to and from the workers as compact 81 character strings
+(see `base.values_to_string`) rather than as pickled `Matrix` objects,
+and are sent in chunks so that each round trip does a useful amount of work.
+
+Each worker keeps its own `canonical.SolutionCache` of the puzzles it has
+solved, so a puzzle that is the same as an earlier one up to symmetry is
+answered without solving it again. Given a `store.PuzzleStore`, puzzles
+that were stored by an earlier run are never sent to the workers at all.
+"""
+import csv
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import wait
+from itertools import islice
+from time import perf_counter
+
+from sudoku_objects import dlx
+from sudoku_objects import flat
+from sudoku_objects.canonical import SolutionCache
+from sudoku_objects.corpus import Corpus
+from sudoku_objects.corpus import write_corpus
+from sudoku_objects.base import string_to_values
+from sudoku_objects.base import values_to_string
+from sudoku_objects.matrix import Matrix
+from sudoku_objects.store import puzzle_status
+
+FORMATS = ('CSV', 'JSON', 'TXT', 'STDIN', 'BIN')
+CHUNK_SIZE = 64
+PENDING_CHUNKS_PER_WORKER = 4
+WRITE_BUFFER_LINES = 1024
+# The cache of the current process, made by the first chunk solved with a cache.
+_cache = None
+# The binary corpus mapped by the current process, opened by the first range solved from it.
+_corpus = None
+
+
+def json_to_values(puzzle: dict) -> list:
+    """
+    Description
+    -----------
+    Converts a puzzle in the JSON form described in `sudoku_solver.py`,
+    rows "0"-"8" each holding cells "0"-"8", into a list of 9 lists of 9 values.
+
+    Params
+    ------
+    :puzzle: dict
+    The puzzle as parsed from JSON.
+
+    Return
+    ------
+    list
+    A list of 9 lists of 9 values with `None` for unknown values.
+    """
+    return [
+        [int(puzzle[str(row)][str(column)]) if puzzle[str(row)][str(column)] else None for column in range(9)]
+        for row in range(9)
+    ]
+
+
+def values_to_json(values: list) -> dict:
+    """
+    Description
+    -----------
+    The reverse of `json_to_values`, converting a puzzle into the JSON form
+    described in `sudoku_solver.py` with "" for unknown values.
+
+    Params
+    ------
+    :values: list
+    A list of 9 lists of 9 values or a flat list of 81, `None` or 0 for unknown values.
+
+    Return
+    ------
+    dict
+    The puzzle as rows "0"-"8" each holding cells "0"-"8".
+    """
+    if len(values) != 81:
+        values = [value for row in values for value in row]
+    return {
+        str(row): {str(column): str(values[row * 9 + column] or '') for column in range(9)}
+        for row in range(9)
+    }
+
+
+def read_lines(file_name: str = '-'):
+    """
+    Description
+    -----------
+    Generates the lines of a file one at a time.
+
+    Params
+    ------
+    :file_name: str = '-'
+    The file to read, `-` reads STDIN.
+
+    Return
+    ------
+    generator
+    Yields each line of the file.
+    """
+    if file_name == '-':
+        yield from sys.stdin
+    else:
+        with open(file_name, 'r') as puzzle_file:
+            yield from puzzle_file
+
+
+def parse_puzzles(lines, input_format: str):
+    """
+    Description
+    -----------
+    Generates the puzzles held in lines of input.
+
+    Params
+    ------
+    :lines: iterable
+    The lines of input, as generated by `read_lines`.
+
+    :input_format: str
+    One of `FORMATS`. JSON lines each hold one or more `{"name": {puzzle}}`
+    and TXT lines each hold one 81 character puzzle string. STDIN lines may
+    be either, lines starting with `{` are read as JSON.
+
+    Return
+    ------
+    generator
+    Yields (name, puzzle string) for each puzzle. Puzzles from
+    TXT lines are named after their line number.
+    """
+    input_format = input_format.upper()
+    if input_format not in ('JSON', 'TXT', 'STDIN'):
+        raise ValueError(f"You passed in: `{input_format}``, but we were expecting one of ('JSON', 'TXT', 'STDIN').")
+    for line_number, line in enumerate(lines):
+        line = line.strip()
+        if not line:
+            continue
+        if input_format == 'JSON' or (input_format == 'STDIN' and line.startswith('{')):
+            try:
+                puzzles = [(name, values_to_string(json_to_values(puzzle))) for name, puzzle in json.loads(line).items()]
+            except (AttributeError, KeyError, TypeError, ValueError):
+                # Passed on as it is, so that it is answered with an error rather than ending the input
+                puzzles = [(str(line_number), line)]
+            yield from puzzles
+        else:
+            yield (str(line_number), line)
+
+
+def read_puzzles(file_name: str, input_format: str):
+    """
+    Description
+    -----------
+    Generates every puzzle in a file.
+
+    Params
+    ------
+    :file_name: str
+    The file to read, `-` reads STDIN.
+
+    :input_format: str
+    One of `FORMATS`. A CSV file holds a single puzzle as 9 lines of comma
+    separated values, a BIN file is a binary corpus (see `corpus.py`) whose
+    puzzles are named after their record number, otherwise see `parse_puzzles`.
+
+    Return
+    ------
+    generator
+    Yields (name, puzzle string) for each puzzle in the file.
+    """
+    if input_format.upper() == 'CSV':
+        with open(file_name, 'r') as puzzle_file:
+            values = [[int(element) if element else None for element in line] for line in csv.reader(puzzle_file)]
+        yield (os.path.basename(file_name), values_to_string(values))
+    elif input_format.upper() == 'BIN':
+        with Corpus(file_name) as corpus:
+            for index, puzzle in corpus.puzzles():
+                yield (str(index), puzzle)
+    else:
+        yield from parse_puzzles(read_lines(file_name), input_format)
+
+
+def write_puzzles(results, file_name: str, output_format: str) -> int:
+    """
+    Description
+    -----------
+    Writes puzzles in one of the formats `read_puzzles` reads.
+
+    Params
+    ------
+    :results: iterable
+    Dicts holding the "name" and "puzzle" (and for BIN, the "solution" and
+    "status") of each puzzle, as generated by `solve_many` or `generator.generate_many`.
+
+    :file_name: str
+    The file to write, `-` writes STDOUT.
+
+    :output_format: str
+    One of `FORMATS` other than STDIN. A CSV file only holds one puzzle and
+    a BIN file (which has solution and status columns) cannot be STDOUT.
+
+    Return
+    ------
+    int
+    The number of puzzles written.
+    """
+    output_format = output_format.upper()
+    if output_format not in FORMATS or output_format == 'STDIN':
+        raise ValueError(f"You passed in: `{output_format}``, but we were expecting one of ('CSV', 'JSON', 'TXT', 'BIN').")
+    if output_format == 'BIN':
+        if file_name == '-':
+            raise ValueError(f"You passed in: `{file_name}``, but we were expecting a file to write the binary corpus to.")
+        return write_corpus(file_name, results, solutions=True, statuses=True)
+    output = sys.stdout if file_name == '-' else open(file_name, 'w')
+    written = 0
+    try:
+        for result in results:
+            if output_format == 'CSV':
+                if written:
+                    raise ValueError(f"You passed in: `{output_format}``, but we were expecting one puzzle for a CSV file.")
+                values = string_to_values(result["puzzle"])
+                csv.writer(output, lineterminator='\n').writerows([[value or '' for value in row] for row in values])
+            elif output_format == 'JSON':
+                output.write(json.dumps({result["name"]: values_to_json(string_to_values(result["puzzle"]))}) + '\n')
+            else:
+                output.write(result["puzzle"] + '\n')
+            written += 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        else:
+            output.flush()
+    return written
+
+
+def solve_string(puzzle: str, engine: str = 'flat', cache: SolutionCache = None) -> tuple:
+    """
+    Description
+    -----------
+    Solves a single puzzle string.
+
+    Params
+    ------
+    :puzzle: str
+    The 81 character puzzle string.
+
+    :engine: str = 'flat'
+    One of `matrix.ENGINES`. The flat and dlx engines solve the string
+    directly, 'objects' builds and solves a `Matrix`.
+
+    :cache: SolutionCache = None
+    A cache to look the puzzle up in before solving it and
+    to add its solution to after.
+
+    Return
+    ------
+    tuple
+    (solution, solved) the 81 character solution (or as far as it got) and
+    whether it was solved.
+    """
+    values = string_to_values(puzzle)
+    if cache is not None:
+        grid, solved = cache.solve(values, lambda grid: _solve_values(values, engine))
+    else:
+        grid, solved = _solve_values(values, engine)
+    return (values_to_string(grid), solved)
+
+
+def _solve_values(values: list, engine: str) -> tuple:
+    """Solves a list of 9 lists of 9 values with an engine, returning (flat grid, solved)"""
+    if engine == 'flat':
+        grid, masks, solved = flat.solve(values)
+    elif engine == 'dlx':
+        grid, solved = dlx.solve(values)
+    else:
+        matrix = Matrix(values, verbose=False)
+        matrix.solve(engine=engine)
+        grid, solved = [cell.value for cell in matrix.cells], matrix.solved
+    return (grid, solved)
+
+
+def solve_chunk(puzzles: list, engine: str = 'flat', cache_size: int = 0) -> list:
+    """
+    Description
+    -----------
+    Solves a chunk of puzzle strings, this is the unit
+    of work handed to each worker process.
+
+    Params
+    ------
+    :puzzles: list
+    The 81 character puzzle strings.
+
+    :engine: str = 'flat'
+    One of `matrix.ENGINES`.
+
+    :cache_size: int = 0
+    The size of the solution cache kept by this process
+    across chunks, 0 solves every puzzle from scratch.
+
+    Return
+    ------
+    list
+    (solution, solved, seconds) for each puzzle in the chunk.
+    """
+    global _cache
+    if cache_size and (_cache is None or _cache.maxsize != cache_size):
+        _cache = SolutionCache(cache_size)
+    cache = _cache if cache_size else None
+    solutions = []
+    for puzzle in puzzles:
+        start = perf_counter()
+        solution, solved = solve_string(puzzle, engine, cache)
+        solutions.append((solution, solved, perf_counter() - start))
+    return solutions
+
+
+def solve_range(path: str, start: int, stop: int, engine: str = 'flat', cache_size: int = 0) -> tuple:
+    """
+    Description
+    -----------
+    Solves a range of records of a binary corpus, this is the unit of work
+    handed to each worker process by `solve_corpus`. Each worker maps the
+    corpus once and reads its records straight out of the file.
+
+    Params
+    ------
+    :path: str
+    The binary corpus file.
+
+    :start: int
+    The first record to solve.
+
+    :stop: int
+    The record to stop before.
+
+    :engine: str = 'flat'
+    One of `matrix.ENGINES`.
+
+    :cache_size: int = 0
+    See `solve_chunk`.
+
+    Return
+    ------
+    tuple
+    (chunk, solutions) the (name, puzzle string) of each record and
+    (solution, solved, seconds) for each of them as returned by `solve_chunk`.
+    """
+    chunk = [(str(index), puzzle) for index, puzzle in open_corpus(path).puzzles(start, stop)]
+    return (chunk, solve_chunk([puzzle for name, puzzle in chunk], engine, cache_size))
+
+
+def open_corpus(path: str) -> Corpus:
+    """Maps a binary corpus once per process and hands the same `Corpus` back for every range read from it"""
+    global _corpus
+    if _corpus is None or _corpus.path != path:
+        if _corpus is not None:
+            _corpus.close()
+        _corpus = Corpus(path)
+    return _corpus
+
+
+def chunked(puzzles, chunk_size: int):
+    """Generates lists of up to `chunk_size` puzzles at a time from an iterable of puzzles"""
+    puzzles = iter(puzzles)
+    chunk = list(islice(puzzles, chunk_size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(puzzles, chunk_size))
+
+
+def results_of(chunk: list, known: dict, unknown: list, solutions: list, store=None):
+    """
+    Description
+    -----------
+    Generates the result dict of each puzzle in a chunk as yielded by `solve_many`.
+
+    Params
+    ------
+    :chunk: list
+    (name, puzzle string) for each puzzle in the chunk.
+
+    :known: dict
+    The stored result of the puzzles that were looked up in `store`,
+    and the "error" of each puzzle that could not be read.
+
+    :unknown: list
+    The puzzle strings that were solved.
+
+    :solutions: list
+    (solution, solved, seconds) for each of the `unknown` puzzles as returned by `solve_chunk`.
+
+    :store: PuzzleStore = None
+    Where to record the results of the solved puzzles.
+
+    Return
+    ------
+    generator
+    Yields the result dict of each puzzle in the chunk.
+    """
+    for puzzle, (solution, solved, seconds) in zip(unknown, solutions):
+        status = puzzle_status(string_to_values(puzzle), solved)
+        known[puzzle] = {"solution": solution, "status": status}
+        if store is not None:
+            store.put(puzzle, solution, status, seconds)
+    for name, puzzle in chunk:
+        if "error" in known[puzzle]:
+            yield {"name": name, "puzzle": puzzle, "error": known[puzzle]["error"]}
+            continue
+        yield {
+            "name": name,
+            "puzzle": puzzle,
+            "solution": known[puzzle]["solution"],
+            "status": known[puzzle]["status"],
+        }
+
+
+def _lookup(chunk: list, store=None) -> tuple:
+    """Splits a chunk into (the stored results and the errors of malformed puzzles, the puzzle strings left to solve)"""
+    known = {}
+    for name, puzzle in chunk:
+        if puzzle not in known:
+            try:
+                string_to_values(puzzle)
+            except ValueError as error:
+                known[puzzle] = {"error": str(error)}
+    puzzles = [puzzle for name, puzzle in chunk if puzzle not in known]
+    if store is not None:
+        known.update(store.get_many(puzzles))
+    return (known, list(dict.fromkeys(puzzle for puzzle in puzzles if puzzle not in known)))
+
+
+def _finished(pending: deque, ordered: bool) -> list:
+    """Waits for and removes the next finished future(s), in submission order if `ordered`"""
+    if ordered:
+        return [pending.popleft()]
+    done, not_done = wait(pending, return_when=FIRST_COMPLETED)
+    for future in done:
+        pending.remove(future)
+    return done
+
+
+def solve_many(puzzles, workers: int = None, chunk_size: int = CHUNK_SIZE, ordered: bool = True, engine: str = 'flat',
+               cache_size: int = 0, store=None):
+    """
+    Description
+    -----------
+    Solves many puzzles across a pool of worker processes. Puzzles are
+    pulled from `puzzles` only as workers free up, so there are never
+    more than `PENDING_CHUNKS_PER_WORKER` chunks per worker in flight.
+
+    Params
+    ------
+    :puzzles: iterable
+    (name, puzzle string) for each puzzle as generated by `read_puzzles`.
+
+    :workers: int = None
+    The number of worker processes, defaults to the number of CPUs.
+    0 solves every puzzle in this process instead.
+
+    :chunk_size: int = CHUNK_SIZE
+    How many puzzles are sent to a worker at a time.
+
+    :ordered: bool = True
+    Yield the results in the same order as the puzzles, or
+    as each chunk finishes.
+
+    :engine: str = 'flat'
+    One of `matrix.ENGINES`.
+
+    :cache_size: int = 0
+    How many solutions each worker keeps in its `SolutionCache`, 0 turns
+    the cache off. Canonicalizing a puzzle takes about a millisecond, which
+    is quicker than the 'objects' engine but slower than the flat and dlx
+    engines, so the cache only pays for itself with those on inputs that
+    repeat a lot.
+
+    :store: PuzzleStore = None
+    A store to look each chunk of puzzles up in before solving them, and to
+    record the results of the puzzles that were solved in. Only the puzzles
+    it does not hold are sent to the workers. It is flushed once every
+    puzzle has been solved.
+
+    Return
+    ------
+    generator
+    Yields a dict of the name, puzzle, solution and status
+    (one of `store.STATUSES`) of each puzzle. A puzzle that cannot
+    be read gets a dict of its name, puzzle and "error" instead,
+    and the rest are solved as usual.
+    """
+    chunks = chunked(puzzles, chunk_size)
+    if workers == 0:
+        for chunk in chunks:
+            known, unknown = _lookup(chunk, store)
+            yield from results_of(chunk, known, unknown, solve_chunk(unknown, engine, cache_size), store)
+    else:
+        yield from _solve_in_pool(chunks, workers or os.cpu_count() or 1, ordered, engine, cache_size, store)
+    if store is not None:
+        store.flush()
+
+
+def _solve_in_pool(chunks, workers: int, ordered: bool, engine: str, cache_size: int, store=None):
+    """Solves chunks of puzzles across a pool of `workers` processes as described in `solve_many`"""
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        chunk_of = {}
+        for chunk in chunks:
+            known, unknown = _lookup(chunk, store)
+            if unknown:
+                future = executor.submit(solve_chunk, unknown, engine, cache_size)
+            else:
+                # Every puzzle was stored, this only holds the chunk's place in line
+                future = Future()
+                future.set_result([])
+            chunk_of[future] = (chunk, known, unknown)
+            pending.append(future)
+            if len(pending) >= PENDING_CHUNKS_PER_WORKER * workers:
+                for future in _finished(pending, ordered):
+                    yield from results_of(*chunk_of.pop(future), future.result(), store)
+        while pending:
+            for future in _finished(pending, ordered):
+                yield from results_of(*chunk_of.pop(future), future.result(), store)
+
+
+def solve_corpus(path: str, workers: int = None, chunk_size: int = CHUNK_SIZE, ordered: bool = True, engine: str = 'flat',
+                 cache_size: int = 0):
+    """
+    Description
+    -----------
+    Solves every puzzle of a binary corpus across a pool of worker processes.
+    Only record ranges are sent to the workers, which read the puzzles
+    themselves, so the puzzles are never parsed or pickled by this process.
+
+    Params
+    ------
+    :path: str
+    The binary corpus file.
+
+    The rest are the same as `solve_many`.
+
+    Return
+    ------
+    generator
+    Yields the result dict of each puzzle as `solve_many` does.
+    """
+    with Corpus(path) as corpus:
+        count = len(corpus)
+    ranges = [(start, min(start + chunk_size, count)) for start in range(0, count, chunk_size)]
+    if workers == 0:
+        for start, stop in ranges:
+            chunk, solutions = solve_range(path, start, stop, engine, cache_size)
+            yield from results_of(chunk, {}, [puzzle for name, puzzle in chunk], solutions)
+        return
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for start, stop in ranges:
+            pending.append(executor.submit(solve_range, path, start, stop, engine, cache_size))
+            if len(pending) >= PENDING_CHUNKS_PER_WORKER * workers:
+                for future in _finished(pending, ordered):
+                    chunk, solutions = future.result()
+                    yield from results_of(chunk, {}, [puzzle for name, puzzle in chunk], solutions)
+        while pending:
+            for future in _finished(pending, ordered):
+                chunk, solutions = future.result()
+                yield from results_of(chunk, {}, [puzzle for name, puzzle in chunk], solutions)
+
+
+def write_results(results, output=None, buffer_lines: int = WRITE_BUFFER_LINES) -> int:
+    """
+    Description
+    -----------
+    Writes results as newline delimited JSON as they arrive,
+    buffering up to `buffer_lines` lines between writes.
+
+    Params
+    ------
+    :results: iterable
+    The result dicts as generated by `solve_many`.
+
+    :output: file = None
+    Where to write the results, defaults to STDOUT.
+
+    :buffer_lines: int = WRITE_BUFFER_LINES
+    How many lines to hold before writing them out.
+
+    Return
+    ------
+    int
+    The number of results written.
+    """
+    output = output or sys.stdout
+    buffer = []
+    written = 0
+    for result in results:
+        buffer.append(json.dumps(result))
+        if len(buffer) >= buffer_lines:
+            output.write('\n'.join(buffer) + '\n')
+            written += len(buffer)
+            buffer = []
+    if buffer:
+        output.write('\n'.join(buffer) + '\n')
+        written += len(buffer)
+    output.flush()
+    return written
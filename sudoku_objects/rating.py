@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+These grade puzzles by the hardest technique it takes to solve them.
+
+The techniques make up a ladder, cheapest first
+    singles: naked and hidden singles,
+    box_line: box/line reduction (see `Matrix.slice_boxes`),
+    subsets: naked and hidden pairs, triples and quads,
+    fish: x-wings, swordfish and jellyfish,
+    search: guessing and backtracking.
+Singles are filled in until they run out, then each rung is tried in
+turn, going back to the singles as soon as one of them removes anything.
+Only once every rung has run out is the rest of the puzzle searched.
+
+A rating holds the hardest rung used (its `level`), how many times each
+rung was used (a cell filled for the singles, a pass that removed any
+possibilities for the rest and a guess for the search) and a `score`
+weighing those uses by `WEIGHTS`, steep enough that a few uses of a hard
+rung outweigh many uses of the easier ones. Each puzzle is rated on a single bitmask `Matrix` that every
+rung works on in place, so nothing is rebuilt between passes.
+
+`rate_many` and `rate_corpus` spread the rating over a pool of worker
+processes in the same way as `pipeline.solve_many` and `pipeline.solve_corpus`.
+"""
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from sudoku_objects.corpus import Corpus
+from sudoku_objects.exceptions import DuplicationError
+from sudoku_objects.matrix import Matrix
+from sudoku_objects.pipeline import CHUNK_SIZE
+from sudoku_objects.pipeline import PENDING_CHUNKS_PER_WORKER
+from sudoku_objects.pipeline import chunked
+from sudoku_objects.pipeline import open_corpus
+from sudoku_objects.stats import SolveStats
+from sudoku_objects.store import puzzle_status
+
+LEVELS = ('singles', 'box_line', 'subsets', 'fish', 'search')
+WEIGHTS = {'singles': 1, 'box_line': 5, 'subsets': 20, 'fish': 50, 'search': 200}
+
+
+def rate_matrix(matrix: Matrix) -> dict:
+    """
+    Description
+    -----------
+    Solves a matrix up the technique ladder, cheapest first,
+    counting how many times each rung was used along the way.
+
+    Params
+    ------
+    :matrix: Matrix
+    The matrix to rate, it is left solved (or as far as it got).
+
+    Return
+    ------
+    dict
+    The "level" (one of `LEVELS`, None and a "score" of 0 if the puzzle
+    has no solution), the "score", the "counts" of uses of each level and
+    the "status" (one of `store.STATUSES`, see `store.puzzle_status`) of the puzzle.
+    """
+    grid = [cell.value or 0 for cell in matrix.cells]
+    counts = dict.fromkeys(LEVELS, 0)
+    rungs = [('box_line', matrix.slice_boxes), ('subsets', matrix.eliminate_subsets), ('fish', matrix.eliminate_fish)]
+    try:
+        while True:
+            matrix.fill_in_answers()
+            counts['singles'] += matrix.finds
+            matrix.update_remaining_numbers()
+            matrix.is_solved()
+            matrix.quality_check(quiet=True)
+            if matrix.solved:
+                break
+            if matrix.finds:
+                continue
+            for level, eliminate in rungs:
+                if eliminate():
+                    counts[level] += 1
+                    break
+            else:
+                break
+    except DuplicationError:
+        return {"level": None, "score": 0, "counts": counts, "status": puzzle_status(grid, False)}
+    if not matrix.solved:
+        stats, matrix.stats = matrix.stats, SolveStats()
+        matrix.search()
+        matrix.commit()
+        counts['search'] = matrix.stats.techniques['guess']
+        matrix.stats = stats
+        if not matrix.solved:
+            # The search tries every candidate, so there is no solution to rate
+            return {"level": None, "score": 0, "counts": counts, "status": puzzle_status(grid, False)}
+    level = [level for level in LEVELS if counts[level]][-1] if any(counts.values()) else 'singles'
+    return {
+        "level": level,
+        "score": sum(WEIGHTS[level] * found for level, found in counts.items()),
+        "counts": counts,
+        "status": 'solved',
+    }
+
+
+def rate(values) -> dict:
+    """
+    Description
+    -----------
+    Rates the difficulty of a puzzle, see `rate_matrix`.
+
+    Params
+    ------
+    :values: list
+    A list of 9 lists of 9 values (`None` for unknown) or an 81 character puzzle string.
+
+    Return
+    ------
+    dict
+    The rating as returned by `rate_matrix`.
+    """
+    if isinstance(values, str):
+        matrix = Matrix.from_string(values, verbose=False, bitmask=True)
+    else:
+        matrix = Matrix(values, verbose=False, bitmask=True)
+    return rate_matrix(matrix)
+
+
+def rate_chunk(chunk: list) -> tuple:
+    """
+    Description
+    -----------
+    Rates a chunk of puzzles, this is the unit of work handed to each worker process.
+
+    Params
+    ------
+    :chunk: list
+    (name, puzzle string) for each puzzle.
+
+    Return
+    ------
+    tuple
+    (chunk, ratings) the chunk and the rating of each puzzle in it,
+    or an "error" in place of the rating of a malformed puzzle.
+    """
+    ratings = []
+    for name, puzzle in chunk:
+        try:
+            ratings.append(rate(puzzle))
+        except ValueError as error:
+            ratings.append({"error": str(error)})
+    return (chunk, ratings)
+
+
+def rate_range(path: str, start: int, stop: int) -> tuple:
+    """
+    Description
+    -----------
+    Rates a range of records of a binary corpus, this is the unit of work
+    handed to each worker process by `rate_corpus`.
+
+    Params
+    ------
+    :path: str
+    The binary corpus file.
+
+    :start: int
+    The first record to rate.
+
+    :stop: int
+    The record to stop before.
+
+    Return
+    ------
+    tuple
+    (chunk, ratings) as returned by `rate_chunk`, each puzzle named after its record number.
+    """
+    return rate_chunk([(str(index), puzzle) for index, puzzle in open_corpus(path).puzzles(start, stop)])
+
+
+def rate_many(puzzles, workers: int = None, chunk_size: int = CHUNK_SIZE):
+    """
+    Description
+    -----------
+    Rates many puzzles across a pool of worker processes.
+
+    Params
+    ------
+    :puzzles: iterable
+    (name, puzzle string) for each puzzle as generated by `pipeline.read_puzzles`.
+
+    :workers: int = None
+    The number of worker processes, defaults to the number of CPUs.
+    0 rates every puzzle in this process instead.
+
+    :chunk_size: int = CHUNK_SIZE
+    How many puzzles are sent to a worker at a time.
+
+    Return
+    ------
+    generator
+    Yields a dict of the name and puzzle of each puzzle along
+    with its rating as returned by `rate_matrix` (or an "error"
+    if the puzzle could not be read), in order.
+    """
+    yield from _rate_tasks(((rate_chunk, chunk) for chunk in chunked(puzzles, chunk_size)), workers)
+
+
+def rate_corpus(path: str, workers: int = None, chunk_size: int = CHUNK_SIZE):
+    """
+    Description
+    -----------
+    Rates every puzzle of a binary corpus across a pool of worker processes.
+    Only record ranges are sent to the workers, which read the puzzles themselves.
+
+    Params
+    ------
+    :path: str
+    The binary corpus file.
+
+    The rest are the same as `rate_many`.
+
+    Return
+    ------
+    generator
+    Yields the rating dict of each puzzle as `rate_many` does.
+    """
+    with Corpus(path) as corpus:
+        count = len(corpus)
+    tasks = [(rate_range, path, start, min(start + chunk_size, count)) for start in range(0, count, chunk_size)]
+    yield from _rate_tasks(tasks, workers)
+
+
+def _rate_tasks(tasks, workers: int = None):
+    """Runs (function, *args) tasks that each return (chunk, ratings), in this process if `workers` is 0, taking each task only once there is room for it"""
+    if workers == 0:
+        for function, *args in tasks:
+            yield from _results_of(*function(*args))
+        return
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for function, *args in tasks:
+            pending.append(executor.submit(function, *args))
+            if len(pending) >= PENDING_CHUNKS_PER_WORKER * workers:
+                yield from _results_of(*pending.popleft().result())
+        while pending:
+            yield from _results_of(*pending.popleft().result())
+
+
+def _results_of(chunk: list, ratings: list):
+    """Generates the result dict of each puzzle in a chunk"""
+    for (name, puzzle), rating in zip(chunk, ratings):
+        yield {"name": name, "puzzle": puzzle, **rating}
@@ -5,6 +5,9 @@ row contained either within a full matrix or a smaller
 3-cell row contained within a box.
 """
 from sudoku_objects.base import _CellGroup
+from sudoku_objects.base import BITMASK
+from sudoku_objects.base import DIGIT_CHARACTERS
+from sudoku_objects.base import SIZE
 
 
 class Row(_CellGroup):
@@ -13,10 +16,11 @@ class Row(_CellGroup):
     -----------
     This object represents a row of 9 cells
     contained in a matrix of 9 rows. This is
-    a 1 dimensional object with a width of 9.
+    a 1 dimensional object with a width of 9
+    (or `size` in larger grids).
     """
-    def __init__(self, row_number):
-        _CellGroup.__init__(self, number=row_number)
+    def __init__(self, row_number, bitmask: bool = BITMASK, size: int = SIZE):
+        _CellGroup.__init__(self, number=row_number, bitmask=bitmask, size=size)
         self.row_number = row_number
 
     def __str__(self):
@@ -24,26 +28,19 @@ class Row(_CellGroup):
         line_break = ''.join(["+---" for i in range(len(self.cells))] + ["+"])
         my_str.append(line_break + '\n|')
         for cell in self.cells:
-            my_str.append(f""" {cell.value if cell.value is not None else ' '} |""")
+            my_str.append(f""" {DIGIT_CHARACTERS[cell.value - 1] if cell.value is not None else ' '} |""")
         my_str.append('\n' + line_break)
         return ''.join(my_str)
 
     def __poss__(self):
         my_str = []
-        line_break = ''.join(["+-------" for i in range(len(self.cells))] + ["+"])
+        box_size = self.digits.box_size
+        line_break = ''.join(['+' + '-' * (2 * box_size + 1) for i in range(len(self.cells))] + ["+"])
         my_str.append(line_break + '\n|')
-        for iteration in range(3):
+        for iteration in range(box_size):
             for cell in self.cells:
-                if cell.is_solved:
-                    if iteration != 1:
-                        my_str.append('       |')
-                    else:
-                        my_str.append(f'   {cell.value}   |')
-                else:
-                    for possibility in range((iteration * 3) + 1, ((iteration + 1) * 3) + 1):
-                        my_str.append(f' {possibility if possibility in cell.possibilities else " "}')
-                    my_str.append(' |')
-            if iteration != 2:
+                my_str.append(cell.poss_line(iteration) + '|')
+            if iteration != box_size - 1:
                 my_str.append('\n|')
             else:
                 my_str.append('\n')
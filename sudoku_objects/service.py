@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+This class serves the solver over HTTP on asyncio, using nothing
+but the standard library so it runs anywhere the solver does.
+
+    POST /solve   the body is an 81 character puzzle string, or JSON holding
+                  one under "puzzle" either as a string or in the JSON form
+                  described in `sudoku_solver.py`. Responds with JSON holding
+                  the puzzle, solution, status (one of `store.STATUSES`) and
+                  the `SolveStats` of the solve.
+    GET /health   responds with JSON counts of what the service has done.
+
+Requests are not solved as they arrive. Each one is put on a queue and
+waits on a future, while a single batching task gathers what is queued
+into batches of up to `batch_size` puzzles, waiting at most `batch_window`
+seconds after the first for more to arrive, and hands each batch to a
+process pool. That way concurrent requests share a round trip to the
+workers rather than each paying for its own.
+
+At most `max_batches` batches are in the pool at a time. Once they are all
+busy requests queue up, and once `max_queue` are queued (or `max_connections`
+connections are open) further requests are turned away with a 503 straight
+away rather than being left to wait.
+
+Connections are kept alive between requests unless the client asks otherwise.
+"""
+import asyncio
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from sudoku_objects import flat
+from sudoku_objects.base import string_to_values
+from sudoku_objects.base import values_to_string
+from sudoku_objects.corpus import decode
+from sudoku_objects.corpus import encode
+from sudoku_objects.matrix import ENGINES
+from sudoku_objects.matrix import Matrix
+from sudoku_objects.pipeline import json_to_values
+from sudoku_objects.store import puzzle_status
+
+HOST = '127.0.0.1'
+PORT = 8081
+BATCH_SIZE = 32
+# Seconds to wait after the first request of a batch for more to arrive
+BATCH_WINDOW = 0.002
+MAX_QUEUE = 1024
+MAX_CONNECTIONS = 512
+BATCHES_PER_WORKER = 2
+# The largest request body read, an 81 character puzzle in JSON is well under 4 KB
+MAX_BODY = 64 * 1024
+
+
+def parse_puzzle(body: bytes) -> str:
+    """
+    Description
+    -----------
+    Reads the puzzle out of the body of a request to solve one.
+
+    Params
+    ------
+    :body: bytes
+    Either an 81 character puzzle string or JSON holding one under
+    "puzzle", as a string or in the JSON form of `pipeline.json_to_values`.
+
+    Return
+    ------
+    str
+    The 81 character puzzle string with `.` for unknown values.
+    """
+    text = body.decode('utf-8', errors='replace').strip()
+    if text.startswith('{'):
+        try:
+            puzzle = json.loads(text)["puzzle"]
+            if isinstance(puzzle, dict):
+                puzzle = values_to_string(json_to_values(puzzle))
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"You passed in: `{text[:200]}``, but we were expecting JSON holding a \"puzzle\".")
+        text = puzzle if isinstance(puzzle, str) else ''
+    return decode(encode(text))
+
+
+def solve_batch(puzzles: list, engine: str = 'flat') -> list:
+    """
+    Description
+    -----------
+    Solves a batch of puzzle strings collecting the stats of each,
+    this is the unit of work handed to each worker process.
+
+    Params
+    ------
+    :puzzles: list
+    The 81 character puzzle strings.
+
+    :engine: str = 'flat'
+    One of `matrix.ENGINES`.
+
+    Return
+    ------
+    list
+    A dict of the puzzle, solution, status and stats (see `SolveStats.to_dict`,
+    None if the clues contradict each other) of each puzzle.
+    """
+    results = []
+    for puzzle in puzzles:
+        values = string_to_values(puzzle)
+        if flat.initial_masks(flat.values_to_grid(values)) is None:
+            results.append({"puzzle": puzzle, "solution": puzzle, "status": 'invalid', "stats": None})
+            continue
+        matrix = Matrix(values, verbose=False, bitmask=True)
+        stats = matrix.solve(verbose=False, engine=engine, stats=True)
+        results.append({
+            "puzzle": puzzle,
+            "solution": matrix.to_string(),
+            "status": puzzle_status(values, matrix.solved),
+            "stats": stats.to_dict(),
+        })
+    return results
+
+
+class SolverService:
+    """
+    Description
+    -----------
+    The HTTP service described above. Start it with `await service.start()`
+    (or use it as an async context manager) and stop it with `await service.close()`.
+
+    Params
+    ------
+    :host: str = HOST
+    The address to listen on.
+
+    :port: int = PORT
+    The port to listen on, 0 picks a free one which is then held in `port`.
+
+    :workers: int = None
+    The number of worker processes, defaults to the number of CPUs.
+    0 solves every batch in a thread of this process instead.
+
+    :engine: str = 'flat'
+    One of `matrix.ENGINES`.
+
+    :batch_size: int = BATCH_SIZE
+    The most puzzles handed to a worker at a time.
+
+    :batch_window: float = BATCH_WINDOW
+    The most seconds to wait after the first request of a batch for more to arrive.
+
+    :max_queue: int = MAX_QUEUE
+    The most requests left waiting for a batch before turning new ones away.
+
+    :max_batches: int = None
+    The most batches being solved at a time, defaults to `BATCHES_PER_WORKER` per worker.
+
+    :max_connections: int = MAX_CONNECTIONS
+    The most connections open at a time before turning new ones away.
+    """
+    def __init__(self, host: str = HOST, port: int = PORT, workers: int = None, engine: str = 'flat',
+                 batch_size: int = BATCH_SIZE, batch_window: float = BATCH_WINDOW, max_queue: int = MAX_QUEUE,
+                 max_batches: int = None, max_connections: int = MAX_CONNECTIONS):
+        if engine not in ENGINES:
+            raise ValueError(f"You passed in: `{engine}``, but we were expecting one of {ENGINES}.")
+        for name, value in [('batch_size', batch_size), ('max_queue', max_queue), ('max_connections', max_connections)]:
+            if value < 1:
+                raise ValueError(f"You passed in: `{value}``, but we were expecting a {name} of at least 1.")
+        self.host = host
+        self.port = port
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.engine = engine
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.max_queue = max_queue
+        self.max_batches = max_batches or BATCHES_PER_WORKER * max(self.workers, 1)
+        self.max_connections = max_connections
+        self.connections = 0
+        self.counts = {"requests": 0, "solved": 0, "batches": 0, "rejected": 0, "errors": 0}
+        self.server = None
+        self.executor = None
+        self.queue = None
+        self.slots = None
+        self.batcher = None
+        self.running = set()
+        self.handlers = {}
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def start(self):
+        """Starts the worker pool, the batching task and listening for connections"""
+        loop = asyncio.get_running_loop()
+        if self.workers:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            # Start the workers before listening, a worker forked later would
+            # hold on to the sockets of every open connection and keep them open.
+            await loop.run_in_executor(self.executor, solve_batch, [])
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=1)
+        self.queue = asyncio.Queue(maxsize=self.max_queue)
+        self.slots = asyncio.Semaphore(self.max_batches)
+        self.batcher = loop.create_task(self._batch())
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self) -> None:
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self) -> None:
+        """Stops listening, fails any request still queued, closes every connection and shuts the worker pool down"""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.batcher is not None:
+            self.batcher.cancel()
+            await asyncio.gather(self.batcher, return_exceptions=True)
+        await asyncio.gather(*self.running, return_exceptions=True)
+        while self.queue is not None and not self.queue.empty():
+            puzzle, future = self.queue.get_nowait()
+            if not future.done():
+                future.set_exception(ConnectionAbortedError("The service is shutting down."))
+        for writer in self.handlers.values():
+            writer.close()
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    async def solve(self, puzzle: str) -> dict:
+        """
+        Description
+        -----------
+        Queues a puzzle to be solved in the next batch and waits for it.
+
+        Params
+        ------
+        :puzzle: str
+        The 81 character puzzle string.
+
+        Return
+        ------
+        dict
+        The result of the puzzle as returned by `solve_batch`.
+        Raises `asyncio.QueueFull` if `max_queue` puzzles are already waiting.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((puzzle, future))
+        return await future
+
+    async def _batch(self) -> None:
+        """Gathers queued puzzles into batches and hands each one to the pool, forever"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.batch_size:
+                if self.queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(self.queue.get_nowait())
+            # Wait for a free slot here so that once the pool is busy requests back up in the queue
+            await self.slots.acquire()
+            task = loop.create_task(self._solve_batch(batch))
+            self.running.add(task)
+            task.add_done_callback(self.running.discard)
+
+    async def _solve_batch(self, batch: list) -> None:
+        """Solves one batch in the pool and hands each result to the request waiting on it"""
+        try:
+            self.counts["batches"] += 1
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.executor, solve_batch, [puzzle for puzzle, future in batch], self.engine)
+            for (puzzle, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+            self.counts["solved"] += len(batch)
+        except Exception as error:
+            for puzzle, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+        finally:
+            self.slots.release()
+
+    def health(self) -> dict:
+        """Returns the counts of what the service has done along with how busy it is now"""
+        return dict(
+            self.counts,
+            status='ok',
+            queued=self.queue.qsize(),
+            batches_running=len(self.running),
+            connections=self.connections,
+        )
+
+    async def _respond(self, method: str, path: str, body: bytes) -> tuple:
+        """Routes one request, returning (HTTP status, JSON payload)"""
+        path = path.split('?', 1)[0]
+        if path == '/health':
+            if method != 'GET':
+                return (HTTPStatus.METHOD_NOT_ALLOWED, {"error": "Use GET /health."})
+            return (HTTPStatus.OK, self.health())
+        if path != '/solve':
+            return (HTTPStatus.NOT_FOUND, {"error": f"There is nothing at {path}, try POST /solve."})
+        if method != 'POST':
+            return (HTTPStatus.METHOD_NOT_ALLOWED, {"error": "Use POST /solve."})
+        self.counts["requests"] += 1
+        try:
+            puzzle = parse_puzzle(body)
+        except ValueError as error:
+            return (HTTPStatus.BAD_REQUEST, {"error": str(error)})
+        try:
+            return (HTTPStatus.OK, await self.solve(puzzle))
+        except asyncio.QueueFull:
+            self.counts["rejected"] += 1
+            return (HTTPStatus.SERVICE_UNAVAILABLE, {"error": f"{self.max_queue} puzzles are already waiting, try again later."})
+        except Exception as error:
+            self.counts["errors"] += 1
+            return (HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(error).__name__}: {error}"})
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Reads requests off one connection and writes back each response, until the client is done"""
+        self.connections += 1
+        self.handlers[asyncio.current_task()] = writer
+        try:
+            if self.connections > self.max_connections:
+                self.counts["rejected"] += 1
+                await _write(writer, HTTPStatus.SERVICE_UNAVAILABLE, {"error": "Too many connections, try again later."}, False)
+                return
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    return
+                try:
+                    method, path, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await _write(writer, HTTPStatus.BAD_REQUEST, {"error": "Malformed request line."}, False)
+                    return
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0) or 0)
+                if length > MAX_BODY:
+                    await _write(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": f"Bodies are limited to {MAX_BODY} bytes."}, False)
+                    return
+                body = await reader.readexactly(length) if length else b''
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                status, payload = await self._respond(method.upper(), path, body)
+                await _write(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self.connections -= 1
+            del self.handlers[asyncio.current_task()]
+            writer.close()
+
+
+async def _write(writer: asyncio.StreamWriter, status: HTTPStatus, payload: dict, keep_alive: bool) -> None:
+    """Writes one JSON response"""
+    body = json.dumps(payload).encode('utf-8')
+    head = (
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    writer.write(head.encode('latin-1') + body)
+    await writer.drain()
+
+
+def serve(host: str = HOST, port: int = PORT, **kwargs) -> None:
+    """Runs a `SolverService` until interrupted, the keyword arguments are passed on to it"""
+    async def run():
+        async with SolverService(host, port, **kwargs) as service:
+            print(f"Solving on http://{service.host}:{service.port}/solve with {service.workers} workers")
+            await service.serve_forever()
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
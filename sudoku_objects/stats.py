@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+This class collects what happened while a matrix was being solved,
+how many values or eliminations each technique found, how long each
+technique and each phase of the solving loop took, how many iterations
+it took to get stuck or solved, how many cells were filled in and how
+many possibilities were removed.
+
+A matrix only collects these when solved with `Matrix.solve(stats=True)`,
+otherwise the solving loop skips every call in here.
+"""
+from contextlib import contextmanager
+from time import perf_counter
+
+TECHNIQUES = ('naked_single', 'hidden_single', 'box_line', 'naked_subset', 'hidden_subset', 'fish', 'guess')
+PHASES = ('update_possibilities', 'fill_in_answers', 'update_remaining_numbers', 'quality_check', 'search', 'engine', 'cache', 'store')
+
+
+class SolveStats:
+    """
+    Description
+    -----------
+    The counts and timings of a single call to `Matrix.solve`.
+
+    `techniques` maps each technique to the number of values it set
+    (naked and hidden singles, guesses) or possibilities it removed
+    (box/line reduction, naked and hidden subsets, fish). `technique_seconds`
+    and `phase_seconds` hold the cumulative `perf_counter` time spent
+    in each technique and in each phase of the solving loop.
+    """
+    def __init__(self):
+        self.iterations = 0
+        self.cells_filled = 0
+        self.candidates_removed = 0
+        self.backtracks = 0
+        self.seconds = 0.0
+        self.techniques = dict.fromkeys(TECHNIQUES, 0)
+        self.technique_seconds = dict.fromkeys(TECHNIQUES, 0.0)
+        self.phase_seconds = dict.fromkeys(PHASES, 0.0)
+
+    def count(self, technique: str, found: int = 1, seconds: float = 0.0) -> None:
+        """
+        Description
+        -----------
+        Records what a technique found and how long it took.
+
+        Params
+        ------
+        :technique: str
+        The name of the technique, usually one of `TECHNIQUES`.
+
+        :found: int = 1
+        The number of values set or possibilities removed.
+
+        :seconds: float = 0.0
+        The time the technique took.
+
+        Return
+        ------
+        None
+        """
+        self.techniques[technique] = self.techniques.get(technique, 0) + found
+        self.technique_seconds[technique] = self.technique_seconds.get(technique, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name: str):
+        """Adds the time spent inside the `with` block to the phase `name`"""
+        start = perf_counter()
+        try:
+            yield self
+        finally:
+            self.phase_seconds[name] = self.phase_seconds.get(name, 0.0) + perf_counter() - start
+
+    def to_dict(self) -> dict:
+        """Returns every count and timing as a dict that can be dumped as JSON"""
+        return {
+            "iterations": self.iterations,
+            "cells_filled": self.cells_filled,
+            "candidates_removed": self.candidates_removed,
+            "backtracks": self.backtracks,
+            "seconds": self.seconds,
+            "techniques": dict(self.techniques),
+            "technique_seconds": dict(self.technique_seconds),
+            "phase_seconds": dict(self.phase_seconds),
+        }
+
+    def __str__(self) -> str:
+        lines = [
+            f"Iterations: {self.iterations}; cells filled: {self.cells_filled}; "
+            f"candidates removed: {self.candidates_removed}; backtracks: {self.backtracks}; "
+            f"seconds: {self.seconds:.6f}"
+        ]
+        for technique, found in self.techniques.items():
+            lines.append(f"  {technique:<24}{found:>6}{self.technique_seconds.get(technique, 0.0) * 1000:>12.3f} ms")
+        for phase, seconds in self.phase_seconds.items():
+            if seconds:
+                lines.append(f"  {phase:<24}{'':>6}{seconds * 1000:>12.3f} ms")
+        return '\n'.join(lines)
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+This class keeps the results of solving puzzles in a SQLite database so
+that a puzzle only ever has to be solved once, however many runs see it.
+
+Each puzzle is keyed by its 81 character string (see `base.values_to_string`)
+and stored with its solution (or as far as the solver got), its status,
+the number of clues it was given and the seconds it took to solve.
+The status is one of
+    solved: every cell was filled in,
+    stuck: no solution was found, though the clues do not contradict
+           each other (with the search on, there is none),
+    invalid: the clues contradict each other, a value is repeated
+             within a unit or an unknown cell has no candidates left.
+
+Writes are held in memory and inserted `batch_size` at a time, each
+batch in a single transaction, so call `flush` (or `close`, or use
+the store as a context manager) once done writing.
+"""
+import sqlite3
+
+from sudoku_objects.flat import initial_masks
+from sudoku_objects.flat import as_grid
+
+STATUSES = ('solved', 'stuck', 'invalid')
+BATCH_SIZE = 1000
+# SQLite allows at most 999 parameters in a statement on older builds.
+LOOKUP_SIZE = 500
+
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS puzzles (
+        puzzle TEXT PRIMARY KEY,
+        solution TEXT NOT NULL,
+        status TEXT NOT NULL,
+        clues INTEGER NOT NULL,
+        seconds REAL NOT NULL
+    ) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS puzzles_by_clues ON puzzles (clues)",
+    "CREATE INDEX IF NOT EXISTS puzzles_by_status ON puzzles (status)",
+)
+COLUMNS = ('puzzle', 'solution', 'status', 'clues', 'seconds')
+
+
+def puzzle_status(values: list, solved: bool) -> str:
+    """
+    Description
+    -----------
+    Works out the status of a puzzle once a solver is done with it.
+
+    Params
+    ------
+    :values: list
+    The puzzle, either a list of 9 lists of 9 values or a flat list of 81 integers.
+
+    :solved: bool
+    Whether the solver filled in every cell.
+
+    Return
+    ------
+    str
+    One of `STATUSES`.
+    """
+    if solved:
+        return 'solved'
+    grid = as_grid(values)
+    return 'invalid' if initial_masks(grid) is None else 'stuck'
+
+
+class PuzzleStore:
+    """
+    Description
+    -----------
+    A SQLite table of solved puzzles indexed by clue count and status.
+
+    Params
+    ------
+    :path: str = ':memory:'
+    The database file, created if it does not exist.
+
+    :batch_size: int = BATCH_SIZE
+    How many writes to hold before inserting them in one transaction.
+    """
+    def __init__(self, path: str = ':memory:', batch_size: int = BATCH_SIZE):
+        if batch_size < 1:
+            raise ValueError(f"You passed in: `{batch_size}``, but we were expecting a batch_size of at least 1.")
+        self.path = path
+        self.batch_size = batch_size
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode = WAL" if path != ':memory:' else "PRAGMA journal_mode = MEMORY")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        with self.connection:
+            for statement in SCHEMA:
+                self.connection.execute(statement)
+        self.pending = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self) -> int:
+        self.flush()
+        return self.connection.execute("SELECT COUNT(*) FROM puzzles").fetchone()[0]
+
+    def put(self, puzzle: str, solution: str, status: str, seconds: float = 0.0) -> None:
+        """
+        Description
+        -----------
+        Records the result of solving a puzzle, replacing any earlier result.
+
+        Params
+        ------
+        :puzzle: str
+        The 81 character puzzle string.
+
+        :solution: str
+        The 81 character solution, or as far as the solver got.
+
+        :status: str
+        One of `STATUSES`.
+
+        :seconds: float = 0.0
+        How long the puzzle took to solve.
+
+        Return
+        ------
+        None
+        """
+        if status not in STATUSES:
+            raise ValueError(f"You passed in: `{status}``, but we were expecting one of {STATUSES}.")
+        clues = sum(character not in '.0' for character in puzzle)
+        self.pending[puzzle] = (puzzle, solution, status, clues, seconds)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Inserts every pending write in a single transaction"""
+        if not self.pending:
+            return
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO puzzles VALUES (?, ?, ?, ?, ?)", self.pending.values())
+        self.pending = {}
+
+    def close(self) -> None:
+        self.flush()
+        self.connection.close()
+
+    def get(self, puzzle: str):
+        """
+        Description
+        -----------
+        Looks up the result of solving a puzzle.
+
+        Params
+        ------
+        :puzzle: str
+        The 81 character puzzle string.
+
+        Return
+        ------
+        dict
+        The puzzle, solution, status, clues and seconds of the
+        puzzle, or None if it has not been stored.
+        """
+        return self.get_many([puzzle]).get(puzzle)
+
+    def get_many(self, puzzles: list) -> dict:
+        """
+        Description
+        -----------
+        Looks up the results of solving many puzzles at once.
+
+        Params
+        ------
+        :puzzles: list
+        The 81 character puzzle strings.
+
+        Return
+        ------
+        dict
+        The result dict (as returned by `get`) of each stored puzzle keyed by
+        its puzzle string. Puzzles that have not been stored are left out.
+        """
+        found = {puzzle: dict(zip(COLUMNS, self.pending[puzzle])) for puzzle in puzzles if puzzle in self.pending}
+        missing = list(dict.fromkeys(puzzle for puzzle in puzzles if puzzle not in found))
+        for start in range(0, len(missing), LOOKUP_SIZE):
+            lookup = missing[start:start + LOOKUP_SIZE]
+            rows = self.connection.execute(
+                f"SELECT * FROM puzzles WHERE puzzle IN ({', '.join('?' * len(lookup))})", lookup)
+            for row in rows:
+                found[row[0]] = dict(zip(COLUMNS, row))
+        return found
+
+    def query(self, status: str = None, clues: int = None, limit: int = None):
+        """
+        Description
+        -----------
+        Generates the stored results with a given status and/or clue count.
+
+        Params
+        ------
+        :status: str = None
+        Only results with this status, one of `STATUSES`.
+
+        :clues: int = None
+        Only puzzles given this many clues.
+
+        :limit: int = None
+        The most results to generate.
+
+        Return
+        ------
+        generator
+        Yields the result dict (as returned by `get`) of each matching puzzle.
+        """
+        self.flush()
+        conditions, parameters = [], []
+        if status is not None:
+            conditions.append("status = ?")
+            parameters.append(status)
+        if clues is not None:
+            conditions.append("clues = ?")
+            parameters.append(clues)
+        statement = "SELECT * FROM puzzles"
+        if conditions:
+            statement += " WHERE " + " AND ".join(conditions)
+        if limit is not None:
+            statement += " LIMIT ?"
+            parameters.append(limit)
+        for row in self.connection.execute(statement, parameters):
+            yield dict(zip(COLUMNS, row))
+
+    def counts(self) -> dict:
+        """Returns the number of stored puzzles of each status"""
+        self.flush()
+        counts = dict.fromkeys(STATUSES, 0)
+        counts.update(self.connection.execute("SELECT status, COUNT(*) FROM puzzles GROUP BY status"))
+        return counts
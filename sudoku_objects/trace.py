@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+This class records what happened while a matrix was being solved as
+compact events in a bounded ring buffer, so tracing can be left on
+and the last few steps looked at after something goes wrong.
+
+Each event is a plain tuple of
+    (iteration, technique, cell, digit, eliminated)
+where `cell` is the cell index from 0-80 (row * 9 + column), `digit` is
+the value set (or the guess undone) in the cell, 0 when possibilities
+were only removed, and `eliminated` is a 9 bit mask of the possibilities
+removed from the cell. In grids of other sizes the cell index is
+row * size + column and the mask has a bit per value.
+Nothing is formatted until an event is rendered.
+"""
+from collections import deque
+
+from sudoku_objects.base import SIZE
+from sudoku_objects.base import digits_for
+
+TRACE_CAPACITY = 1024
+# Techniques whose removed possibilities are recorded one event per cell. The
+# possibilities removed from peers when a value is set are implied by the
+# event that set the value so they are left out.
+ELIMINATING = frozenset(['box_line', 'naked_subset', 'hidden_subset', 'fish'])
+
+
+class TraceRecorder:
+    """
+    Description
+    -----------
+    Holds the last `capacity` events of a solve. The matrix sets
+    `technique` and `iteration` as it goes and its cells record
+    the values they are set to and the possibilities they lose.
+
+    Params
+    ------
+    :capacity: int = TRACE_CAPACITY
+    How many events to keep, older events are dropped.
+
+    :size: int = SIZE
+    The number of values in the grid being solved.
+    """
+    def __init__(self, capacity: int = TRACE_CAPACITY, size: int = SIZE):
+        if capacity < 1:
+            raise ValueError(f"You passed in: `{capacity}``, but we were expecting a capacity of at least 1.")
+        self.events = deque(maxlen=capacity)
+        self.digits = digits_for(size)
+        self.iteration = 0
+        self.technique = None
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def set_value(self, cell: int, digit: int, eliminated: int) -> None:
+        """Records a cell being set to `digit`, `eliminated` being the mask of its other possibilities"""
+        self.events.append((self.iteration, self.technique, cell, digit, eliminated))
+
+    def eliminate(self, cell: int, eliminated: int) -> None:
+        """Records the possibilities in the mask `eliminated` being removed from a cell"""
+        self.events.append((self.iteration, self.technique, cell, 0, eliminated))
+
+    def backtrack(self, cell: int, digit: int) -> None:
+        """Records a guess of `digit` for a cell being undone"""
+        self.events.append((self.iteration, 'backtrack', cell, digit, 0))
+
+    def clear(self) -> None:
+        self.events.clear()
+        self.iteration = 0
+        self.technique = None
+
+    def render(self, event: tuple) -> str:
+        """
+        Description
+        -----------
+        Formats a single event.
+
+        Params
+        ------
+        :event: tuple
+        An event from `events`.
+
+        Return
+        ------
+        str
+        e.g. `Iteration 2: hidden_single set row:4; column:7 to 3 (eliminated 5, 8)`
+        """
+        iteration, technique, cell, digit, eliminated = event
+        where = f"row:{cell // self.digits.size}; column:{cell % self.digits.size}"
+        removed = ', '.join(str(value) for value in self.digits.mask_digits[eliminated])
+        if technique == 'backtrack':
+            return f"Iteration {iteration}: backtrack undid {digit} at {where}"
+        if digit:
+            return f"Iteration {iteration}: {technique} set {where} to {digit}" + (f" (eliminated {removed})" if removed else '')
+        return f"Iteration {iteration}: {technique} eliminated {removed} from {where}"
+
+    def steps(self, last: int = None) -> list:
+        """Returns the last `last` events (or all of them) rendered as strings, oldest first"""
+        events = list(self.events)
+        if last is not None:
+            events = events[-last:] if last else []
+        return [self.render(event) for event in events]
+
+    def __str__(self) -> str:
+        return '\n'.join(self.steps())
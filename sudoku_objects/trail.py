@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+This class is an undo log of the changes made to the cells and groups of a
+matrix, so that the matrix can be put back the way it was at a checkpoint
+in time proportional to what changed since, rather than by copying the
+state of every cell and group up front.
+
+While a matrix is recording (see `Matrix.checkpoint`) every cell and group
+holds the matrix's `Trail` in `trail`, and saves its state there just
+before it changes for the first time since the latest checkpoint or
+rollback. Rolling back restores those saved states, newest first.
+"""
+from itertools import count
+
+# Shared by every trail so that a cell or group moved from one trail to
+# another never mistakes an old epoch for the current one.
+_EPOCHS = count(1)
+
+
+class Trail:
+    """
+    Description
+    -----------
+    The saved states of the cells and groups changed since the first checkpoint.
+    Each entry is a plain tuple of (cell or group, its `snapshot()`).
+    """
+    def __init__(self):
+        self.entries = []
+        self.epoch = next(_EPOCHS)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def save(self, space) -> None:
+        """Saves the state of a cell or group that is about to change, once per epoch"""
+        if space.trail_epoch != self.epoch:
+            space.trail_epoch = self.epoch
+            self.entries.append((space, space.snapshot()))
+
+    def mark(self) -> int:
+        """Starts a new epoch and returns the position to hand back to `undo`"""
+        self.epoch = next(_EPOCHS)
+        return len(self.entries)
+
+    def undo(self, position: int) -> int:
+        """
+        Description
+        -----------
+        Restores every cell and group saved since `position`, newest first.
+
+        Params
+        ------
+        :position: int
+        A position returned by `mark`.
+
+        Return
+        ------
+        int
+        The number of saved states restored.
+        """
+        entries = self.entries
+        undone = len(entries) - position
+        while len(entries) > position:
+            space, snapshot = entries.pop()
+            space.restore(snapshot)
+        self.epoch = next(_EPOCHS)
+        return undone
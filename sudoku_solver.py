@@ -1,11 +1,37 @@
-# TODO use the CLI to solve one or many sudoku puzzles
 # TODO add web scraping tool for online sudoku puzzles from a URL or something
 # TODO create a NLD_JSON parsing method to solve puzzles submitted as JSON
 # TODO create a CSV parsing method to solve puzzles submitted as CSV
-# TODO createa a STDIN parsing method to solve puzzles submitted through STDIN
 import argparse
+import os
+import sys
+import time
 from argparse import RawTextHelpFormatter
 
+from csv_to_matrix import csv_to_matrix
+from sudoku_objects.canonical import CACHE_SIZE
+from sudoku_objects.client import SOCKET_PATH
+from sudoku_objects.corpus import write_corpus
+from sudoku_objects.daemon import serve as serve_daemon
+from sudoku_objects.generator import MIN_CLUES
+from sudoku_objects.generator import SYMMETRIES
+from sudoku_objects.generator import generate_many
+from sudoku_objects.matrix import ENGINES
+from sudoku_objects.matrix import Matrix
+from sudoku_objects.pipeline import CHUNK_SIZE
+from sudoku_objects.pipeline import read_puzzles
+from sudoku_objects.pipeline import solve_corpus
+from sudoku_objects.pipeline import solve_many
+from sudoku_objects.pipeline import write_puzzles
+from sudoku_objects.pipeline import write_results
+from sudoku_objects.rating import rate_corpus
+from sudoku_objects.rating import rate_many
+from sudoku_objects.service import BATCH_SIZE
+from sudoku_objects.service import BATCH_WINDOW
+from sudoku_objects.service import HOST
+from sudoku_objects.service import MAX_QUEUE
+from sudoku_objects.service import serve
+from sudoku_objects.store import PuzzleStore
+
 parser = argparse.ArgumentParser(
     description="""\
     Description
@@ -71,13 +97,13 @@ parser.add_argument(
             `--input ./my_json_file.json` or
             `--input https://some.sudokuwebsite.com/puzzle/?difficuly=2`""",
     dest='input',
-    formatter_class=RawTextHelpFormatter)
+    default='test')
 parser.add_argument(
     '--format',
     help="""\
         Use this input parameter to describe the input format of your input parameter.
 
-        Must be one of <HTTP|CSV|JSON|STDIN>
+        Must be one of <HTTP|CSV|JSON|TXT|STDIN|BIN>
 
         HTTP
         - Not functioning yet.
@@ -91,10 +117,283 @@ parser.add_argument(
           within the row as keys [0-8] and values or either the number of the empty string "" for blanks.
         - See above for examples, can process multiple examples per newline delimited json file.
 
+        TXT
+        - One puzzle per line as 81 characters read left to right, top to bottom, with `.` or `0` for blanks.
+
         STDIN
-        - Pipe output from the terminal into the argument parser and specify this value to pick that up""",
-    dest='format',
-    formatter_class=RawTextHelpFormatter)
+        - Pipe output from the terminal into the argument parser and specify this value to pick that up
+        - Each line is either a JSON puzzle as above or an 81 character puzzle string as for TXT.
+        - Puzzles are read, solved and written one line at a time so any amount of input can be piped through.
+
+        BIN
+        - A binary corpus of fixed width records as written by `--convert`, see `sudoku_objects/corpus.py`.
+        - Each worker process maps the file and reads its own range of records, puzzles are named after their record number.""",
+    dest='format')
+parser.add_argument(
+    '--engine',
+    help="""\
+        The engine used to solve each puzzle, one of <objects|flat|dlx>. The default is `objects`.
+
+        objects
+        - Solves by walking the cell, row, column and box objects of the Matrix.
+
+        flat
+        - Solves on flat arrays of values and candidate masks, then fills in the Matrix.
+
+        dlx
+        - Solves as an exact cover problem with Dancing Links, then fills in the Matrix.""",
+    dest='engine',
+    choices=ENGINES,
+    default='objects')
+parser.add_argument(
+    '--workers',
+    help="""\
+        JSON and TXT input holding many puzzles is solved across this many worker processes.
+        The default is the number of CPUs.""",
+    dest='workers',
+    type=int,
+    default=None)
+parser.add_argument(
+    '--chunk-size',
+    help=f"""\
+        How many puzzles are sent to a worker process at a time. The default is {CHUNK_SIZE}.""",
+    dest='chunk_size',
+    type=int,
+    default=CHUNK_SIZE)
+parser.add_argument(
+    '--cache-size',
+    help=f"""\
+        How many solved puzzles each worker process remembers, so that a puzzle which is the same as
+        an earlier one up to relabeling digits, reordering rows and columns or transposing is not solved again.
+        The default is {CACHE_SIZE} with the `objects` engine and 0 (off) with the others, which
+        solve most puzzles quicker than they can be looked up.""",
+    dest='cache_size',
+    type=int,
+    default=None)
+parser.add_argument(
+    '--store',
+    help="""\
+        A SQLite database file of solved puzzles, created if it does not exist. Puzzles already in it are
+        not solved again and the results of the puzzles that are solved are added to it.""",
+    dest='store',
+    default=None)
+parser.add_argument(
+    '--convert',
+    help="""\
+        Rather than solving, write the puzzles read from `--input` in `--format` to this file as a binary corpus
+        that can be read back with `--format BIN`.""",
+    dest='convert',
+    default=None)
+parser.add_argument(
+    '--packed',
+    help="""\
+        With `--convert`, pack two values into each byte, 41 bytes a puzzle rather than 81.""",
+    dest='packed',
+    action='store_true')
+parser.add_argument(
+    '--with-solutions',
+    help="""\
+        With `--convert`, solve the puzzles and add solution and status columns to the binary corpus.""",
+    dest='with_solutions',
+    action='store_true')
+parser.add_argument(
+    '--generate',
+    help="""\
+        Rather than solving, generate this many new puzzles with exactly one solution and write them to `--output`
+        (STDOUT by default) in `--format`, one of <TXT|JSON|CSV|BIN>, TXT by default. The number of puzzles generated
+        per second per worker process is printed to STDERR.""",
+    dest='generate',
+    type=int,
+    default=None)
+parser.add_argument(
+    '--clues',
+    help=f"""\
+        With `--generate`, take clues away until each puzzle is down to this many, or until no more can be taken away
+        without a second solution. The default of {MIN_CLUES} takes away as many as it can.""",
+    dest='clues',
+    type=int,
+    default=MIN_CLUES)
+parser.add_argument(
+    '--symmetry',
+    help="""\
+        With `--generate`, the symmetry of the clues, one of <none|rotational|mirror|diagonal|dihedral>.""",
+    dest='symmetry',
+    choices=SYMMETRIES,
+    default='none')
+parser.add_argument(
+    '--seed',
+    help="""\
+        With `--generate`, the seed of the random numbers, the same seed always generates the same puzzles.""",
+    dest='seed',
+    type=int,
+    default=None)
+parser.add_argument(
+    '--rate',
+    help="""\
+        Rather than solving, grade each puzzle read from `--input` in `--format` <JSON|TXT|STDIN|BIN> by the hardest
+        technique it needs, one of <singles|box_line|subsets|fish|search>, writing one JSON document per line holding
+        the name, puzzle, level, score, counts of each technique used and status of each puzzle.""",
+    dest='rate',
+    action='store_true')
+parser.add_argument(
+    '--serve',
+    help="""\
+        Rather than solving, serve the solver over HTTP on this port until interrupted, see `sudoku_objects/service.py`.
+        POST an 81 character puzzle string, or JSON holding one under "puzzle", to /solve to get back its solution,
+        status and solve stats. Concurrent requests are solved in batches across `--workers` worker processes.""",
+    dest='serve',
+    type=int,
+    default=None)
+parser.add_argument(
+    '--daemon',
+    help=f"""\
+        Rather than solving, keep the solver running until interrupted, listening on this Unix domain socket
+        ({SOCKET_PATH} if no path is given), see `sudoku_objects/daemon.py`. Send it one puzzle per line with
+        `sudoku_client.py` to get back one JSON document per line, as for `--format STDIN`, without starting
+        the solver each time. Chunks of puzzles are solved across `--workers` worker processes, or in a thread
+        of the daemon itself with `--workers 0`.""",
+    dest='daemon',
+    nargs='?',
+    const=SOCKET_PATH,
+    default=None)
+parser.add_argument(
+    '--host',
+    help=f"""\
+        With `--serve`, the address to listen on. The default is {HOST}.""",
+    dest='host',
+    default=HOST)
+parser.add_argument(
+    '--batch-size',
+    help=f"""\
+        With `--serve`, the most requests solved together in one batch. The default is {BATCH_SIZE}.""",
+    dest='batch_size',
+    type=int,
+    default=BATCH_SIZE)
+parser.add_argument(
+    '--batch-window',
+    help=f"""\
+        With `--serve`, the most seconds to wait after the first request of a batch for more to arrive.
+        The default is {BATCH_WINDOW}.""",
+    dest='batch_window',
+    type=float,
+    default=BATCH_WINDOW)
+parser.add_argument(
+    '--max-queue',
+    help=f"""\
+        With `--serve`, the most requests left waiting for a batch, any more are answered with a 503.
+        The default is {MAX_QUEUE}.""",
+    dest='max_queue',
+    type=int,
+    default=MAX_QUEUE)
+parser.add_argument(
+    '--order',
+    help="""\
+        The order results are written in when solving many puzzles, one of <input|completion>.
+
+        input
+        - The same order as the puzzles were read in (the default).
+
+        completion
+        - As soon as each chunk of puzzles is solved.""",
+    dest='order',
+    choices=['input', 'completion'],
+    default='input')
+parser.add_argument(
+    '--output',
+    help="""\
+        Where to write the results of solving many puzzles, one JSON document per line
+        holding the name, puzzle, solution and status of each puzzle. The default is STDOUT.""",
+    dest='output',
+    default=None)
+
+
+def solve_and_print(matrix: Matrix, engine: str, store: PuzzleStore = None) -> None:
+    """
+    Description
+    -----------
+    Quietly solves a matrix with the chosen engine and prints
+    the result prefixed with either `Solved:` or `Stuck:`.
+
+    Params
+    ------
+    :matrix: Matrix
+    The matrix to solve.
+
+    :engine: str
+    One of `ENGINES`.
+
+    :store: PuzzleStore = None
+    A store to look the puzzle up in and record its result in.
+
+    Return
+    ------
+    None
+    """
+    matrix.verbose = False
+    matrix.solve(engine=engine, store=store)
+    print(f"{'Solved' if matrix.solved else 'Stuck'}:\n{matrix}")
+
 
 if __name__ == '__main__':
-    print("# TODO Make this work")
+    args = parser.parse_args()
+    input_format = (args.format or '').upper()
+    store = PuzzleStore(args.store) if args.store else None
+    options = dict(
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        ordered=args.order == 'input',
+        engine=args.engine,
+        cache_size=CACHE_SIZE if args.cache_size is None and args.engine == 'objects' else args.cache_size or 0)
+    if args.daemon is not None:
+        workers = args.workers if args.workers is not None else os.cpu_count() or 1
+        serve_daemon(args.daemon, workers=workers, engine=args.engine, chunk_size=args.chunk_size,
+                     cache_size=options['cache_size'])
+    elif args.serve is not None:
+        serve(args.host, args.serve, workers=args.workers, engine=args.engine, batch_size=args.batch_size,
+              batch_window=args.batch_window, max_queue=args.max_queue)
+    elif args.generate is not None:
+        start = time.perf_counter()
+        workers = args.workers if args.workers is not None else os.cpu_count() or 1
+        puzzles = generate_many(args.generate, workers=workers, seed=args.seed, clues=args.clues, symmetry=args.symmetry)
+        written = write_puzzles(puzzles, args.output or '-', input_format or 'TXT')
+        seconds = time.perf_counter() - start
+        print(f"Generated {written} puzzles in {seconds:.2f}s, {written / seconds:.1f} puzzles/s, "
+              f"{written / seconds / max(workers, 1):.1f} puzzles/s per core", file=sys.stderr)
+    elif args.rate:
+        output = open(args.output, 'w') if args.output else sys.stdout
+        if input_format == 'BIN':
+            results = rate_corpus(args.input, workers=args.workers, chunk_size=args.chunk_size)
+        else:
+            puzzles = read_puzzles('-' if input_format == 'STDIN' else args.input, input_format or 'TXT')
+            results = rate_many(puzzles, workers=args.workers, chunk_size=args.chunk_size)
+        write_results(results, output)
+        if args.output:
+            output.close()
+    elif args.convert:
+        records = read_puzzles('-' if input_format == 'STDIN' else args.input, input_format or 'TXT')
+        if args.with_solutions:
+            records = solve_many(records, store=store, **options)
+        written = write_corpus(args.convert, records, args.packed, args.with_solutions, args.with_solutions)
+        print(f"Wrote {written} puzzles to {args.convert}", file=sys.stderr)
+    elif input_format in ['JSON', 'TXT', 'STDIN', 'BIN']:
+        output = open(args.output, 'w') if args.output else sys.stdout
+        if input_format == 'BIN' and store is None:
+            results = solve_corpus(args.input, **options)
+        else:
+            results = solve_many(read_puzzles('-' if input_format == 'STDIN' else args.input, input_format), store=store, **options)
+        write_results(results, output)
+        if args.output:
+            output.close()
+    elif input_format == 'CSV':
+        solve_and_print(csv_to_matrix(args.input), args.engine, store)
+    elif args.input == 'test':
+        # Imported here as it builds sample matrices as it is imported, which the other modes have no use for
+        from samples.samples import EASY_SAMPLE_MATRIX
+        from samples.samples import MEDIUM_SAMPLE_MATRIX
+        from samples.samples import HARD_SAMPLE_MATRIX
+        for values in [EASY_SAMPLE_MATRIX, MEDIUM_SAMPLE_MATRIX, HARD_SAMPLE_MATRIX]:
+            solve_and_print(Matrix(values, verbose=False), args.engine, store)
+    else:
+        print("# TODO Make this work")
+    if store is not None:
+        store.close()
@@ -0,0 +1,36 @@
+#! /usr/bin/env python3
+import unittest
+
+from samples.samples import EASY_SAMPLE_MATRIX
+from samples.samples import MEDIUM_SAMPLE_MATRIX
+from samples.samples import HARD_SAMPLE_MATRIX
+
+from sudoku_objects import batch
+from sudoku_objects import flat
+
+
+@unittest.skipIf(batch.np is None, "numpy is not installed")
+class test_batch(unittest.TestCase):
+    def setUp(self):
+        invalid = flat.values_to_grid(EASY_SAMPLE_MATRIX)
+        invalid[1] = 7
+        self.puzzles = batch.np.array(
+            [flat.values_to_grid(values) for values in [EASY_SAMPLE_MATRIX, MEDIUM_SAMPLE_MATRIX, HARD_SAMPLE_MATRIX]]
+            + [invalid]
+        ).reshape(-1, 9, 9)
+
+    def testSolveBatch(self):
+        solutions, status = batch.solve_batch(self.puzzles)
+        self.assertEqual(solutions.shape, (4, 9, 9))
+        self.assertEqual(status.tolist(), [batch.SOLVED, batch.SOLVED, batch.SOLVED, batch.STUCK])
+        for index, values in enumerate([EASY_SAMPLE_MATRIX, MEDIUM_SAMPLE_MATRIX, HARD_SAMPLE_MATRIX]):
+            self.assertEqual(solutions[index].reshape(81).tolist(), flat.solve(values)[0])
+
+    def testWithoutFallback(self):
+        solutions, status = batch.solve_batch(self.puzzles, fallback=False, chunk_size=2)
+        self.assertEqual(status.tolist(), [batch.SOLVED, batch.SOLVED, batch.STUCK, batch.STUCK])
+        self.assertEqual(solutions[2].reshape(81).tolist(), flat.solve(HARD_SAMPLE_MATRIX, search=False)[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
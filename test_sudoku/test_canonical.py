@@ -0,0 +1,92 @@
+#! /usr/bin/env python3
+import os
+import random
+import unittest
+
+from samples.samples import EXPERT_SAMPLE_MATRIX
+from samples.samples import HARD_SAMPLE_MATRIX
+
+from sudoku_objects import flat
+from sudoku_objects import pipeline
+from sudoku_objects.base import string_to_values
+from sudoku_objects.base import values_to_string
+from sudoku_objects.canonical import SolutionCache
+from sudoku_objects.canonical import Transform
+from sudoku_objects.canonical import canonicalize
+from sudoku_objects.matrix import Matrix
+
+TEST_CASE_VERBOSE = False
+HARD_CORPUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'samples', 'corpus', 'hard.txt')
+
+
+def random_transform(seed: int) -> Transform:
+    """A random symmetry of the grid"""
+    generator = random.Random(seed)
+    bands = generator.sample(range(3), 3)
+    stacks = generator.sample(range(3), 3)
+    rows = [band * 3 + row for band in bands for row in generator.sample(range(3), 3)]
+    columns = [stack * 3 + column for stack in stacks for column in generator.sample(range(3), 3)]
+    digits = dict(zip(range(1, 10), generator.sample(range(1, 10), 9)))
+    return Transform(generator.random() < 0.5, rows, columns, digits)
+
+
+class test_canonical(unittest.TestCase):
+    def testSymmetricTwinsShareCanonicalForm(self):
+        for values in [HARD_SAMPLE_MATRIX, EXPERT_SAMPLE_MATRIX]:
+            grid = flat.values_to_grid(values)
+            canonical, transform = canonicalize(grid)
+            self.assertEqual(''.join(str(value) for value in transform.apply(grid)), canonical)
+            for seed in range(10):
+                twin = random_transform(seed).apply(grid)
+                self.assertEqual(canonicalize(twin)[0], canonical)
+
+    def testTransformRoundTrip(self):
+        grid = flat.values_to_grid(HARD_SAMPLE_MATRIX)
+        for seed in range(5):
+            transform = random_transform(seed)
+            self.assertEqual(transform.invert(transform.apply(grid)), grid)
+
+    def testCacheHitOnTwin(self):
+        cache = SolutionCache()
+        grid = flat.values_to_grid(EXPERT_SAMPLE_MATRIX)
+        solution, solved = cache.solve(grid, lambda grid: flat.solve(grid)[::2])
+        self.assertTrue(solved)
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+        twin = random_transform(7).apply(grid)
+        cached = cache.get(twin)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cached, random_transform(7).apply(solution))
+        self.assertTrue(all(given in (0, value) for given, value in zip(twin, cached)))
+        self.assertTrue(flat.solve(cached)[2])
+
+    def testLeastRecentlyUsedEviction(self):
+        puzzles = [string_to_values(puzzle) for name, puzzle in pipeline.read_puzzles(HARD_CORPUS, 'TXT')][:3]
+        cache = SolutionCache(maxsize=2)
+        for values in puzzles:
+            cache.solve(values, lambda grid: flat.solve(grid)[::2])
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get(puzzles[0]))
+        self.assertIsNotNone(cache.get(puzzles[2]))
+        self.assertRaises(ValueError, SolutionCache, 0)
+
+    def testMatrixSolveWithCache(self):
+        cache = SolutionCache()
+        HD = Matrix(HARD_SAMPLE_MATRIX, verbose=TEST_CASE_VERBOSE)
+        HD.solve(verbose=TEST_CASE_VERBOSE, cache=cache)
+        self.assertTrue(HD.solved)
+        twin = random_transform(3).apply(flat.values_to_grid(HARD_SAMPLE_MATRIX))
+        TW = Matrix(string_to_values(values_to_string(twin)), verbose=TEST_CASE_VERBOSE)
+        stats = TW.solve(verbose=TEST_CASE_VERBOSE, cache=cache, stats=True)
+        self.assertTrue(TW.solved)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(stats.iterations, 0)
+
+    def testSolveChunkWithCache(self):
+        twin = values_to_string(random_transform(1).apply(flat.values_to_grid(HARD_SAMPLE_MATRIX)))
+        results = pipeline.solve_chunk([values_to_string(HARD_SAMPLE_MATRIX), twin], 'flat', cache_size=8)
+        self.assertTrue(all(solved for solution, solved, seconds in results))
+        self.assertEqual(pipeline._cache.hits, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,2 +1,75 @@
 #! /usr/bin/env python3
-# import unittest
+import unittest
+
+from samples.samples import EASY_SAMPLE_MATRIX
+from samples.samples import HARD_SAMPLE_MATRIX
+
+from sudoku_objects.base import string_to_values
+from sudoku_objects.matrix import Matrix
+
+TEST_CASE_VERBOSE = False
+
+
+class test_cells(unittest.TestCase):
+    def testSetValueQueuesUnits(self):
+        EZ = Matrix(EASY_SAMPLE_MATRIX, verbose=TEST_CASE_VERBOSE)
+        EZ.dirty_units.clear()
+        EZ.changed_units.clear()
+        cell = EZ.rows[0].cells[1]
+        cell.set_value(5)
+        self.assertEqual(list(EZ.changed_units), [cell.row, cell.column, cell.box])
+        self.assertEqual(list(EZ.dirty_units)[:3], [cell.row, cell.column, cell.box])
+        self.assertNotIn(5, cell.row.possibilities)
+        self.assertFalse(any(peer.has_possibility(5) for peer in cell.box.cells))
+
+    def testRemovingPossibilityQueuesUnits(self):
+        HD = Matrix(HARD_SAMPLE_MATRIX, verbose=TEST_CASE_VERBOSE)
+        HD.fill_in_answers()
+        self.assertEqual(list(HD.dirty_units), [])
+        cell = next(cell for cell in HD.cells if cell.count_possibilities() > 1)
+        possibility = min(cell.possibilities)
+        self.assertEqual(cell.rm_possibility(possibility), possibility)
+        self.assertEqual(list(HD.dirty_units), [cell.row, cell.column, cell.box])
+        HD.dirty_units.clear()
+        self.assertEqual(cell.rm_possibility(possibility), 0)
+        self.assertEqual(list(HD.dirty_units), [])
+
+    def testNakedSubsets(self):
+        for bitmask in [False, True]:
+            EMPTY = Matrix([[None] * 9 for row in range(9)], verbose=TEST_CASE_VERBOSE, bitmask=bitmask)
+            row = EMPTY.rows[0]
+            row.cells[0].possibilities = {1, 2}
+            row.cells[4].possibilities = {2, 3}
+            row.cells[8].possibilities = {1, 3}
+            self.assertEqual(row.eliminate_naked_subsets(max_size=2), 0)
+            self.assertEqual(row.eliminate_naked_subsets(), 18)
+            self.assertEqual(row.cells[0].possibilities, {1, 2})
+            self.assertTrue(all(cell.possibilities == {4, 5, 6, 7, 8, 9} for cell in row.cells[1:8] if cell is not row.cells[4]))
+            self.assertEqual(row.eliminate_naked_subsets(), 0)
+
+    def testHiddenSubsets(self):
+        for bitmask in [False, True]:
+            EMPTY = Matrix([[None] * 9 for row in range(9)], verbose=TEST_CASE_VERBOSE, bitmask=bitmask)
+            box = EMPTY.boxes[4]
+            for cell in box.cells[2:]:
+                cell.possibilities = {1, 2, 3, 4, 5, 6, 7}
+            self.assertEqual(box.digit_locations()[8], 0b11)
+            self.assertEqual(box.digit_locations()[1], 0b111111111)
+            self.assertEqual(box.eliminate_hidden_subsets(), 14)
+            self.assertEqual(box.cells[0].possibilities, {8, 9})
+            self.assertEqual(box.cells[1].possibilities, {8, 9})
+            self.assertEqual(box.eliminate_hidden_subsets(), 0)
+
+    def testSubsetsSolveWithoutSearch(self):
+        # From samples/corpus/hard.txt, singles and box/line reduction alone get stuck on it
+        values = string_to_values('..8.7.1....9.....5.7.1...9..........6..7...49.4..5......7...51..2..3....381.....2')
+        for bitmask in [False, True]:
+            HD = Matrix(values, verbose=TEST_CASE_VERBOSE, bitmask=bitmask)
+            stats = HD.solve(search=False, stats=True)
+            self.assertTrue(HD.solved)
+            self.assertEqual(stats.techniques['guess'], 0)
+            self.assertGreater(stats.techniques['naked_subset'] + stats.techniques['hidden_subset'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
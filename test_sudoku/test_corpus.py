@@ -0,0 +1,116 @@
+#! /usr/bin/env python3
+import os
+import tempfile
+import unittest
+
+from samples.samples import HARD_SAMPLE_MATRIX
+
+from sudoku_objects import corpus
+from sudoku_objects import flat
+from sudoku_objects import pipeline
+from sudoku_objects.base import values_to_string
+
+TEST_CASE_VERBOSE = False
+
+
+class test_corpus(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.puzzles = list(pipeline.read_puzzles('samples/samples.txt', 'TXT'))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory.name, name)
+
+    def testEncodeDecode(self):
+        puzzle = values_to_string(HARD_SAMPLE_MATRIX)
+        for packed in [False, True]:
+            record = corpus.encode(puzzle, packed)
+            self.assertEqual(len(record), corpus.grid_width(packed))
+            self.assertEqual(corpus.decode(record, packed), puzzle)
+        self.assertEqual(list(corpus.encode(puzzle)), flat.values_to_grid(HARD_SAMPLE_MATRIX))
+        self.assertRaises(ValueError, corpus.encode, puzzle[:80])
+        self.assertRaises(ValueError, corpus.encode, puzzle[:80] + 'x')
+
+    def testWriteAndRead(self):
+        for packed in [False, True]:
+            path = self.path(f'puzzles{packed}.bin')
+            self.assertEqual(corpus.write_corpus(path, self.puzzles, packed), 3)
+            self.assertEqual(os.path.getsize(path), corpus.HEADER_SIZE + 3 * corpus.grid_width(packed))
+            with corpus.Corpus(path) as puzzles:
+                self.assertEqual(len(puzzles), 3)
+                self.assertEqual([puzzle for index, puzzle in puzzles.puzzles()], [puzzle for name, puzzle in self.puzzles])
+                self.assertEqual(puzzles.grid(2), flat.values_to_grid(HARD_SAMPLE_MATRIX))
+                self.assertEqual(len(puzzles.view(1, 3)), 2 * puzzles.record_size)
+                self.assertIsNone(puzzles.solution(0))
+                self.assertIsNone(puzzles.status(0))
+                self.assertRaises(IndexError, puzzles.puzzle, 3)
+
+    def testCloseWithViews(self):
+        path = self.path('views.bin')
+        corpus.write_corpus(path, self.puzzles)
+        puzzles = corpus.Corpus(path)
+        view = puzzles.view(0)
+        released = puzzles.view(1)
+        released.release()
+        puzzles.close()
+        # The view still held keeps the file mapped until it is released
+        self.assertFalse(puzzles.map.closed)
+        self.assertEqual(corpus.decode(view), self.puzzles[0][1])
+        view.release()
+        puzzles.close()
+        self.assertTrue(puzzles.map.closed)
+
+    def testSolutionsAndStatuses(self):
+        path = self.path('solved.bin')
+        results = list(pipeline.solve_many(self.puzzles, workers=0))
+        corpus.write_corpus(path, results, packed=True, solutions=True, statuses=True)
+        with corpus.Corpus(path) as puzzles:
+            self.assertEqual(puzzles.record_size, 41 * 2 + 1)
+            self.assertEqual([puzzles.solution(index) for index in range(3)], [result["solution"] for result in results])
+            self.assertEqual([puzzles.status(index) for index in range(3)], ['solved'] * 3)
+
+    def testConvertResultsWithErrors(self):
+        path = self.path('solved.bin')
+        lines = [puzzle for name, puzzle in self.puzzles]
+        results = pipeline.solve_many(pipeline.parse_puzzles(lines[:1] + ['notapuzzle'] + lines[1:], 'TXT'), workers=0)
+        self.assertEqual(corpus.write_corpus(path, results, solutions=True, statuses=True), 3)
+        with corpus.Corpus(path) as puzzles:
+            self.assertEqual([puzzle for index, puzzle in puzzles.puzzles()], lines)
+            self.assertEqual([puzzles.status(index) for index in range(3)], ['solved'] * 3)
+        self.assertEqual(corpus.write_corpus(path, [('bad', 'notapuzzle')] + self.puzzles), 3)
+
+    def testWriterRemovesUnfinishedCorpus(self):
+        path = self.path('unfinished.bin')
+        with self.assertRaises(KeyError):
+            with corpus.CorpusWriter(path) as writer:
+                writer.write(self.puzzles[0][1])
+                raise KeyError('stopped')
+        self.assertFalse(os.path.exists(path))
+
+    def testNotACorpus(self):
+        path = self.path('puzzles.txt')
+        with open(path, 'w') as text:
+            text.write(self.puzzles[0][1] + '\n')
+        self.assertRaises(ValueError, corpus.Corpus, path)
+
+    def testShards(self):
+        self.assertEqual(corpus.shards(10, 3), [(0, 4), (4, 7), (7, 10)])
+        self.assertEqual(corpus.shards(2, 3), [(0, 1), (1, 2), (2, 2)])
+        self.assertRaises(ValueError, corpus.shards, 10, 0)
+
+    def testSolveCorpus(self):
+        path = self.path('puzzles.bin')
+        corpus.write_corpus(path, self.puzzles * 3)
+        expected = list(pipeline.solve_many(self.puzzles * 3, workers=0))
+        for result, index in zip(expected, range(9)):
+            result["name"] = str(index)
+        self.assertEqual(list(pipeline.solve_corpus(path, workers=0, chunk_size=4)), expected)
+        self.assertEqual(list(pipeline.solve_corpus(path, workers=2, chunk_size=2)), expected)
+        self.assertEqual(list(pipeline.read_puzzles(path, 'BIN')), [(result["name"], result["puzzle"]) for result in expected])
+
+
+if __name__ == '__main__':
+    unittest.main()
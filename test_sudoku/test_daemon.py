@@ -0,0 +1,120 @@
+#! /usr/bin/env python3
+import asyncio
+import io
+import json
+import os
+import socket
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from samples.samples import EASY_SAMPLE_MATRIX
+from samples.samples import EXPERT_SAMPLE_MATRIX
+
+from sudoku_objects import client
+from sudoku_objects import daemon
+from sudoku_objects.base import values_to_string
+from sudoku_objects.pipeline import solve_string
+from sudoku_objects.pipeline import values_to_json
+
+TEST_CASE_VERBOSE = False
+EASY = values_to_string(EASY_SAMPLE_MATRIX)
+EXPERT = values_to_string(EXPERT_SAMPLE_MATRIX)
+CLASH = '11' + EASY[2:]
+
+
+async def send(path: str, lines: list) -> list:
+    """Streams lines through the client from a thread, as a script would, and returns the parsed responses"""
+    output = io.StringIO()
+    await asyncio.to_thread(client.stream, lines, path, output)
+    return [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+class test_daemon(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'solver.sock')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def testParseLine(self):
+        self.assertEqual(daemon.parse_line(EASY, 3), [('3', EASY)])
+        self.assertEqual(daemon.parse_line(json.dumps({"easy": values_to_json(EASY_SAMPLE_MATRIX)}), 3), [('easy', EASY)])
+        self.assertEqual(daemon.parse_line('....3.122..3....', 0), [('0', '....3.122..3....')])
+        for line in [EASY[:80], '{"easy": 5}', '{not json', '[1, 2]']:
+            self.assertRaises(ValueError, daemon.parse_line, line, 0)
+        self.assertRaises(ValueError, daemon.SolverDaemon, engine='quantum')
+        self.assertRaises(ValueError, daemon.SolverDaemon, chunk_size=0)
+
+    async def testStream(self):
+        async with daemon.SolverDaemon(self.path, workers=0) as server:
+            self.assertEqual(oct(os.stat(self.path).st_mode & 0o777), oct(0o600))
+            serving = asyncio.get_running_loop().create_task(server.serve_forever())
+            easy = json.dumps({"easy": values_to_json(EASY_SAMPLE_MATRIX)})
+            results = await send(self.path, [EXPERT + '\n', '', easy, CLASH, 'nonsense', 'health'])
+            self.assertEqual([result["name"] for result in results[:4]], ['0', 'easy', '3', '4'])
+            self.assertEqual(results[0]["solution"], solve_string(EXPERT)[0])
+            self.assertEqual(results[0]["status"], 'solved')
+            self.assertEqual((results[1]["puzzle"], results[1]["status"]), (EASY, 'solved'))
+            self.assertEqual(results[2]["status"], 'invalid')
+            self.assertIn('error', results[3])
+            self.assertEqual(results[4]["status"], 'ok')
+            self.assertEqual((results[4]["requests"], results[4]["errors"]), (4, 1))
+            # Many lines on one connection come back in order, in more than one chunk
+            results = await send(self.path, [EASY, EXPERT] * 100)
+            self.assertEqual([result["name"] for result in results], [str(number) for number in range(200)])
+            self.assertTrue(all(result["status"] == 'solved' for result in results))
+            self.assertGreaterEqual(server.counts["chunks"], 4)
+            self.assertEqual(server.counts["solved"], 202)
+            with self.assertRaises(FileExistsError):
+                await daemon.SolverDaemon(self.path).start()
+            serving.cancel()
+        self.assertFalse(os.path.exists(self.path))
+
+    async def testSolvesOffTheLoop(self):
+        threads = []
+        original = daemon.solve_chunk
+
+        def solve_chunk(*args):
+            threads.append(threading.current_thread())
+            return original(*args)
+        with mock.patch.object(daemon, 'solve_chunk', solve_chunk):
+            async with daemon.SolverDaemon(self.path, workers=0) as server:
+                serving = asyncio.get_running_loop().create_task(server.serve_forever())
+                results = await send(self.path, [EASY])
+                serving.cancel()
+        self.assertEqual(results[0]["status"], 'solved')
+        # Once to warm up and once for the chunk, neither on the event loop's thread
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(threading.main_thread(), threads)
+
+    async def testResultsError(self):
+        def results_of(*args):
+            raise RuntimeError('broken')
+            yield
+        with mock.patch.object(daemon, 'results_of', results_of):
+            async with daemon.SolverDaemon(self.path, workers=0) as server:
+                serving = asyncio.get_running_loop().create_task(server.serve_forever())
+                results = await send(self.path, [EASY, EXPERT])
+                serving.cancel()
+        self.assertEqual([result["error"] for result in results], ['RuntimeError: broken'] * 2)
+        self.assertEqual((server.counts["solved"], server.counts["errors"]), (0, 1))
+
+    async def testWorkers(self):
+        # A socket left behind by a daemon that did not close is replaced
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(self.path)
+        stale.close()
+        async with daemon.SolverDaemon(self.path, workers=1, chunk_size=8) as server:
+            serving = asyncio.get_running_loop().create_task(server.serve_forever())
+            results = await asyncio.gather(send(self.path, [EASY] * 20), send(self.path, [EXPERT] * 20))
+            self.assertEqual([len(responses) for responses in results], [20, 20])
+            self.assertEqual({result["solution"] for result in results[1]}, {solve_string(EXPERT)[0]})
+            self.assertEqual(server.counts["connections"], 2)
+            serving.cancel()
+
+
+if __name__ == '__main__':
+    unittest.main()
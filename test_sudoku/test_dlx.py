@@ -0,0 +1,63 @@
+#! /usr/bin/env python3
+import os
+import unittest
+
+from samples.samples import EASY_SAMPLE_MATRIX
+from samples.samples import HARD_SAMPLE_MATRIX
+from samples.samples import EMPTY_MATRIX
+
+from sudoku_objects import dlx
+from sudoku_objects import flat
+from sudoku_objects.base import string_to_values
+from sudoku_objects.matrix import Matrix
+from sudoku_objects.pipeline import read_puzzles
+
+TEST_CASE_VERBOSE = False
+CORPUS_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'samples', 'corpus')
+
+
+class test_dlx(unittest.TestCase):
+    def testSolve(self):
+        for values in [EASY_SAMPLE_MATRIX, HARD_SAMPLE_MATRIX]:
+            grid, solved = dlx.solve(values)
+            self.assertTrue(solved)
+            self.assertEqual(grid, flat.solve(values)[0])
+
+    def testCountSolutions(self):
+        self.assertEqual(dlx.count_solutions(HARD_SAMPLE_MATRIX), 1)
+        self.assertEqual(dlx.count_solutions(EMPTY_MATRIX, limit=5), 5)
+        values = [row[:] for row in EASY_SAMPLE_MATRIX]
+        values[0][1] = 7
+        self.assertEqual(dlx.count_solutions(values), 0)
+
+    def testEnumerateSolutions(self):
+        grid = flat.solve(EASY_SAMPLE_MATRIX)[0]
+        # Rows 0 and 1 hold the same two values swapped in columns 0 and 8,
+        # so blanking out that rectangle leaves exactly two ways to fill it in.
+        for cell in [0, 8, 9, 17]:
+            grid[cell] = 0
+        found = list(dlx.solutions(grid))
+        self.assertEqual(len(found), 2)
+        self.assertNotEqual(found[0], found[1])
+        self.assertTrue(all(0 not in solution for solution in found))
+
+    def testMatrixEngine(self):
+        HD = Matrix(HARD_SAMPLE_MATRIX, verbose=TEST_CASE_VERBOSE)
+        HD.solve(engine='dlx')
+        self.assertTrue(HD.solved)
+        self.assertFalse(HD.stuck)
+        self.assertEqual([cell.value for cell in HD.cells], dlx.solve(HARD_SAMPLE_MATRIX)[0])
+
+    def testLargerGrids(self):
+        self.assertEqual(dlx.row_constraints(255, 16, size=16), (255, 256 + 255, 512 + 255, 768 + 255))
+        for corpus in ['16x16.txt', '25x25.txt']:
+            name, puzzle = next(read_puzzles(os.path.join(CORPUS_DIRECTORY, corpus), 'TXT'))
+            values = string_to_values(puzzle)
+            grid, solved = dlx.solve(values)
+            self.assertTrue(solved)
+            self.assertEqual(grid, flat.solve(values)[0])
+        self.assertEqual(dlx.count_solutions(string_to_values('....3.122..3....')), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
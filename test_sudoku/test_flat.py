@@ -0,0 +1,98 @@
+#! /usr/bin/env python3
+import os
+import unittest
+
+from samples.samples import EASY_SAMPLE_MATRIX
+from samples.samples import MEDIUM_SAMPLE_MATRIX
+from samples.samples import HARD_SAMPLE_MATRIX
+
+from sudoku_objects import flat
+from sudoku_objects.base import BOX_SIZES
+from sudoku_objects.base import string_to_values
+from sudoku_objects.matrix import Matrix
+from sudoku_objects.pipeline import read_puzzles
+
+TEST_CASE_VERBOSE = False
+CORPUS_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'samples', 'corpus')
+
+
+class test_flat(unittest.TestCase):
+    def testTables(self):
+        self.assertEqual(len(flat.UNITS), 27)
+        self.assertTrue(all(len(peers) == 20 for peers in flat.PEERS))
+        self.assertTrue(all(len(units) == 3 for units in flat.CELL_UNITS))
+        self.assertEqual(flat.PEERS[0][:8], (1, 2, 3, 4, 5, 6, 7, 8))
+        self.assertEqual(flat.CELL_UNITS[80], (8, 17, 26))
+
+    def testRoundTrip(self):
+        self.assertEqual(flat.grid_to_values(flat.values_to_grid(EASY_SAMPLE_MATRIX)), EASY_SAMPLE_MATRIX)
+
+    def testSolve(self):
+        for values in [EASY_SAMPLE_MATRIX, MEDIUM_SAMPLE_MATRIX, HARD_SAMPLE_MATRIX]:
+            grid, masks, solved = flat.solve(values)
+            self.assertTrue(solved)
+            expected = Matrix(values, verbose=TEST_CASE_VERBOSE)
+            expected.solve()
+            self.assertEqual(grid, [cell.value for cell in expected.cells])
+
+    def testSolveWithoutSearch(self):
+        grid, masks, solved = flat.solve(HARD_SAMPLE_MATRIX, search=False)
+        self.assertFalse(solved)
+        self.assertIn(0, grid)
+
+    def testContradiction(self):
+        values = [row[:] for row in EASY_SAMPLE_MATRIX]
+        values[0][1] = 7
+        grid, masks, solved = flat.solve(values)
+        self.assertIsNone(masks)
+        self.assertFalse(solved)
+
+    def testMatrixEngine(self):
+        with_objects = Matrix(MEDIUM_SAMPLE_MATRIX, verbose=TEST_CASE_VERBOSE)
+        with_objects.solve()
+        with_flat = Matrix(MEDIUM_SAMPLE_MATRIX, verbose=TEST_CASE_VERBOSE)
+        with_flat.solve(engine='flat')
+        self.assertTrue(with_flat.solved)
+        self.assertEqual(with_objects.__str__(), with_flat.__str__())
+        with self.assertRaises(ValueError):
+            with_flat.solve(engine='abacus')
+
+    def testCountSolutions(self):
+        grid = flat.values_to_grid(HARD_SAMPLE_MATRIX)
+        self.assertEqual(flat.count_solutions(grid, limit=2), 1)
+        self.assertEqual(flat.count_solutions(HARD_SAMPLE_MATRIX), 1)
+        # Leaving out the first 3 rows of clues leaves many solutions
+        self.assertEqual(flat.count_solutions([0] * 27 + grid[27:], limit=5), 5)
+        self.assertEqual(flat.count_solutions([1, 1] + [0] * 79, limit=2), 0)
+
+    def testLargerTables(self):
+        for box_size in BOX_SIZES:
+            size = box_size * box_size
+            tables = flat.geometry(box_size)
+            self.assertEqual(len(tables.units), 3 * size)
+            self.assertTrue(all(len(peers) == 3 * (size - 1) - 2 * (box_size - 1) for peers in tables.peers))
+            self.assertEqual(len(tables.intersections), 2 * size * box_size)
+            self.assertEqual(tables.cell_units[size * size - 1], (size - 1, 2 * size - 1, 3 * size - 1))
+            self.assertIs(flat.geometry_of([0] * size * size), tables)
+        self.assertIs(flat.geometry(3).peers, flat.PEERS)
+        with self.assertRaises(ValueError):
+            flat.geometry(6)
+        with self.assertRaises(ValueError):
+            flat.geometry_of([0] * 100)
+
+    def testLargerGrids(self):
+        for corpus in ['16x16.txt', '25x25.txt']:
+            for name, puzzle in list(read_puzzles(os.path.join(CORPUS_DIRECTORY, corpus), 'TXT'))[:2]:
+                values = string_to_values(puzzle)
+                grid, masks, solved = flat.solve(values)
+                self.assertTrue(solved)
+                self.assertTrue(all(given in (0, value) for given, value in zip(flat.values_to_grid(values), grid)))
+                size = len(values)
+                for unit in flat.geometry_of(grid).units:
+                    self.assertEqual(sorted(grid[cell] for cell in unit), list(range(1, size + 1)))
+                self.assertEqual(flat.count_solutions(values, limit=2), 1)
+                self.assertEqual(flat.grid_to_values(flat.values_to_grid(values)), values)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+#! /usr/bin/env python3
+import io
+import os
+import random
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from sudoku_objects import flat
+from sudoku_objects import generator
+from sudoku_objects import pipeline
+
+TEST_CASE_VERBOSE = False
+
+
+class test_generator(unittest.TestCase):
+    def testOrbits(self):
+        for symmetry in generator.SYMMETRIES:
+            orbits = generator.orbits(symmetry)
+            self.assertEqual(sorted(cell for orbit in orbits for cell in orbit), list(range(81)))
+        self.assertEqual(len(generator.orbits('none')), 81)
+        self.assertEqual(len(generator.orbits('rotational')), 41)
+        self.assertIn((0, 8, 72, 80), generator.orbits('dihedral'))
+        self.assertRaises(ValueError, generator.orbits, 'spiral')
+
+    def testRandomGrid(self):
+        grid = generator.random_grid(random.Random(0))
+        self.assertTrue(all(grid))
+        self.assertIsNotNone(flat.initial_masks(grid))
+        self.assertNotEqual(grid, generator.random_grid(random.Random(1)))
+
+    def testGenerate(self):
+        rng = random.Random(2)
+        for symmetry in ['none', 'rotational']:
+            puzzle, solution = generator.generate(rng, symmetry=symmetry)
+            self.assertEqual(flat.count_solutions(puzzle, limit=2), 1)
+            self.assertEqual(flat.solve(puzzle)[0], solution)
+            self.assertTrue(all(given in (0, value) for given, value in zip(puzzle, solution)))
+            self.assertLess(sum(1 for value in puzzle if value), 35)
+            for orbit in generator.orbits(symmetry):
+                self.assertEqual(len({bool(puzzle[cell]) for cell in orbit}), 1)
+        puzzle, solution = generator.generate(rng, clues=40)
+        self.assertEqual(sum(1 for value in puzzle if value), 40)
+        self.assertRaises(ValueError, generator.generate, rng, 16)
+
+    def testGenerateManyIsSeeded(self):
+        in_process = list(generator.generate_many(5, workers=0, seed=7, chunk_size=2))
+        self.assertEqual([result["name"] for result in in_process], ['0', '1', '2', '3', '4'])
+        self.assertEqual(list(generator.generate_many(5, workers=2, seed=7, chunk_size=2)), in_process)
+        self.assertNotEqual(list(generator.generate_many(5, workers=0, seed=8, chunk_size=2)), in_process)
+
+    def testWritePuzzles(self):
+        results = list(generator.generate_many(3, workers=0, seed=3))
+        with tempfile.TemporaryDirectory() as directory:
+            for output_format in ['TXT', 'JSON', 'BIN']:
+                path = os.path.join(directory, f'puzzles.{output_format.lower()}')
+                self.assertEqual(pipeline.write_puzzles(results, path, output_format), 3)
+                self.assertEqual([puzzle for name, puzzle in pipeline.read_puzzles(path, output_format)],
+                                 [result["puzzle"] for result in results])
+            path = os.path.join(directory, 'puzzle.csv')
+            pipeline.write_puzzles(results[:1], path, 'CSV')
+            self.assertEqual([puzzle for name, puzzle in pipeline.read_puzzles(path, 'CSV')], [results[0]["puzzle"]])
+            self.assertRaises(ValueError, pipeline.write_puzzles, results, path, 'CSV')
+        printed = io.StringIO()
+        with redirect_stdout(printed):
+            pipeline.write_puzzles(results, '-', 'TXT')
+        self.assertEqual(printed.getvalue().split(), [result["puzzle"] for result in results])
+        self.assertRaises(ValueError, pipeline.write_puzzles, results, '-', 'BIN')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,14 +1,22 @@
 #! /usr/bin/env python3
+import os
 import unittest
 from textwrap import dedent
+from unittest import mock
 
 from samples.samples import EASY_SAMPLE_MATRIX
 from samples.samples import MEDIUM_SAMPLE_MATRIX
 from samples.samples import HARD_SAMPLE_MATRIX
+from samples.samples import EXPERT_SAMPLE_MATRIX
 
+from sudoku_objects.base import string_to_values
+from sudoku_objects.base import values_to_string
+from sudoku_objects.corpus import encode
 from sudoku_objects.matrix import Matrix
+from sudoku_objects.pipeline import read_puzzles
 
 TEST_CASE_VERBOSE = False
+CORPUS_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'samples', 'corpus')
 
 
 class test_matrix(unittest.TestCase):
@@ -126,6 +134,204 @@ class test_matrix(unittest.TestCase):
                 """)
         )
 
+    def testSolveHardWithoutSearch(self):
+        HD = Matrix(HARD_SAMPLE_MATRIX, verbose=TEST_CASE_VERBOSE)
+        stats = HD.solve(search=False, stats=True)
+        self.assertTrue(HD.solved)
+        self.assertGreater(stats.techniques['box_line'], 0)
+        self.assertGreater(stats.techniques['hidden_subset'], 0)
+        XP = Matrix(EXPERT_SAMPLE_MATRIX, verbose=TEST_CASE_VERBOSE)
+        XP.solve(search=False)
+        self.assertTrue(XP.stuck)
+        self.assertFalse(XP.solved)
+        XP.solve()
+        self.assertTrue(XP.solved)
+        self.assertFalse(XP.stuck)
+
+    def testBoxLineReduction(self):
+        for bitmask in [False, True]:
+            EMPTY = Matrix([[None] * 9 for row in range(9)], verbose=TEST_CASE_VERBOSE, bitmask=bitmask)
+            # Pointing: within box 0, 5 can only go in row 0
+            for cell in EMPTY.boxes[0].cells[3:]:
+                cell.rm_possibility(5)
+            self.assertEqual(EMPTY.get_box_slice(0, 0, 'row'), {5})
+            self.assertEqual(EMPTY.get_box_slice(0, 1, 'row'), set())
+            self.assertEqual(EMPTY.slice_boxes(), 6)
+            self.assertEqual([cell.has_possibility(5) for cell in EMPTY.rows[0].cells], [True] * 3 + [False] * 6)
+            # Claiming: within column 8, 7 can only go in box 8
+            for cell in EMPTY.columns[8].cells[:6]:
+                cell.rm_possibility(7)
+            self.assertEqual(EMPTY.slice_boxes(), 6)
+            self.assertEqual([cell.has_possibility(7) for cell in EMPTY.boxes[8].cells], [False, False, True] * 3)
+            self.assertEqual(EMPTY.slice_boxes(), 0)
+
+    def testXWing(self):
+        for bitmask in [False, True]:
+            EMPTY = Matrix([[None] * 9 for row in range(9)], verbose=TEST_CASE_VERBOSE, bitmask=bitmask)
+            for row in [2, 6]:
+                for column in range(9):
+                    if column not in [1, 7]:
+                        EMPTY.rows[row].cells[column].rm_possibility(5)
+            by_row, by_column = EMPTY.digit_positions()
+            self.assertEqual(by_row[5][2], 0b010000010)
+            self.assertEqual(by_column[5][1], 0b111111111)
+            self.assertEqual(EMPTY.eliminate_fish(), 14)
+            self.assertEqual([row for row in range(9) if EMPTY.rows[row].cells[1].has_possibility(5)], [2, 6])
+            self.assertEqual([row for row in range(9) if EMPTY.rows[row].cells[7].has_possibility(5)], [2, 6])
+            self.assertEqual(EMPTY.eliminate_fish(), 0)
+
+    def testBitmaskMatchesSets(self):
+        self.maxDiff = None
+        for values in [EASY_SAMPLE_MATRIX, MEDIUM_SAMPLE_MATRIX, HARD_SAMPLE_MATRIX]:
+            with_sets = Matrix(values, verbose=TEST_CASE_VERBOSE)
+            with_masks = Matrix(values, verbose=TEST_CASE_VERBOSE, bitmask=True)
+            self.assertEqual(with_sets.__poss__(), with_masks.__poss__())
+            with_sets.solve()
+            with_masks.solve()
+            self.assertEqual(with_sets.__str__(), with_masks.__str__())
+            self.assertEqual(with_sets.__poss__(), with_masks.__poss__())
+            self.assertEqual(with_sets.solved, with_masks.solved)
+
+    def testSolveStats(self):
+        self.assertIsNone(Matrix(EASY_SAMPLE_MATRIX, verbose=TEST_CASE_VERBOSE).solve())
+        HD = Matrix(EXPERT_SAMPLE_MATRIX, verbose=TEST_CASE_VERBOSE)
+        unsolved = len([cell for cell in HD.cells if not cell.is_solved])
+        stats = HD.solve(stats=True)
+        self.assertTrue(HD.solved)
+        self.assertEqual(stats.cells_filled, unsolved)
+        # Values set on a guess that is later undone are still counted
+        self.assertLessEqual(
+            stats.cells_filled,
+            stats.techniques['naked_single'] + stats.techniques['hidden_single'] + stats.techniques['guess'])
+        self.assertGreater(stats.iterations, 0)
+        self.assertGreater(stats.candidates_removed, 0)
+        self.assertGreater(stats.phase_seconds['fill_in_answers'], 0)
+        self.assertGreater(stats.phase_seconds['search'], 0)
+        self.assertEqual(stats.to_dict()['techniques'], stats.techniques)
+
+    def testFromString(self):
+        for values in [EASY_SAMPLE_MATRIX, HARD_SAMPLE_MATRIX]:
+            puzzle = values_to_string(values)
+            for bitmask in [False, True]:
+                expected = Matrix(values, verbose=TEST_CASE_VERBOSE, bitmask=bitmask)
+                built = [
+                    Matrix.from_string(puzzle, verbose=TEST_CASE_VERBOSE, bitmask=bitmask),
+                    Matrix.from_bytes(encode(puzzle), verbose=TEST_CASE_VERBOSE, bitmask=bitmask),
+                    Matrix.from_bytes(encode(puzzle, packed=True) + b'extra', packed=True, verbose=TEST_CASE_VERBOSE, bitmask=bitmask),
+                ]
+                for matrix in built:
+                    self.assertEqual(matrix.to_string(), puzzle)
+                    self.assertEqual(matrix.values, values)
+                    for group, other in zip(matrix.rows + matrix.columns + matrix.boxes, expected.rows + expected.columns + expected.boxes):
+                        self.assertEqual(group.possibilities, {1, 2, 3, 4, 5, 6, 7, 8, 9} - group.get_values())
+                        self.assertEqual(group.possibilities, other.possibilities)
+                    matrix.solve(verbose=TEST_CASE_VERBOSE)
+                    self.assertTrue(matrix.solved)
+                    self.assertNotIn('.', matrix.to_string())
+        self.assertRaises(ValueError, Matrix.from_string, '1' * 80)
+
+    def testCheckpointRollback(self):
+        for bitmask in [False, True]:
+            EX = Matrix(EXPERT_SAMPLE_MATRIX, verbose=TEST_CASE_VERBOSE, bitmask=bitmask)
+            EX.solve(verbose=TEST_CASE_VERBOSE, search=False)
+            before = (EX.__str__(), EX.__poss__(), [set(group.possibilities) for group in EX.all_groups()], EX.numbers.copy())
+            outer = EX.checkpoint()
+            self.assertEqual(len(EX.trail), 0)
+            cells = [cell for cell in EX.cells if not cell.is_solved]
+            cells[0].set_value(min(cells[0].possibilities))
+            middle = (EX.__str__(), EX.__poss__())
+            inner = EX.checkpoint()
+            EX.propagate()
+            self.assertGreater(len(EX.trail), 0)
+            EX.rollback(inner)
+            self.assertEqual((EX.__str__(), EX.__poss__()), middle)
+            cells[1].set_value(min(cells[1].possibilities))
+            EX.rollback(outer)
+            self.assertEqual(len(EX.trail), 0)
+            self.assertEqual((EX.__str__(), EX.__poss__(), [set(group.possibilities) for group in EX.all_groups()], EX.numbers), before)
+            EX.commit()
+            self.assertIsNone(EX.trail)
+            self.assertTrue(all(cell.trail is None for cell in EX.cells))
+            EX.solve(verbose=TEST_CASE_VERBOSE)
+            self.assertTrue(EX.solved)
+            self.assertIsNone(EX.trail)
+
+    def testCountSolutions(self):
+        for bitmask in [False, True]:
+            for values in [EASY_SAMPLE_MATRIX, EXPERT_SAMPLE_MATRIX]:
+                matrix = Matrix(values, verbose=TEST_CASE_VERBOSE, bitmask=bitmask)
+                before = (matrix.__str__(), matrix.__poss__())
+                self.assertEqual(matrix.count_solutions(), 1)
+                self.assertEqual(matrix.count_solutions(limit=None), 1)
+                self.assertTrue(matrix.is_unique())
+                self.assertEqual((matrix.__str__(), matrix.__poss__()), before)
+                matrix.solve(verbose=TEST_CASE_VERBOSE, search=False)
+                self.assertTrue(matrix.is_unique())
+            empty = Matrix([[None] * 9 for _ in range(9)], verbose=TEST_CASE_VERBOSE, bitmask=bitmask)
+            self.assertEqual(empty.count_solutions(), 2)
+            self.assertEqual(empty.count_solutions(limit=5), 5)
+            self.assertFalse(empty.is_unique())
+            clash = [row[:] for row in EASY_SAMPLE_MATRIX]
+            clash[0] = [1, 1] + clash[0][2:]
+            self.assertEqual(Matrix(clash, verbose=TEST_CASE_VERBOSE, bitmask=bitmask).count_solutions(), 0)
+            stuck = Matrix(EXPERT_SAMPLE_MATRIX, verbose=TEST_CASE_VERBOSE, bitmask=bitmask)
+            cell = next(cell for cell in stuck.cells if not cell.is_solved)
+            cell.possibilities = set()
+            self.assertEqual(stuck.count_solutions(), 0)
+        self.assertRaises(ValueError, empty.count_solutions, 0)
+
+    def testEngineFailureSkipsSearch(self):
+        # No value is repeated but there is no solution, the top right cell can only be a 9
+        values = string_to_values('12345678.' + '........9' + '.' * 63)
+        for engine in ['flat', 'dlx']:
+            matrix = Matrix(values, verbose=TEST_CASE_VERBOSE)
+            with mock.patch.object(Matrix, 'search', side_effect=AssertionError('searched the objects')):
+                matrix.solve(verbose=TEST_CASE_VERBOSE, engine=engine)
+            self.assertTrue(matrix.stuck)
+            self.assertFalse(matrix.solved)
+
+    def testLargerGrids(self):
+        self.maxDiff = None
+        small = Matrix.from_string('....3.122..3....', verbose=TEST_CASE_VERBOSE)
+        self.assertEqual(
+            small.__str__(),
+            dedent("""\
+                ++===+===++===+===++
+                ||   |   ||   |   ||
+                ++---+---++---+---++
+                || 3 |   || 1 | 2 ||
+                ++===+===++===+===++
+                || 2 |   ||   | 3 ||
+                ++---+---++---+---++
+                ||   |   ||   |   ||
+                ++===+===++===+===++
+                """)
+        )
+        self.assertEqual(
+            small.__poss__().splitlines()[:4],
+            ['+-----+-----+-----+-----+', '| 1 2 | 1 2 | 1 2 | 1 2 |', '| 3 4 | 3 4 | 3 4 | 3 4 |', '+-----+-----+-----+-----+']
+        )
+        small.solve(verbose=TEST_CASE_VERBOSE)
+        self.assertTrue(small.solved)
+        self.assertEqual(small.to_string(), '1234341221434321')
+        name, puzzle = next(read_puzzles(os.path.join(CORPUS_DIRECTORY, '16x16.txt'), 'TXT'))
+        solutions = set()
+        for bitmask in [False, True]:
+            for engine in ['objects', 'flat', 'dlx']:
+                matrix = Matrix.from_string(puzzle, verbose=TEST_CASE_VERBOSE, bitmask=bitmask)
+                self.assertEqual(len(matrix.cells), 256)
+                matrix.solve(verbose=TEST_CASE_VERBOSE, engine=engine)
+                self.assertTrue(matrix.solved)
+                solutions.add(matrix.to_string())
+        self.assertEqual(len(solutions), 1)
+        solution = solutions.pop()
+        self.assertTrue(all(given in ('.', answer) for given, answer in zip(puzzle, solution)))
+        self.assertEqual(string_to_values(puzzle.lower()), string_to_values(puzzle))
+        self.assertRaises(ValueError, string_to_values, 'A' + '.' * 80)
+        self.assertRaises(ValueError, string_to_values, '.' * 15)
+        self.assertRaises(ValueError, Matrix, [[None] * 5 for _ in range(5)])
+        self.assertRaises(ValueError, Matrix, [[None] * 4 for _ in range(9)])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,82 @@
+#! /usr/bin/env python3
+import io
+import json
+import unittest
+from contextlib import redirect_stdout
+
+from samples.samples import EASY_SAMPLE_MATRIX
+from samples.samples import HARD_SAMPLE_MATRIX
+
+from sudoku_objects import flat
+from sudoku_objects import pipeline
+from sudoku_objects.base import string_to_values
+from sudoku_objects.base import values_to_string
+
+EASY_SAMPLE_STRING = "7.......3.64...98..9.7.3.1...93.46......9......76.21...8.4.7.3..13...76.6.......4"
+
+
+class test_pipeline(unittest.TestCase):
+    def testPuzzleStrings(self):
+        self.assertEqual(values_to_string(EASY_SAMPLE_MATRIX), EASY_SAMPLE_STRING)
+        self.assertEqual(string_to_values(EASY_SAMPLE_STRING), EASY_SAMPLE_MATRIX)
+        self.assertEqual(string_to_values(EASY_SAMPLE_STRING.replace('.', '0')), EASY_SAMPLE_MATRIX)
+        with self.assertRaises(ValueError):
+            string_to_values(EASY_SAMPLE_STRING[:80])
+
+    def testReadPuzzles(self):
+        self.assertEqual(list(pipeline.read_puzzles('samples/samples.csv', 'CSV')), [('samples.csv', EASY_SAMPLE_STRING)])
+        self.assertEqual(next(pipeline.read_puzzles('samples/samples.json', 'json')), ('puzzle1', EASY_SAMPLE_STRING))
+        self.assertEqual(next(pipeline.read_puzzles('samples/samples.txt', 'TXT')), ('0', EASY_SAMPLE_STRING))
+
+    def testParseMixedLines(self):
+        json_line = open('samples/samples.json').readline()
+        lines = [EASY_SAMPLE_STRING + '\n', '\n', json_line]
+        self.assertEqual(
+            list(pipeline.parse_puzzles(lines, 'STDIN')),
+            [('0', EASY_SAMPLE_STRING), ('puzzle1', EASY_SAMPLE_STRING)])
+        with self.assertRaises(ValueError):
+            list(pipeline.parse_puzzles(lines, 'XML'))
+
+    def testSolveString(self):
+        expected = values_to_string(flat.solve(HARD_SAMPLE_MATRIX)[0])
+        for engine in ['objects', 'flat', 'dlx']:
+            self.assertEqual(pipeline.solve_string(values_to_string(HARD_SAMPLE_MATRIX), engine), (expected, True))
+
+    def testSolveInvalidQuietly(self):
+        clash = '77' + EASY_SAMPLE_STRING[2:]
+        printed = io.StringIO()
+        with redirect_stdout(printed):
+            for engine in ['objects', 'flat', 'dlx']:
+                results = list(pipeline.solve_many([('clash', clash)], workers=0, engine=engine))
+                self.assertEqual(results[0]["status"], 'invalid')
+        self.assertEqual(printed.getvalue(), '')
+
+    def testSolveMany(self):
+        puzzles = list(pipeline.read_puzzles('samples/samples.txt', 'TXT')) * 5
+        ordered = list(pipeline.solve_many(puzzles, workers=2, chunk_size=4))
+        self.assertEqual([result["puzzle"] for result in ordered], [puzzle for name, puzzle in puzzles])
+        self.assertTrue(all(result["status"] == "solved" for result in ordered))
+        completed = list(pipeline.solve_many(puzzles, workers=2, chunk_size=4, ordered=False))
+        self.assertEqual(sorted(map(str, completed)), sorted(map(str, ordered)))
+        self.assertEqual(list(pipeline.solve_many(iter(puzzles), workers=0, chunk_size=4)), ordered)
+
+    def testMalformedLines(self):
+        lines = [EASY_SAMPLE_STRING, 'notapuzzle', '{"broken": 5}', EASY_SAMPLE_STRING[:80] + 'x', EASY_SAMPLE_STRING]
+        puzzles = list(pipeline.parse_puzzles(lines, 'STDIN'))
+        for workers in [0, 2]:
+            results = list(pipeline.solve_many(puzzles, workers=workers, chunk_size=2))
+            self.assertEqual([result["name"] for result in results], ['0', '1', '2', '3', '4'])
+            self.assertEqual([result.get("status") for result in results], ['solved', None, None, None, 'solved'])
+            self.assertEqual([result["puzzle"] for result in results[1:4]], lines[1:4])
+            self.assertTrue(all('error' in result for result in results[1:4]))
+
+    def testWriteResults(self):
+        results = pipeline.solve_many(pipeline.read_puzzles('samples/samples.txt', 'TXT'), workers=0)
+        output = io.StringIO()
+        self.assertEqual(pipeline.write_results(results, output, buffer_lines=2), 3)
+        lines = output.getvalue().splitlines()
+        self.assertEqual([json.loads(line)["status"] for line in lines], ["solved"] * 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
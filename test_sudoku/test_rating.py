@@ -0,0 +1,100 @@
+#! /usr/bin/env python3
+import os
+import tempfile
+import unittest
+
+from samples.samples import EASY_SAMPLE_MATRIX
+from samples.samples import HARD_SAMPLE_MATRIX
+from samples.samples import EXPERT_SAMPLE_MATRIX
+
+from sudoku_objects import corpus
+from sudoku_objects import pipeline
+from sudoku_objects import rating
+from sudoku_objects.base import string_to_values
+from sudoku_objects.base import values_to_string
+from sudoku_objects.matrix import Matrix
+from sudoku_objects.store import puzzle_status
+
+TEST_CASE_VERBOSE = False
+
+
+class test_rating(unittest.TestCase):
+    def testRate(self):
+        easy = rating.rate(EASY_SAMPLE_MATRIX)
+        self.assertEqual(easy["level"], 'singles')
+        self.assertEqual(easy["status"], 'solved')
+        self.assertEqual(easy["score"], easy["counts"]['singles'])
+        self.assertEqual(easy["score"], sum(value is None for row in EASY_SAMPLE_MATRIX for value in row))
+        hard = rating.rate(values_to_string(HARD_SAMPLE_MATRIX))
+        self.assertEqual(hard["level"], 'subsets')
+        self.assertEqual(hard["counts"]['search'], 0)
+        self.assertGreater(hard["counts"]['box_line'], 0)
+        self.assertEqual(hard["score"], sum(rating.WEIGHTS[level] * found for level, found in hard["counts"].items()))
+        expert = rating.rate(EXPERT_SAMPLE_MATRIX)
+        self.assertEqual(expert["level"], 'search')
+        self.assertEqual(expert["status"], 'solved')
+        self.assertGreater(expert["counts"]['search'], 0)
+        self.assertGreater(expert["score"], hard["score"])
+        fishy = rating.rate('...5.....8..7....41..6.2.97....6....9....7.8.......3.263..4.25......5....5.9..4..')
+        self.assertGreater(fishy["counts"]['fish'], 0)
+
+    def testRateMatrix(self):
+        matrix = Matrix(HARD_SAMPLE_MATRIX, verbose=TEST_CASE_VERBOSE, bitmask=False)
+        self.assertEqual(rating.rate_matrix(matrix), rating.rate(HARD_SAMPLE_MATRIX))
+        self.assertTrue(matrix.solved)
+        self.assertIsNone(matrix.stats)
+        self.assertIsNone(matrix.trail)
+
+    def testInvalid(self):
+        clash = [row[:] for row in EASY_SAMPLE_MATRIX]
+        clash[0] = [1, 1] + clash[0][2:]
+        self.assertEqual(rating.rate(clash)["status"], 'invalid')
+        self.assertIsNone(rating.rate(clash)["level"])
+        # No digit repeats, but the last cell of the first row has nothing left to hold
+        unsolvable = rating.rate('12345678.' + '........9' + '.' * 63)
+        self.assertEqual((unsolvable["level"], unsolvable["score"], unsolvable["status"]), (None, 0, 'invalid'))
+        # Every cell has a candidate, but the last two cells of the first row can only both be 8
+        stuck = '1234567..' + '.' * 18 + '.......9.' + '.' * 18 + '........9' + '.' * 18
+        self.assertEqual((rating.rate(stuck)["level"], rating.rate(stuck)["status"]), (None, 'stuck'))
+        self.assertEqual(rating.rate(stuck)["status"], puzzle_status(string_to_values(stuck), False))
+
+    def testRateManyAndCorpus(self):
+        puzzles = list(pipeline.read_puzzles('samples/samples.txt', 'TXT'))
+        expected = [dict(name=name, puzzle=puzzle, **rating.rate(puzzle)) for name, puzzle in puzzles]
+        self.assertEqual(list(rating.rate_many(puzzles, workers=0, chunk_size=2)), expected)
+        self.assertEqual(list(rating.rate_many(puzzles, workers=2, chunk_size=1)), expected)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'puzzles.bin')
+            corpus.write_corpus(path, puzzles)
+            for result, index in zip(expected, range(3)):
+                result["name"] = str(index)
+            self.assertEqual(list(rating.rate_corpus(path, workers=0, chunk_size=2)), expected)
+            self.assertEqual(list(rating.rate_corpus(path, workers=2, chunk_size=2)), expected)
+
+    def testRateManyWithMalformedPuzzle(self):
+        puzzles = list(pipeline.read_puzzles('samples/samples.txt', 'TXT'))
+        puzzles.insert(1, ('bad', 'notapuzzle'))
+        for workers in [0, 1]:
+            results = list(rating.rate_many(puzzles, workers=workers, chunk_size=2))
+            self.assertEqual([result["name"] for result in results], [name for name, puzzle in puzzles])
+            self.assertEqual(set(results[1]), {'name', 'puzzle', 'error'})
+            self.assertEqual(results[1]["puzzle"], 'notapuzzle')
+            self.assertTrue(all(result["status"] == 'solved' for result in results[:1] + results[2:]))
+
+    def testRateManyReadsLazily(self):
+        read = []
+
+        def puzzles():
+            for number in range(100):
+                read.append(number)
+                yield (str(number), values_to_string(EASY_SAMPLE_MATRIX))
+        for workers in [0, 1]:
+            read.clear()
+            results = rating.rate_many(puzzles(), workers=workers, chunk_size=1)
+            self.assertEqual(next(results)["status"], 'solved')
+            self.assertLessEqual(len(read), pipeline.PENDING_CHUNKS_PER_WORKER + 1)
+            results.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+#! /usr/bin/env python3
+import asyncio
+import json
+import unittest
+
+from samples.samples import EASY_SAMPLE_MATRIX
+from samples.samples import EXPERT_SAMPLE_MATRIX
+
+from sudoku_objects import service
+from sudoku_objects.base import values_to_string
+from sudoku_objects.pipeline import values_to_json
+
+TEST_CASE_VERBOSE = False
+EASY = values_to_string(EASY_SAMPLE_MATRIX)
+EXPERT = values_to_string(EXPERT_SAMPLE_MATRIX)
+CLASH = '11' + EASY[2:]
+
+
+async def post(port: int, path: str, body: bytes, method: str = 'POST') -> tuple:
+    reader, writer = await asyncio.open_connection(service.HOST, port)
+    writer.write(f"{method} {path} HTTP/1.1\r\nConnection: close\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    return (int(head.split()[1]), json.loads(body))
+
+
+class test_service(unittest.IsolatedAsyncioTestCase):
+    def testParsePuzzle(self):
+        self.assertEqual(service.parse_puzzle(EASY.encode()), EASY)
+        self.assertEqual(service.parse_puzzle(EASY.replace('.', '0').encode() + b'\n'), EASY)
+        self.assertEqual(service.parse_puzzle(json.dumps({"puzzle": EASY}).encode()), EASY)
+        self.assertEqual(service.parse_puzzle(json.dumps({"puzzle": values_to_json(EASY_SAMPLE_MATRIX)}).encode()), EASY)
+        for body in [EASY[:80], EASY[:80] + 'x', '{"puzzle": 5}', '{"name": "x"}', '{not json']:
+            self.assertRaises(ValueError, service.parse_puzzle, body.encode())
+
+    def testSolveBatch(self):
+        solved, invalid = service.solve_batch([EXPERT, CLASH], 'flat')
+        self.assertEqual(solved["status"], 'solved')
+        self.assertNotIn('.', solved["solution"])
+        self.assertGreater(solved["stats"]["cells_filled"], 0)
+        self.assertEqual(invalid["status"], 'invalid')
+        self.assertIsNone(invalid["stats"])
+        self.assertRaises(ValueError, service.SolverService, engine='quantum')
+
+    async def testSolve(self):
+        async with service.SolverService(port=0, workers=0, engine='objects') as server:
+            status, result = await post(server.port, '/solve', EXPERT.encode())
+            self.assertEqual(status, 200)
+            self.assertEqual(result["status"], 'solved')
+            self.assertEqual(result["solution"], service.solve_batch([EXPERT])[0]["solution"])
+            self.assertGreater(result["stats"]["techniques"]["naked_single"], 0)
+            status, result = await post(server.port, '/solve', json.dumps({"puzzle": CLASH}).encode())
+            self.assertEqual((status, result["status"]), (200, 'invalid'))
+            self.assertEqual((await post(server.port, '/solve', b'123'))[0], 400)
+            self.assertEqual((await post(server.port, '/solve', b'', 'GET'))[0], 405)
+            self.assertEqual((await post(server.port, '/nowhere', b''))[0], 404)
+            status, health = await post(server.port, '/health', b'', 'GET')
+            self.assertEqual(status, 200)
+            self.assertEqual(health["requests"], 3)
+            self.assertEqual(health["solved"], 2)
+
+    async def testBatching(self):
+        async with service.SolverService(port=0, workers=1, batch_size=8, batch_window=0.05) as server:
+            results = await asyncio.gather(*[post(server.port, '/solve', EASY.encode()) for _ in range(8)])
+            self.assertEqual([status for status, result in results], [200] * 8)
+            self.assertLess(server.counts["batches"], 8)
+            self.assertEqual(server.counts["solved"], 8)
+
+    async def testKeepAlive(self):
+        async with service.SolverService(port=0, workers=0) as server:
+            reader, writer = await asyncio.open_connection(service.HOST, server.port)
+            for _ in range(3):
+                writer.write(f"POST /solve HTTP/1.1\r\nContent-Length: 81\r\n\r\n{EASY}".encode())
+                self.assertIn(b'200 OK', await reader.readline())
+                length = 0
+                while (line := await reader.readline()) != b'\r\n':
+                    if line.lower().startswith(b'content-length'):
+                        length = int(line.split(b':')[1])
+                self.assertEqual(json.loads(await reader.readexactly(length))["status"], 'solved')
+            writer.close()
+
+    async def testBackpressure(self):
+        server = await service.SolverService(port=0, workers=0, max_queue=1).start()
+        # Stop batching so that whatever is queued stays queued
+        server.batcher.cancel()
+        waiting = asyncio.get_running_loop().create_future()
+        server.queue.put_nowait((EASY, waiting))
+        status, result = await post(server.port, '/solve', EASY.encode())
+        self.assertEqual(status, 503)
+        self.assertEqual(server.counts["rejected"], 1)
+        await server.close()
+        self.assertIsInstance(waiting.exception(), ConnectionAbortedError)
+
+
+if __name__ == '__main__':
+    unittest.main()
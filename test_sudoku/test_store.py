@@ -0,0 +1,97 @@
+#! /usr/bin/env python3
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from samples.samples import EXPERT_SAMPLE_MATRIX
+from samples.samples import HARD_SAMPLE_MATRIX
+
+from sudoku_objects import pipeline
+from sudoku_objects.base import values_to_string
+from sudoku_objects.matrix import Matrix
+from sudoku_objects.store import PuzzleStore
+from sudoku_objects.store import puzzle_status
+
+TEST_CASE_VERBOSE = False
+INVALID = '11' + '.' * 79
+
+
+class test_store(unittest.TestCase):
+    def testPutAndQuery(self):
+        with PuzzleStore(batch_size=2) as store:
+            puzzle = values_to_string(HARD_SAMPLE_MATRIX)
+            store.put(puzzle, puzzle, 'stuck', 0.5)
+            self.assertEqual(store.get(puzzle)["status"], 'stuck')
+            self.assertEqual(store.connection.execute("SELECT COUNT(*) FROM puzzles").fetchone()[0], 0)
+            store.put(INVALID, INVALID, 'invalid')
+            self.assertEqual(store.connection.execute("SELECT COUNT(*) FROM puzzles").fetchone()[0], 2)
+            store.put(puzzle, puzzle.replace('.', '1'), 'solved', 0.25)
+            self.assertEqual(len(store), 2)
+            self.assertEqual(store.get(puzzle)["seconds"], 0.25)
+            self.assertEqual(store.counts(), {'solved': 1, 'stuck': 0, 'invalid': 1})
+            self.assertEqual([record["puzzle"] for record in store.query(clues=2)], [INVALID])
+            self.assertEqual([record["puzzle"] for record in store.query(status='solved')], [puzzle])
+            self.assertIsNone(store.get('.' * 81))
+            self.assertRaises(ValueError, store.put, puzzle, puzzle, 'unknown')
+        self.assertRaises(ValueError, PuzzleStore, ':memory:', 0)
+
+    def testPuzzleStatus(self):
+        self.assertEqual(puzzle_status(HARD_SAMPLE_MATRIX, True), 'solved')
+        self.assertEqual(puzzle_status(HARD_SAMPLE_MATRIX, False), 'stuck')
+        self.assertEqual(puzzle_status([int(character) if character != '.' else 0 for character in INVALID], False), 'invalid')
+
+    def testMatrixSolveWithStore(self):
+        store = PuzzleStore()
+        EX = Matrix(EXPERT_SAMPLE_MATRIX, verbose=TEST_CASE_VERBOSE)
+        EX.solve(verbose=TEST_CASE_VERBOSE, store=store)
+        record = store.get(values_to_string(EXPERT_SAMPLE_MATRIX))
+        self.assertEqual(record["status"], 'solved')
+        self.assertEqual(record["solution"], values_to_string([cell.value for cell in EX.cells]))
+        SE = Matrix(EXPERT_SAMPLE_MATRIX, verbose=TEST_CASE_VERBOSE)
+        stats = SE.solve(verbose=TEST_CASE_VERBOSE, store=store, stats=True)
+        self.assertTrue(SE.solved)
+        self.assertEqual(stats.iterations, 0)
+        self.assertEqual(len(store), 1)
+
+    def testStoredSecondsLeaveOutTheLookup(self):
+        clock = [0.0]
+
+        class SlowStore(PuzzleStore):
+            def get(self, puzzle):
+                clock[0] += 100
+                return super().get(puzzle)
+        store = SlowStore()
+        with mock.patch('sudoku_objects.matrix.perf_counter', lambda: clock[0]):
+            Matrix(HARD_SAMPLE_MATRIX, verbose=TEST_CASE_VERBOSE).solve(verbose=TEST_CASE_VERBOSE, engine='flat', store=store)
+        self.assertLess(store.get_many([values_to_string(HARD_SAMPLE_MATRIX)])[values_to_string(HARD_SAMPLE_MATRIX)]["seconds"], 100)
+
+    def testStoredUnsolvedIsNotSolvedAgain(self):
+        store = PuzzleStore()
+        store.put(values_to_string(HARD_SAMPLE_MATRIX), values_to_string(HARD_SAMPLE_MATRIX), 'stuck', 1.0)
+        HA = Matrix(HARD_SAMPLE_MATRIX, verbose=TEST_CASE_VERBOSE)
+        stats = HA.solve(verbose=TEST_CASE_VERBOSE, store=store, stats=True)
+        self.assertTrue(HA.stuck)
+        self.assertEqual(stats.iterations, 0)
+        self.assertEqual(store.get(values_to_string(HARD_SAMPLE_MATRIX))["status"], 'stuck')
+
+    def testSolveManyWithStore(self):
+        puzzles = list(pipeline.read_puzzles('samples/samples.txt', 'TXT')) + [('invalid', INVALID)]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'puzzles.db')
+            with PuzzleStore(path) as store:
+                first = list(pipeline.solve_many(puzzles, workers=0, store=store))
+            self.assertEqual([result["status"] for result in first], ['solved'] * 3 + ['invalid'])
+            with PuzzleStore(path) as store:
+                self.assertEqual(len(store), 4)
+                again = list(pipeline.solve_many(puzzles, workers=0, store=store))
+                self.assertEqual(again, first)
+                # Results come from the store rather than being solved again
+                store.connection.execute("UPDATE puzzles SET solution = ? WHERE puzzle = ?", ('stored', INVALID))
+                self.assertEqual(list(pipeline.solve_many(puzzles, workers=0, store=store))[-1]["solution"], 'stored')
+                store.connection.execute("UPDATE puzzles SET solution = ? WHERE puzzle = ?", (INVALID, INVALID))
+                self.assertEqual(list(pipeline.solve_many(puzzles * 2, workers=2, chunk_size=2, store=store)), first * 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
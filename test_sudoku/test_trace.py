@@ -0,0 +1,58 @@
+#! /usr/bin/env python3
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from samples.samples import EXPERT_SAMPLE_MATRIX
+from samples.samples import HARD_SAMPLE_MATRIX
+
+from sudoku_objects.base import DIGIT_BITS
+from sudoku_objects.matrix import Matrix
+from sudoku_objects.trace import TraceRecorder
+
+TEST_CASE_VERBOSE = False
+
+
+class test_trace(unittest.TestCase):
+    def testRingBuffer(self):
+        trace = TraceRecorder(capacity=3)
+        for cell in range(5):
+            trace.set_value(cell, 1, DIGIT_BITS[2] | DIGIT_BITS[7])
+        self.assertEqual(len(trace), 3)
+        self.assertEqual([event[2] for event in trace.events], [2, 3, 4])
+        self.assertEqual(trace.steps(last=1), ["Iteration 0: None set row:0; column:4 to 1 (eliminated 2, 7)"])
+        trace.technique = 'box_line'
+        trace.eliminate(80, DIGIT_BITS[5])
+        trace.backtrack(9, 3)
+        self.assertEqual(trace.steps(last=2), [
+            "Iteration 0: box_line eliminated 5 from row:8; column:8",
+            "Iteration 0: backtrack undid 3 at row:1; column:0",
+        ])
+        self.assertRaises(ValueError, TraceRecorder, 0)
+
+    def testSolveWithTrace(self):
+        for bitmask in [False, True]:
+            HD = Matrix(EXPERT_SAMPLE_MATRIX, verbose=True, bitmask=bitmask, trace=1000)
+            unsolved = len([cell for cell in HD.cells if not cell.is_solved])
+            printed = StringIO()
+            with redirect_stdout(printed):
+                HD.solve()
+            self.assertTrue(HD.solved)
+            self.assertNotIn("Iteration", printed.getvalue())
+            techniques = {event[1] for event in HD.trace.events}
+            self.assertTrue({'naked_single', 'hidden_single', 'guess'}.issubset(techniques))
+            placed = [event for event in HD.trace.events if event[3] and event[1] != 'backtrack']
+            undone = [event for event in HD.trace.events if event[1] == 'backtrack']
+            self.assertGreaterEqual(len(placed), unsolved)
+            self.assertEqual(len(HD.trace.steps()), len(HD.trace))
+            if not undone:
+                self.assertEqual(len(placed), unsolved)
+
+    def testNoTraceByDefault(self):
+        HD = Matrix(HARD_SAMPLE_MATRIX, verbose=TEST_CASE_VERBOSE)
+        self.assertIsNone(HD.trace)
+        self.assertTrue(all(cell.trace is None for cell in HD.cells))
+
+
+if __name__ == '__main__':
+    unittest.main()